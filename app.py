@@ -1,10 +1,13 @@
-import sqlite3
 import pandas as pd
 import streamlit as st
 import altair as alt
 import datetime
+import os
 import plotly.express as px
 
+import consultas
+from perfil_app import PerfilPestana
+
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Dashboard Agua Purificada",page_icon="💧", layout="wide")
 
@@ -22,156 +25,154 @@ def formato_peso(numero):
     return f"${numero:,.0f}".replace(",", ".")
 
 
-# --- 1. FUNCIÓN DE CARGA DE DATOS OPTIMIZADA (CACHÉ) ---
-@st.cache_data(ttl=3600) # Se actualiza cada 1 hora automáticamente
-def cargar_datos():
-    # 1. Abrimos la conexión
-    conn = sqlite3.connect("db_portafolio.db")
-    
-    # 2. Hacemos consultas separadas para no mezclar los datos
-    df_ventas = pd.read_sql("SELECT * FROM ventas_diarias", conn)
-    df_gastos = pd.read_sql("SELECT * FROM gastos", conn)
-    df_rutas = pd.read_sql("SELECT * FROM ruta", conn)
-    df_adicionales = pd.read_sql("SELECT * FROM adicionales", conn)
-    df_pendientes = pd.read_sql("SELECT * FROM pendientes", conn)
-    df_recargas = pd.read_sql("SELECT * FROM recargas", conn)
-    # 3. Cerramos la conexión
-    conn.close()
+# --- 1. CONSULTAS A LA BASE (CACHÉ) ---
+# Cada pestaña le pide a SQLite solo lo que muestra (ver consultas.py).
+# La caché guarda el resultado de cada combinación de filtros mientras no
+# cambie la versión de los datos: cuando el ETL guarda una carga nueva, el
+# sello cambia y el dashboard la muestra en el siguiente clic (sin TTL).
+# Es una caché de recursos: todas las sesiones reciben el MISMO objeto, sin
+# copiarlo. Por eso lo que devuelve consultar() es de solo lectura.
+# DASHBOARD_DB permite abrir otra base (ej. una sintética de generador_datos.py).
+RUTA_DB = os.environ.get("DASHBOARD_DB", "db_portafolio.db")
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def consultar_version(version, nombre, *filtros):
+    return getattr(consultas, nombre)(RUTA_DB, *filtros)
+
+
+def consultor():
+    """
+    Fija la versión de los datos para todo lo que dibuja una pestaña. Cada
+    pestaña la lee al empezar: al volver a correr solo su fragmento no pasa
+    por el principio del script, y así igual ve una carga nueva del ETL.
+    """
+    version = consultas.version_actual(RUTA_DB)
+    return lambda nombre, *filtros: consultar_version(version, nombre, *filtros)
+
+
+def pestana_abierta(pestana):
+    # Con Streamlit sin pestañas "perezosas" no hay .open: se dibujan todas
+    return getattr(pestana, "open", None) is not False
+
+
+# Cuando el rango es largo los gráficos diarios se agrupan (consultas.serie_por_fecha)
+NOTAS_GRANO = {
+    "semana": "Rango largo: una barra por semana (desde el lunes).",
+    "mes": "Rango largo: una barra por mes.",
+    "lttb": "Rango largo: se muestran los días que mejor conservan la forma de la curva.",
+}
+
+
+def nota_grano(grano):
+    if grano in NOTAS_GRANO:
+        st.caption(NOTAS_GRANO[grano])
+
+
+ORDEN_PLANILLA = "Orden de la planilla"
+
+
+def tabla_paginada(consultar, base, seleccion, total_filas, perfil):
+    """
+    Tabla de detalle de a una página: consultas.pagina_detalle ordena y
+    recorta, y solo esas filas se mandan al navegador.
+    - seleccion: lo elegido en los filtros de la pestaña (tupla).
+    - total_filas: cuántas filas cumplen los filtros (para las páginas).
+    - perfil: PerfilPestana de la pestaña (perfil_app.py).
+    """
+    paginas = max(1, -(-total_filas // consultas.FILAS_POR_PAGINA))
+    clave_pagina = f"pagina_{base}"
+    # Filtros nuevos: se vuelve a la primera página
+    if st.session_state.get(f"seleccion_{base}") != seleccion:
+        st.session_state[f"seleccion_{base}"] = seleccion
+        st.session_state[clave_pagina] = 1
+    elif st.session_state.get(clave_pagina, 1) > paginas:
+        st.session_state[clave_pagina] = paginas
+
+    col_orden, col_sentido, col_pagina = st.columns([2, 1, 1])
+    with col_orden:
+        orden = st.selectbox("↕️ Ordenar por:", [ORDEN_PLANILLA] + consultas.DETALLES[base], key=f"orden_{base}")
+    with col_sentido:
+        descendente = st.toggle("Descendente", key=f"descendente_{base}")
+    with col_pagina:
+        pagina = st.number_input(f"Página (de {paginas}):", min_value=1, max_value=paginas, step=1, key=clave_pagina)
+
+    df_pagina, total = consultar(
+        "pagina_detalle", base, seleccion, None if orden == ORDEN_PLANILLA else orden, descendente, int(pagina)
+    )
+    perfil.marca("detalle_consulta", filas=len(df_pagina))
+    desde = (int(pagina) - 1) * consultas.FILAS_POR_PAGINA
+    st.caption(f"Filas {min(desde + 1, total):,} a {desde + len(df_pagina):,} de {total:,}".replace(",", "."))
+    st.dataframe(df_pagina, use_container_width=True, hide_index=True)
+    perfil.marca("detalle_tabla")
 
-    
-    # 1. Eliminamos las filas donde la celda de CANTIDAD está vacía (Nulos / NaN)
-    df_ventas = df_ventas.dropna(subset=['CANTIDAD'])
-
-    # 2. (Filtro extra recomendado) Por si la secretaria no la dejó vacía, sino que escribió un "0"
-    df_ventas = df_ventas[df_ventas['CANTIDAD'] > 0]
-    # Eliminamos filas basura o subtítulos donde el gasto sea 0 o esté vacío
-    df_gastos = df_gastos[df_gastos["MONTO"] > 0]
-    
-    # 1. LIMPIEZA DE TEXTO (El jabón mágico)
-    df_rutas["COMUNA"] = df_rutas["COMUNA"].astype(str).str.strip().str.upper()
-    df_rutas['DIRECCION'] = df_rutas['DIRECCION'].str.strip()
-    # 4. TRUCO DE ANALISTA: Convertir la columna FECHA a formato 'datetime' de Pandas
-    for df in [df_ventas, df_gastos, df_rutas, df_adicionales, df_pendientes, df_recargas]:
-        if "FECHA" in df.columns:
-            # 1. Convertimos a fecha real de Pandas
-            fecha_temp = pd.to_datetime(df["FECHA"], errors='coerce')
-            
-            # 2. NUEVO: Creamos una columna mágica llamada 'MES' (Formato Año-Mes: "2026-02")
-            df["MES"] = fecha_temp.dt.strftime('%Y-%m')
-            
-            # 3. Le quitamos la hora a la fecha original (como ya lo tenías)
-            df["FECHA"] = fecha_temp.dt.date
-    # Unificamos a todos los 'Crisangel' en la tabla de Ventas
-    #df_ventas.loc[df_ventas['CLIENTE'].str.contains('crisange', case=False, na=False), 'CLIENTE'] = 'CRISANGEL'
-    
-    # 4. TRUCO DE ANALISTA: Convertir la columna FECHA a formato 'datetime' de Pandas
-    # Esto nos permitirá agrupar por mes o año súper fácil en los gráficos
-    for df in [df_ventas, df_gastos, df_rutas, df_adicionales, df_pendientes, df_recargas]:
-        if "FECHA" in df.columns:
-            df["FECHA"] = pd.to_datetime(df["FECHA"], errors='coerce').dt.date
-            
-    # --- LA CURA PARA LOS NÚMEROS NEGATIVOS DE LA SECRETARIA ---
-    # Usamos .abs() para volver todo positivo en las columnas de dinero
-    columnas_dinero = ["CANTIDAD","PRECIO", "TOTAL-PAGAR", "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"]
-    
-    for col in columnas_dinero:
-        if col in df_ventas.columns:
-            df_ventas[col] = df_ventas[col].abs()
-            df_recargas[col] = df_recargas[col].abs()
-            
-    # 5. Empaquetamos todo en un diccionario y lo enviamos
-    return {
-        "ventas": df_ventas,
-        "gastos": df_gastos,
-        "rutas": df_rutas,
-        "adicionales": df_adicionales,
-        "pendientes": df_pendientes,
-        "recargas": df_recargas
-    }
 
 # --- 2. INICIALIZACIÓN ---
-# Ejecutamos la función y guardamos nuestro paquete de datos
-datos = cargar_datos()
+st.title("💧 AGUAS INTERNACIONALES")
 
-# Para sacar un dataframe específico, solo lo llamamos por su nombre:
-df_ventas = datos["ventas"]
-df_gastos = datos["gastos"]
-df_rutas = datos['rutas']
-df_adicionales = datos["adicionales"]
-df_pendientes = datos["pendientes"]
-df_recargas = datos["recargas"]
+# Crear las pestañas al principio.
+# on_change="rerun": al cambiar de pestaña el script corre de nuevo y solo se
+# dibuja la que quedó abierta (las otras no consultan nada hasta que se abren).
+NOMBRES_PESTANAS = ["📊 Resumen de Ventas", "🎯 Análisis de Ruta", "Adicionales","Gastos de Empresa"]
+try:
+    tab1, tab2, tab3, tab4 = st.tabs(NOMBRES_PESTANAS, key="pestana", on_change="rerun")
+except TypeError:
+    # Versiones viejas de Streamlit: pestañas normales (se dibujan todas)
+    tab1, tab2, tab3, tab4 = st.tabs(NOMBRES_PESTANAS)
 
-st.title("💧 AGUAS INTERNACIONALES")
 
-# (Importante: Ahora en tu gráfico de abajo debes usar 'df_ventas_filtrado' en lugar de 'df_ventas')
+# --- 3. UNA FUNCIÓN (FRAGMENTO) POR PESTAÑA ---
+# Cada pestaña es un st.fragment: al mover uno de sus filtros solo se vuelve a
+# correr esa pestaña, no el script entero ni las otras tres.
 
-df_ventas["TIPO_PRODUCTO"] = "RECARGA 20LTS"
-df_recargas["TIPO_PRODUCTO"] = "RECARGA 10LTS"
-df_ventas_maestra = pd.concat([df_ventas, df_recargas], ignore_index=True)
-# Crear las pestañas al principio
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Resumen de Ventas", "🎯 Análisis de Ruta", "Adicionales","Gastos de Empresa"])
+@st.fragment
+def pestana_ventas():
+    consultar = consultor()
+    perfil = PerfilPestana("ventas")
 
-with tab1:
     st.header("💧 Panel de Control - Planta de Agua")
     
     col1,col2,col3= st.columns(3)
 
     with col1:
         # Un selector de clientes automático (agregamos "Todos" como primera opción)
-        lista_clientes = ["Todos"] + list(df_ventas_maestra["CLIENTE"].dropna().unique())
+        lista_clientes = consultar("clientes_ventas")
         cliente_seleccionado = st.selectbox("👤 Buscar Cliente:", lista_clientes)
         
+    # Las filas sin fecha no sirven para el dashboard: el rango sale solo de las que tienen fecha
+    fecha_minima, fecha_maxima = consultar("rango_fechas_ventas")
     with col2:
         #Mostrar desde un inicio los ultimos 7 dias
         #hoy = pd.to_datetime("today").date()
         #hace_siete_dias = hoy - datetime.timedelta(days=7)
         # Selector de fecha de inicio
-        # 1. Forzamos a que todo en esa columna sea tratado como Fecha. 
-        # errors='coerce' hace que cualquier celda vacía o texto mal escrito se convierta en 'NaT' (Not a Time)
-        
-        df_ventas_maestra["FECHA"] = pd.to_datetime(df_ventas_maestra["FECHA"], errors='coerce')
-
-        # 2. Pasamos la escoba: Eliminamos cualquier fila donde la fecha sea nula (NaT)
-        # Si no hay fecha, esa fila no nos sirve para el dashboard de todas formas
-        df_ventas_maestra = df_ventas_maestra.dropna(subset=["FECHA"])
-
-        # 3. Nos aseguramos de quedarnos solo con el día/mes/año (ignorando horas si las hubiera)
-        df_ventas_maestra["FECHA"] = df_ventas_maestra["FECHA"].dt.date
-        fecha_minima = df_ventas_maestra["FECHA"].min() if not df_ventas_maestra.empty else pd.to_datetime("today").date()
         fecha_inicio = st.date_input("📅 Desde:", value=fecha_minima)
 
     with col3:
         # Selector de fecha de fin
-        fecha_maxima = df_ventas_maestra["FECHA"].max() if not df_ventas_maestra.empty else pd.to_datetime("today").date()
         fecha_fin = st.date_input("📅 Hasta:", value=fecha_maxima)
+    perfil.marca("filtros")
     # --- 🚀 APLICAR LOS FILTROS A LA TABLA ---
-    # Le decimos a Pandas: "Filtra la tabla de ventas según las fechas que eligió el usuario"
-    df_ventas_filtrado = df_ventas_maestra[
-        (df_ventas_maestra["FECHA"] >= fecha_inicio) & 
-        (df_ventas_maestra["FECHA"] <= fecha_fin)
-    ]
-    # Si el usuario no eligió "Todos", filtramos también por el cliente exacto
-    if cliente_seleccionado != "Todos":
-        df_ventas_filtrado = df_ventas_filtrado[df_ventas_filtrado["CLIENTE"] == cliente_seleccionado]
-        
+    # SQLite filtra por fechas (y por cliente si no eligió "Todos") y nos devuelve
+    # los totales, los datos de los gráficos y el detalle
+    ventas = consultar("resumen_ventas", fecha_inicio, fecha_fin, cliente_seleccionado)
+    perfil.marca("consulta_resumen", filas=ventas["filas"])
 
     # --- 3. CÁLCULOS RÁPIDOS PARA LOS KPIs ---
     # 1. Creamos las columnas
     kpi1, kpi2, kpi3 = st.columns([1, 1, 1])
 
     # 2. Lógica de cálculo segura (Solo se ejecuta si hay datos)
-    if not df_ventas_filtrado.empty:
+    if ventas["filas"]:
         # Cálculos de Ventas Totales
-        total_ventas = df_ventas_filtrado["TOTAL-PAGAR"].sum()
+        total_ventas = ventas["total"]
         
         # Cálculos del Mejor Cliente
-        ventas_cliente = df_ventas_filtrado.groupby("CLIENTE")["TOTAL-PAGAR"].sum()
-        nombre_mejor_cliente = ventas_cliente.idxmax()
+        nombre_mejor_cliente = ventas["mejor_cliente"]
         
         # Cálculos del Mejor Mes
-        ventas_mes = df_ventas_filtrado.groupby("MES")["TOTAL-PAGAR"].sum()
-        nombre_mejor_mes = ventas_mes.idxmax()  # Esto saca "2026-02"
-        monto_mejor_mes = ventas_mes.max()      # Esto saca el número de ganancias de ese mes
+        nombre_mejor_mes = ventas["mejor_mes"]  # Esto saca "2026-02"
+        monto_mejor_mes = ventas["monto_mejor_mes"]      # Esto saca el número de ganancias de ese mes
     else:
         # Valores por defecto para que la app no explote si la base de datos está vacía
         total_ventas = 0
@@ -198,14 +199,10 @@ with tab1:
         st.subheader("📈 Monto de Ventas Diarias")
         
         # 1. PREPARACIÓN DE DATOS (El motor lógico)
-        # Agrupamos por FECHA y sumamos el TOTAL-PAGAR. El reset_index() lo vuelve a convertir en una tabla plana.
-        ventas_por_dia = df_ventas_filtrado.groupby("FECHA")["TOTAL-PAGAR"].sum().reset_index()
-        
-        # Ordenamos cronológicamente por si acaso los datos vienen desordenados
-        ventas_por_dia = ventas_por_dia.sort_values("FECHA")
-        # 🛠️ LA MAGIA VISUAL: Convertimos la fecha a texto solo para el gráfico
-        # Así Streamlit hace barras anchas y repartidas en toda la pantalla
-        ventas_por_dia["FECHA"] = ventas_por_dia["FECHA"].astype(str)
+        # SQLite ya agrupó por FECHA (o por semana/mes si el rango es largo), sumó el TOTAL-PAGAR y lo ordenó cronológicamente.
+        # La fecha viene como texto: así Streamlit hace barras anchas y repartidas en toda la pantalla
+        ventas_por_dia = ventas["por_dia"]
+        nota_grano(ventas["grano_por_dia"])
         
         # 2. EL GRÁFICO (La capa visual)
         # Usamos un gráfico de barras nativo de Streamlit, súper rápido y elegante
@@ -219,73 +216,63 @@ with tab1:
     with col_graf2:
         st.subheader("📦 Venta Mensual de Recargas 20LTS")
                 
-        ventas_recargas = df_ventas_filtrado.groupby('MES')["CANTIDAD"].sum()
+        ventas_recargas = ventas["cantidad_por_mes"]
         
         
         st.bar_chart(ventas_recargas, color="#114553")
+    perfil.marca("kpis_y_graficos", filas=len(ventas["por_dia"]))
     with st.expander("🔎 Ver Datos Detallados (Click para desplegar)"):
-        st.dataframe(df_ventas_filtrado[['FECHA','CLIENTE',"TIPO_PRODUCTO",'CANTIDAD','PRECIO','TOTAL-PAGAR','EFECTIVO','TRANSFERENCIA','TARJETA','PENDIENTE']], use_container_width=True, hide_index=True)
+        tabla_paginada(consultar, "ventas", (fecha_inicio, fecha_fin, cliente_seleccionado), ventas["filas"], perfil)
+    perfil.cerrar()
     
             
-with tab2:
+@st.fragment
+def pestana_ruta():
+    consultar = consultor()
+    perfil = PerfilPestana("ruta")
+
     st.title("🚚 Panel de Ruta")
     col1,col2,col3,col4 = st.columns(4)
     
     
     with col1:
-        lista_comuna = ["Todos"] + list(df_rutas["COMUNA"].dropna().unique())
+        lista_comuna = consultar("comunas_ruta")
         comuna_select = st.selectbox("📍 Filtrar por Comunas:", lista_comuna)
     # 🛠️ LA MAGIA DE LA CASCADA 🛠️
-    # Antes de pasar a la columna 2, creamos una tabla "temporal" solo con la comuna elegida
-    if comuna_select == "Todos":
-        df_ruta_temp = df_rutas  # Si eligió "Todos", la tabla queda intacta
-    else:
-        # Si eligió una comuna, filtramos la tabla
-        df_ruta_temp = df_rutas[df_rutas['COMUNA'] == comuna_select]
+    # Cada lista se le pide a SQLite con los filtros que ya se eligieron antes
+    # (si eligió "Todos", ese filtro no se aplica)
         
     with col2:
-        # 2. SEGUNDO FILTRO: La Dirección (¡Pero leyendo de la tabla temporal!)
-        # Como df_rutas_temporal ya está filtrada, solo sacará las direcciones de esa comuna
-        lista_cliente = ["Todos"] + list(df_ruta_temp["DIRECCION"].dropna().unique())
+        # 2. SEGUNDO FILTRO: La Dirección (¡Solo las de la comuna elegida!)
+        lista_cliente = consultar("direcciones_ruta", comuna_select)
         direccion_select = st.selectbox("👤 Direccion Clientes:", lista_cliente)
-        # Aplicamos filtro de Dirección inmediatamente
-    if direccion_select != "Todos":
-        df_ruta_temp = df_ruta_temp[df_ruta_temp["DIRECCION"] == direccion_select].copy()
     with col3:
         # Aprovechamos la columna 3 para poner un filtro de fecha para el repartidor
         # (Así puede ver solo la ruta de "hoy")
-        mes = ["Todos"] + list(df_ruta_temp["MES"].dropna().unique())
+        mes = consultar("meses_ruta", comuna_select, direccion_select)
         mes_select = st.selectbox("📅 Seleccione Mes:", mes)
-    # Aplicamos filtro de Mes inmediatamente
-    if mes_select != "Todos":
-        df_ruta_temp = df_ruta_temp[df_ruta_temp["MES"] == mes_select].copy()
         
     with col4:
-        fecha_ruta = ["Todos"] + list(df_ruta_temp["FECHA"].astype(str).unique())
+        fecha_ruta = consultar("dias_ruta", comuna_select, direccion_select, mes_select)
         fecha_select = st.selectbox("📅 Seleccione Dia:", fecha_ruta)
-    # --- 🚀 APLICAMOS TODOS LOS FILTROS AL DATAFRAME FINAL ---
-    if fecha_select != "Todos":
-        df_ruta_temp = df_ruta_temp[df_ruta_temp["FECHA"].astype(str) == fecha_select]
-
-    df_rutas_filtrado = df_ruta_temp # Ya viene con el filtro de comuna aplicado
+    perfil.marca("filtros")
+    # --- 🚀 APLICAMOS TODOS LOS FILTROS EN LA CONSULTA FINAL ---
+    ruta = consultar("resumen_ruta", comuna_select, direccion_select, mes_select, fecha_select)
+    perfil.marca("consulta_resumen", filas=ruta["filas"])
         
     kpi1, kpi2, kpi3 = st.columns([1, 2, 1])
 
     # 2. Lógica de cálculo segura (Solo se ejecuta si hay datos)
-    if not df_rutas_filtrado.empty:
+    if ruta["filas"]:
         # Cálculos de Ventas Totales
-        total_ventas = df_rutas_filtrado["TOTAL"].sum()
+        total_ventas = ruta["total"]
         
         # Cálculos del Mejor Cliente
-        ventas_cliente = df_rutas_filtrado.groupby("DIRECCION")["TOTAL"].sum()
-        nombre_mejor_cliente = ventas_cliente.idxmax()
+        nombre_mejor_cliente = ruta["mejor_direccion"]
         
-        # Cálculos del Mejor Mes
-        ventas_mes = df_rutas_filtrado.groupby("MES")["TOTAL"].sum()
-        extra = df_rutas_filtrado.groupby("MES")["EXTRA"].sum()
-        suma_ruta = extra + ventas_mes
-        nombre_mejor_mes = suma_ruta.idxmax()  # Esto saca "2026-02"
-        monto_mejor_mes = suma_ruta.max()      # Esto saca el número de ganancias de ese mes
+        # Cálculos del Mejor Mes (lo cobrado + los extras)
+        nombre_mejor_mes = ruta["mejor_mes"]  # Esto saca "2026-02"
+        monto_mejor_mes = ruta["monto_mejor_mes"]      # Esto saca el número de ganancias de ese mes
     else:
         # Valores por defecto para que la app no explote si la base de datos está vacía
         total_ventas = 0
@@ -305,82 +292,76 @@ with tab2:
     
     with col_graf1:
         st.subheader("📈 MEJORES COMUNAS")
-        # 1. LIMPIEZA DE TEXTO (El jabón mágico)
-        df_rutas_filtrado["COMUNA"] = df_rutas_filtrado["COMUNA"].astype(str).str.strip().str.upper()
-        # 2. AHORA SÍ, AGRUPAMOS Y ORDENAMOS
-        ventas_comunas = df_rutas_filtrado.groupby('COMUNA')["TOTAL"].sum().sort_values()
-        ventas_comunas = ventas_comunas.tail(10)
+        # Las 10 comunas que más venden (ya vienen en mayúsculas desde la base)
+        ventas_comunas = ruta["top_comunas"]
         # 3. DIBUJAMOS EL GRÁFICO
         st.bar_chart(ventas_comunas)
+    perfil.marca("kpis_y_graficos", filas=len(ventas_comunas))
     
     # --- MOSTRAR RESULTADOS ---
     st.subheader(f"📋 Clientes Visitados")
-    st.dataframe(df_rutas_filtrado[['FECHA','DETALLE','DIRECCION','COMUNA','CANTIDAD','VALOR','TOTAL','EXTRA']], use_container_width=True, hide_index=True)
+    tabla_paginada(consultar, "ruta", (comuna_select, direccion_select, mes_select, fecha_select), ruta["filas"], perfil)
     with col_graf2:
         st.subheader("💧 VENTA DIARIA RUTA")
     
-    # 1. Agrupamos por FECHA y sumamos la CANTIDAD (no el dinero, sino los botellones físicos)
-        botellones_por_dia = df_rutas_filtrado.groupby("FECHA")["TOTAL"].sum()
+    # 1. Total de ruta por FECHA (ya sumado por SQLite)
+        botellones_por_dia = ruta["total_por_dia"]
+        nota_grano(ruta["grano_por_dia"])
     
     # 2. Dibujamos un gráfico de área o línea
         st.line_chart(botellones_por_dia)
+    perfil.marca("grafico_diario", filas=len(botellones_por_dia))
+    perfil.cerrar()
         
         
-with tab3:
+@st.fragment
+def pestana_adicionales():
+    consultar = consultor()
+    perfil = PerfilPestana("adicionales")
+
     st.header("💧 Venta de ADICIONALES")
     
     col1,col2,col3= st.columns(3)
 
     with col1:
         # Un selector de clientes automático (agregamos "Todos" como primera opción)
-        lista_cliente = ["Todos"] + list(df_adicionales["CLIENTE"].dropna().unique())
+        lista_cliente = consultar("clientes_adicionales")
         cliente_seleccionado = st.selectbox("👤 Buscar Cliente:", lista_cliente)
     
-    if cliente_seleccionado == "Todos":
-        df_adicional_temp = df_adicionales  # Si eligió "Todos", la tabla queda intacta
-    else:
-        # Si eligió una comuna, filtramos la tabla
-        df_adicional_temp = df_adicionales[df_adicionales['CLIENTE'] == cliente_seleccionado]
+    # Los productos y las fechas que se ofrecen dependen del cliente elegido
+    producto, fecha_adicionales = consultar("productos_y_fechas_adicionales", cliente_seleccionado)
         
     with col2:
         #hoy = pd.to_datetime("today").date()
         #hace_siete_dias = hoy - datetime.timedelta(days=7)
         # Selector de Producto
-        producto = ["Todos"] + list(df_adicional_temp["PRODUCTO"].dropna().unique())
         producto_select = st.selectbox("Filtrar Producto", producto)
 
     with col3:
         # Selector de fecha de fin
-        fecha_adicionales = ["Todos"] + list(df_adicional_temp["FECHA"].astype(str).unique())
         fecha_select = st.selectbox("Selecciona Fecha", fecha_adicionales)
+    perfil.marca("filtros")
 
         
-    # 1. Ya filtramos el Cliente arriba, ahora tomamos esa tabla y filtramos el Producto
-    if producto_select != "Todos":
-        df_adicional_temp = df_adicional_temp[df_adicional_temp["PRODUCTO"] == producto_select]
-        
-    # 2. Tomamos la tabla (ya filtrada por cliente y producto) y filtramos la Fecha
-    if fecha_select != "Todos":
-        # Convertimos la fecha de la tabla a texto para que coincida con el selectbox
-        df_adicional_temp = df_adicional_temp[df_adicional_temp["FECHA"].astype(str) == fecha_select]
+    # Cliente, producto y fecha se filtran en la misma consulta
+    adicionales = consultar("resumen_adicionales", cliente_seleccionado, producto_select, fecha_select)
+    perfil.marca("consulta_resumen", filas=adicionales["filas"])
 
     # --- 3. CÁLCULOS RÁPIDOS PARA LOS KPIs ---
     # 1. Creamos las columnas
     kpi1, kpi2, kpi3 = st.columns([1, 2, 1])
 
     # 2. Lógica de cálculo segura (Solo se ejecuta si hay datos)
-    if not df_adicional_temp.empty:
+    if adicionales["filas"]:
         # Cálculos de Ventas Totales
-        total_ventas = df_adicional_temp["MONTO"].sum()
+        total_ventas = adicionales["total"]
         
-        # Cálculos del Mejor Cliente
-        producto_mas_vendido = df_adicional_temp.groupby("PRODUCTO")["MONTO"].sum()
-        mejor_producto = producto_mas_vendido.idxmax()
+        # Cálculos del Mejor Producto
+        mejor_producto = adicionales["mejor_producto"]
         
         # Cálculos del Mejor Mes
-        ventas_mes = df_adicional_temp.groupby("MES")["MONTO"].sum()
-        nombre_mejor_mes = ventas_mes.idxmax()  # Esto saca "2026-02"
-        monto_mejor_mes = ventas_mes.max()      # Esto saca el número de ganancias de ese mes
+        nombre_mejor_mes = adicionales["mejor_mes"]  # Esto saca "2026-02"
+        monto_mejor_mes = adicionales["monto_mejor_mes"]      # Esto saca el número de ganancias de ese mes
     else:
         # Valores por defecto para que la app no explote si la base de datos está vacía
         total_ventas = 0
@@ -407,18 +388,8 @@ with tab3:
         st.subheader("📈 Ventas Diarias Adicionales")
         
         # 1. PREPARACIÓN DE DATOS (El motor lógico)
-        # Agrupamos por FECHA y sumamos el TOTAL-PAGAR. El reset_index() lo vuelve a convertir en una tabla plana.
-        ventas_por_dia = df_adicional_temp.groupby("FECHA")["MONTO"].sum().reset_index()
-        
-        # Ordenamos cronológicamente por si acaso los datos vienen desordenados
-        ventas_por_dia = ventas_por_dia.sort_values("FECHA")
-        
-        # ✂️ LA MAGIA: Nos quedamos solo con los últimos 10 días
-        ventas_por_dia = ventas_por_dia.tail(7)
-        
-        # 🛠️ LA MAGIA VISUAL: Convertimos la fecha a texto solo para el gráfico
-        # Así Streamlit hace barras anchas y repartidas en toda la pantalla
-        ventas_por_dia["FECHA"] = ventas_por_dia["FECHA"].astype(str)
+        # SQLite ya agrupó por FECHA y nos devuelve solo los últimos 7 días, en orden
+        ventas_por_dia = adicionales["ultimos_dias"]
         
         # 2. EL GRÁFICO (La capa visual)
         # Usamos un gráfico de barras nativo de Streamlit, súper rápido y elegante
@@ -431,64 +402,57 @@ with tab3:
     with col_graf2:
         st.subheader("📦 Venta Mensual Adicionales")
                 
-        ventas_recargas = df_adicional_temp.groupby('MES')["MONTO"].sum()
+        ventas_recargas = adicionales["monto_por_mes"]
         
         
         st.bar_chart(ventas_recargas, color="#114553")
+    perfil.marca("kpis_y_graficos", filas=len(ventas_por_dia))
     with st.expander("🔎 Ver Datos Detallados (Click para desplegar)"):
-        st.dataframe(df_adicional_temp[['FECHA','CLIENTE',"PRODUCTO",'CANTIDAD','PRECIO','MONTO']], use_container_width=True, hide_index=True)
+        tabla_paginada(consultar, "adicionales", (cliente_seleccionado, producto_select, fecha_select), adicionales["filas"], perfil)
+    perfil.cerrar()
     
     
-with tab4:
+@st.fragment
+def pestana_gastos():
+    consultar = consultor()
+    perfil = PerfilPestana("gastos")
+
     st.header("💸 Gastos de Empresa")
     
     col1,col2,col3= st.columns(3)
 
     with col1:
         # Un selector de clientes automático (agregamos "Todos" como primera opción)
-        fecha = ["Todos"] + list(df_gastos["MES"].dropna().unique())
+        fecha = consultar("meses_gastos")
         fecha_mensual = st.selectbox("📅 Seleccione Mes:", fecha)
-    
-    if fecha_mensual == "Todos":
-        df_gastos_temp = df_gastos  # Si eligió "Todos", la tabla queda intacta
-    else:
-        # Si eligió una comuna, filtramos la tabla
-        df_gastos_temp =  df_gastos[df_gastos["MES"] == fecha_mensual].copy()
         
     with col2:
         #hoy = pd.to_datetime("today").date()
         #hace_siete_dias = hoy - datetime.timedelta(days=7)
-        # Selector de Producto
-        categoria = ["Todos"] + list(df_gastos_temp["CATEGORIA"].dropna().unique())
+        # Selector de Categoría (solo las del mes elegido)
+        categoria = consultar("categorias_gastos", fecha_mensual)
         categoria_select = st.selectbox("Filtrar Categoria", categoria)
-    #filtramos categoria
-    if categoria_select != "Todos":
-        df_gastos_temp = df_gastos_temp[df_gastos_temp["CATEGORIA"] == categoria_select].copy()
 
     with col3:
-        # Selector de fecha de fin
-        descripcion = ["Todos"] + list(df_gastos_temp["DESCRIPCION"].astype(str).unique())
+        # Selector de Descripción (solo las del mes y categoría elegidos)
+        descripcion = consultar("descripciones_gastos", fecha_mensual, categoria_select)
         descripcion_select = st.selectbox("Selecciona Descripcion", descripcion)
+    perfil.marca("filtros")
         
-    # 2. Tomamos la tabla (ya filtrada por cliente y producto) y filtramos la Fecha
-    if descripcion_select != "Todos":
-        # Convertimos la fecha de la tabla a texto para que coincida con el selectbox
-        df_gastos_temp = df_gastos_temp[df_gastos_temp["DESCRIPCION"] == descripcion_select].copy()
-        
-    df_gastos_filtrado = df_gastos_temp
+    # Mes, categoría y descripción se filtran en la misma consulta
+    gastos = consultar("resumen_gastos", fecha_mensual, categoria_select, descripcion_select)
+    perfil.marca("consulta_resumen", filas=gastos["filas"])
         
     # --- 3. CÁLCULOS RÁPIDOS PARA LOS KPIs ---
     # 1. Creamos las columnas
     kpi1, kpi2, kpi3 = st.columns([1, 2, 1])
 
     # 2. Lógica de cálculo segura (Solo se ejecuta si hay datos)
-    if not df_gastos_filtrado.empty:
-        total_gastos = df_gastos_filtrado["MONTO"].sum()
-        gasto_por_categoria = df_gastos_filtrado.groupby("CATEGORIA")["MONTO"].sum()
-        peor_categoria = gasto_por_categoria.idxmax()
-        gastos_mes = df_gastos_filtrado.groupby("MES")["MONTO"].sum()
-        nombre_peor_mes = gastos_mes.idxmax()  
-        monto_peor_mes = gastos_mes.max()      
+    if gastos["filas"]:
+        total_gastos = gastos["total"]
+        peor_categoria = gastos["peor_categoria"]
+        nombre_peor_mes = gastos["peor_mes"]  
+        monto_peor_mes = gastos["monto_peor_mes"]      
     else:
         total_gastos = 0
         peor_categoria = "Sin datos"
@@ -498,6 +462,7 @@ with tab4:
     kpi1.metric("GASTOS TOTALES", value=formato_peso(total_gastos))
     kpi2.metric("🚨 MAYOR FUGA DE DINERO", value=peor_categoria)
     kpi3.metric("📅 MES DE MAYOR GASTO", value=nombre_peor_mes, delta=formato_peso(-monto_peor_mes)) 
+    perfil.marca("kpis")
     
         
     # --- 4. DISEÑO DE LA PANTALLA (MAGIA DE PLOTLY) ---
@@ -507,10 +472,8 @@ with tab4:
     with col_graf1:
         st.subheader("📈 Evolución de Gastos Diarios")
         
-        if not df_gastos_filtrado.empty:
-            gastos_por_dia = df_gastos_filtrado.groupby("FECHA")["MONTO"].sum().reset_index()
-            gastos_por_dia = gastos_por_dia.sort_values("FECHA").tail(15) # Últimos 15 días
-            gastos_por_dia["FECHA"] = gastos_por_dia["FECHA"].astype(str)
+        if gastos["filas"]:
+            gastos_por_dia = gastos["ultimos_dias"] # Últimos 15 días (ya sumados por SQLite)
             
             # ✨ Gráfico de barras interactivo de Plotly
             fig_gastos_dia = px.bar(
@@ -535,8 +498,8 @@ with tab4:
     with col_graf2:
         st.subheader("📊 Distribución por Categoría")
                 
-        if not df_gastos_filtrado.empty:
-            gastos_cat = df_gastos_filtrado.groupby('CATEGORIA')["MONTO"].sum().reset_index()
+        if gastos["filas"]:
+            gastos_cat = gastos["por_categoria"]
             
             # ✨ Gráfico de Dona interactivo
             fig_dona = px.pie(
@@ -553,6 +516,15 @@ with tab4:
             st.plotly_chart(fig_dona, use_container_width=True)
         else:
             st.info("No hay datos para graficar.")
+    perfil.marca("graficos_plotly")
             
     with st.expander("🔎 Ver Datos Detallados (Click para desplegar)"):
-        st.dataframe(df_gastos_filtrado[['FECHA','CATEGORIA','DESCRIPCION','MONTO']], use_container_width=True, hide_index=True)
\ No newline at end of file
+        tabla_paginada(consultar, "gastos", (fecha_mensual, categoria_select, descripcion_select), gastos["filas"], perfil)
+    perfil.cerrar()
+
+
+# --- 4. DIBUJAR SOLO LA PESTAÑA ABIERTA ---
+for pestana, dibujar in [(tab1, pestana_ventas), (tab2, pestana_ruta), (tab3, pestana_adicionales), (tab4, pestana_gastos)]:
+    with pestana:
+        if pestana_abierta(pestana):
+            dibujar()
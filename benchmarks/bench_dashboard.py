@@ -0,0 +1,294 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from generador_datos import FILAS_POR_DIA, crear_base_sintetica
+
+# ==========================================================
+# BENCHMARK: DASHBOARD A VARIAS ESCALAS DE DATOS
+# ==========================================================
+# Corre el app.py de verdad sin navegador (streamlit.testing AppTest) contra
+# bases sintéticas de generador_datos.py de 1x, 10x... el volumen actual, y mide:
+#   - arranque en frío: la primera corrida del script con las cachés vacías
+#     (como después de que el ETL publica una versión nueva),
+#   - sesión nueva: la primera corrida de otro usuario con la caché ya llena,
+#   - cada interacción típica de las cuatro pestañas (rango de fechas, cliente,
+#     cascada comuna -> dirección, categoría de gasto...), con valores distintos
+#     en cada repetición para que no salgan todas de la caché,
+#   - la memoria máxima del proceso (RSS).
+# Cada escala corre en su propio proceso (así la RSS y el frío son de esa escala).
+# El resultado se compara con benchmarks/linea_base_dashboard.json: si algo
+# empeora más que la tolerancia, el script termina con error.
+#
+#   python benchmarks/bench_dashboard.py                      # Escalas 1 y 10, compara con la línea base
+#   python benchmarks/bench_dashboard.py --escalas 1 10 100
+#   python benchmarks/bench_dashboard.py --actualizar-linea-base
+
+CARPETA_BASES = os.path.join(RAIZ, "benchmarks", "bases")
+LINEA_BASE = os.path.join(RAIZ, "benchmarks", "linea_base_dashboard.json")
+SALIDA = os.path.join(RAIZ, "benchmarks", "ultimo_dashboard.json")
+APP = os.path.join(RAIZ, "app.py")
+MARCA_RESULTADO = "RESULTADO_BENCH "
+TOLERANCIA = 0.50           # 50% más lento (o más memoria) que la línea base = regresión
+MINIMO_MS = 25.0            # ...y al menos esta diferencia, para no fallar por ruido en lo muy rápido
+MINIMO_MB = 20.0
+
+# {nombre corto: etiqueta de la pestaña en app.py}
+PESTANAS = {
+    "ventas": "📊 Resumen de Ventas",
+    "ruta": "🎯 Análisis de Ruta",
+    "adicionales": "Adicionales",
+    "gastos": "Gastos de Empresa",
+}
+
+
+#---------------- FUNCIONES DE APOYO ------------------------#
+def opciones_base(escala):
+    """Parámetros de generador_datos para una escala (los clientes crecen más lento que las filas)."""
+    return {
+        "anios": 3,
+        "filas_por_dia": FILAS_POR_DIA * escala,
+        "clientes": int(700 * escala ** 0.5),
+        "comunas": 100,
+        "semilla": 7,
+    }
+
+
+def preparar_base(escala, regenerar=False):
+    ruta = os.path.join(CARPETA_BASES, f"sintetica_x{escala:g}.db")
+    if regenerar and os.path.exists(ruta):
+        os.remove(ruta)
+    if not os.path.exists(ruta):
+        os.makedirs(CARPETA_BASES, exist_ok=True)
+        print(f"⏳ Generando base x{escala:g} ({ruta})...")
+        crear_base_sintetica(ruta, **opciones_base(escala))
+    return ruta
+
+
+def percentiles(tiempos):
+    serie = pd.Series(tiempos, dtype="float64")
+    return {"p50_ms": round(serie.quantile(0.5), 2), "p95_ms": round(serie.quantile(0.95), 2)}
+
+
+# ==========================================================
+# MEDICIÓN (corre dentro del proceso de cada escala)
+# ==========================================================
+def limpiar_caches():
+    """Deja el dashboard como recién arrancado: caché de Streamlit e índices de consultas.py."""
+    import streamlit as st
+
+    import consultas
+
+    st.cache_resource.clear()
+    for objeto in vars(consultas).values():
+        if hasattr(objeto, "cache_clear"):
+            objeto.cache_clear()
+
+
+def elegir(at, lista, etiqueta):
+    """El widget de 'lista' (ej. at.selectbox) con esa etiqueta, en la pestaña dibujada."""
+    for widget in lista:
+        if widget.label == etiqueta:
+            return widget
+    raise LookupError(f"No se encontró el widget '{etiqueta}'")
+
+
+def correr(at, pestana):
+    # AppTest no recuerda la pestaña abierta entre corridas: se vuelve a elegir antes de cada una
+    at.session_state["pestana"] = PESTANAS[pestana]
+    inicio = time.perf_counter()
+    at.run()
+    segundos = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(f"El dashboard falló en '{pestana}': {at.exception[0].value}")
+    return segundos * 1000
+
+
+def nueva_sesion():
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP, default_timeout=600)
+
+
+def cambiar(at, lista, etiqueta, vuelta):
+    """Elige en el selectbox/date_input un valor distinto en cada vuelta (sin repetir el de la caché)."""
+    widget = elegir(at, lista, etiqueta)
+    if hasattr(widget, "options"):
+        opciones = widget.options
+        widget.set_value(opciones[1 + vuelta % (len(opciones) - 1)] if len(opciones) > 1 else opciones[0])
+    else:
+        widget.set_value(widget.value + datetime.timedelta(days=30))
+
+
+# (interacción, pestaña, [(lista de widgets, etiqueta)]): cada cambio se mide por separado
+INTERACCIONES = [
+    ("ventas_rango_fechas", "ventas", [("date_input", "📅 Desde:")]),
+    ("ventas_cliente", "ventas", [("selectbox", "👤 Buscar Cliente:")]),
+    ("ruta_cascada", "ruta", [("selectbox", "📍 Filtrar por Comunas:"), ("selectbox", "👤 Direccion Clientes:")]),
+    ("adicionales_cliente", "adicionales", [("selectbox", "👤 Buscar Cliente:")]),
+    ("gastos_categoria", "gastos", [("selectbox", "Filtrar Categoria")]),
+]
+
+
+def medir_interacciones(repeticiones):
+    """
+    {interacción: [ms de cada cambio]}. Se hacen por vueltas (una de cada una
+    por vuelta) para que un momento lento de la máquina no caiga todo en la misma.
+    """
+    tiempos = {}
+    at = nueva_sesion()
+    for vuelta in range(repeticiones):
+        for nombre, pestana, cambios in INTERACCIONES:
+            correr(at, pestana)     # Cambiar de pestaña (no se mide: deja sus widgets dibujados)
+            for lista, etiqueta in cambios:
+                cambiar(at, getattr(at, lista), etiqueta, vuelta)
+                tiempos.setdefault(nombre, []).append(correr(at, pestana))
+    return tiempos
+
+
+def medir_escala(ruta_db, repeticiones):
+    """Todas las mediciones de una base. Se llama en un proceso aparte (--medir)."""
+    os.environ["DASHBOARD_DB"] = ruta_db
+    os.chdir(RAIZ)
+
+    # Una corrida de calentamiento: la primera importa plotly/altair, y eso no depende de los datos
+    correr(nueva_sesion(), "ventas")
+    # En frío: cachés vacías, se abre la primera pestaña y después cada una de las otras
+    frio = {}
+    for _ in range(repeticiones):
+        limpiar_caches()
+        at = nueva_sesion()
+        for pestana in PESTANAS:
+            frio.setdefault(pestana, []).append(correr(at, pestana))
+    sesion_nueva = [correr(nueva_sesion(), "ventas") for _ in range(repeticiones)]
+    interacciones = medir_interacciones(repeticiones)
+
+    with sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True) as conexion:
+        filas = conexion.execute("SELECT COUNT(*) FROM ventas_unificadas").fetchone()[0]
+    return {
+        "filas_ventas": filas,
+        "arranque_frio": percentiles(frio.pop("ventas")),
+        "sesion_nueva": percentiles(sesion_nueva),
+        "abrir_en_frio": {pestana: percentiles(ms) for pestana, ms in frio.items()},
+        "interacciones": {nombre: percentiles(ms) for nombre, ms in interacciones.items()},
+        # En Linux ru_maxrss viene en KB
+        "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def medir_en_proceso(ruta_db, repeticiones):
+    comando = [sys.executable, os.path.abspath(__file__), "--medir", ruta_db, "--repeticiones", str(repeticiones)]
+    proceso = subprocess.run(comando, capture_output=True, text=True, cwd=RAIZ)
+    for linea in proceso.stdout.splitlines():
+        if linea.startswith(MARCA_RESULTADO):
+            return json.loads(linea[len(MARCA_RESULTADO):])
+    raise RuntimeError(f"La medición de {ruta_db} falló:\n{proceso.stderr[-3000:]}")
+
+
+# ==========================================================
+# COMPARACIÓN CON LA LÍNEA BASE
+# ==========================================================
+def metricas_planas(resultado):
+    """{(escala, métrica): valor} con los p50 (ms) y la RSS (MB), para comparar."""
+    planas = {}
+    for escala, datos in resultado["escalas"].items():
+        planas[(escala, "arranque_frio_ms")] = datos["arranque_frio"]["p50_ms"]
+        planas[(escala, "sesion_nueva_ms")] = datos["sesion_nueva"]["p50_ms"]
+        for pestana, tiempos in datos["abrir_en_frio"].items():
+            planas[(escala, f"abrir_{pestana}_en_frio_ms")] = tiempos["p50_ms"]
+        for nombre, tiempos in datos["interacciones"].items():
+            planas[(escala, f"{nombre}_ms")] = tiempos["p50_ms"]
+        planas[(escala, "rss_max_mb")] = datos["rss_max_mb"]
+    return planas
+
+
+def comparar(base, actual, tolerancia):
+    """Imprime la comparación y devuelve la lista de regresiones."""
+    if base.get("maquina") != actual.get("maquina"):
+        print(f"⚠️ La línea base es de otra máquina ({base.get('maquina')}): los tiempos pueden no ser comparables.")
+    anteriores = metricas_planas(base)
+    regresiones = []
+    print(f"\n{'ESCALA':<7} {'MÉTRICA':<28} {'BASE':>10} {'AHORA':>10} {'CAMBIO':>8}")
+    for (escala, metrica), ahora in metricas_planas(actual).items():
+        antes = anteriores.get((escala, metrica))
+        if antes is None:
+            print(f"{escala:<7} {metrica:<28} {'-':>10} {ahora:>10.1f}   (nueva)")
+            continue
+        cambio = (ahora - antes) / antes if antes else 0.0
+        minimo = MINIMO_MB if metrica.endswith("_mb") else MINIMO_MS
+        empeoro = cambio > tolerancia and ahora - antes > minimo
+        print(f"{escala:<7} {metrica:<28} {antes:>10.1f} {ahora:>10.1f} {cambio:>+8.0%}{'  ❌' if empeoro else ''}")
+        if empeoro:
+            regresiones.append((escala, metrica, antes, ahora))
+    return regresiones
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mide el dashboard contra bases sintéticas de distintos tamaños.")
+    parser.add_argument("--escalas", type=float, nargs="+", default=[1, 10], help="Múltiplos del volumen actual")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--linea-base", default=LINEA_BASE)
+    parser.add_argument("--salida", default=SALIDA, help="Dónde dejar el resultado de esta corrida")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--actualizar-linea-base", action="store_true", help="Guardar esta corrida como la nueva línea base")
+    parser.add_argument("--regenerar", action="store_true", help="Volver a generar las bases sintéticas")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)     # Uso interno: mide una base en este proceso
+    args = parser.parse_args(argumentos)
+
+    if args.medir:
+        print(MARCA_RESULTADO + json.dumps(medir_escala(args.medir, args.repeticiones)))
+        return 0
+
+    resultado = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "maquina": f"{platform.node()} | {platform.machine()} | Python {platform.python_version()}",
+        "repeticiones": args.repeticiones,
+        "escalas": {},
+    }
+    for escala in args.escalas:
+        ruta_db = preparar_base(escala, args.regenerar)
+        print(f"⏱️ Midiendo x{escala:g}...")
+        datos = medir_en_proceso(ruta_db, args.repeticiones)
+        datos["generador"] = opciones_base(escala)
+        resultado["escalas"][f"x{escala:g}"] = datos
+        print(
+            f"   {datos['filas_ventas']:,} filas de ventas | frío p50 {datos['arranque_frio']['p50_ms']:.0f} ms | "
+            f"sesión nueva p50 {datos['sesion_nueva']['p50_ms']:.0f} ms | RSS {datos['rss_max_mb']:.0f} MB".replace(",", ".")
+        )
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(f"💾 Resultado en {args.salida}")
+
+    if args.actualizar_linea_base or not os.path.exists(args.linea_base):
+        with open(args.linea_base, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+        print(f"📌 Línea base guardada en {args.linea_base}")
+        return 0
+
+    with open(args.linea_base, encoding="utf-8") as f:
+        base = json.load(f)
+    regresiones = comparar(base, resultado, args.tolerancia)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones (más de {args.tolerancia:.0%} peor que la línea base):")
+        for escala, metrica, antes, ahora in regresiones:
+            print(f"   {escala} {metrica}: {antes:.1f} -> {ahora:.1f}")
+        return 1
+    print("\n✅ Sin regresiones contra la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
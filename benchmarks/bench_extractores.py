@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pipeline_etl
+from generador_datos import FILAS_POR_DIA
+from sheets_falso import drive_sintetico
+from pipeline_etl import (
+    ID_HOJA,
+    SECCIONES_CUADRE,
+    SECCIONES_ESPECIAL,
+    extraer_adicionales,
+    extraer_gastos,
+    extraer_ruta,
+    extraer_ventas,
+    indexar_secciones,
+    limpiar_fecha_sql,
+    pagos_pendientes,
+    recargas_10lts,
+)
+
+# ==========================================================
+# BENCHMARK: EXTRACTORES Y ETL COMPLETO CONTRA SHEETS FALSO
+# ==========================================================
+# Sin credenciales: sheets_falso.py sirve los cuadres, "ADICIONAL+ RUTA" y
+# "GASTO" armados con generador_datos.py.
+#   1. Cada extractor por separado sobre todas las grillas (sin red): pestañas/s y filas/s.
+#   2. pipeline_etl.main completo (Drive, descarga con cuota, extracción,
+#      validación, SQLite y snapshots) con la latencia y cuota pedidas.
+#
+#   python benchmarks/bench_extractores.py --anios 1 --latencia-ms 20 --cuota 600
+#   python benchmarks/bench_extractores.py --filas-por-dia 130 --solo-extractores
+
+
+#---------------- FUNCION GRILLAS DEL DRIVE FALSO -----------#
+def grillas(cliente):
+    """Separa las pestañas servidas en cuadres [(datos, fecha)], adicional+ruta [datos] y gastos [datos]."""
+    cuadres, adicional_ruta, gastos = [], [], []
+    for archivo_id, libro in cliente.libros.items():
+        for hoja in libro.hojas:
+            if archivo_id != ID_HOJA:
+                cuadres.append((hoja, hoja.datos, limpiar_fecha_sql(hoja.title.split()[-1])))
+            elif "GASTO" in hoja.title:
+                gastos.append(hoja.datos)
+            else:
+                adicional_ruta.append(hoja.datos)
+    return cuadres, adicional_ruta, gastos
+
+
+#---------------- FUNCION EXTRACTORES (como procesar_cuadre / procesar_especial) #
+def correr_ventas(cuadres):
+    return sum(len(extraer_ventas(datos, fecha)) for _, datos, fecha in cuadres)
+
+
+def correr_indexar(cuadres):
+    for _, datos, _ in cuadres:
+        indexar_secciones(datos, SECCIONES_CUADRE)
+    return 0
+
+
+def correr_seccion(cuadres, seccion, extractor):
+    indices = [indexar_secciones(datos, SECCIONES_CUADRE) for _, datos, _ in cuadres]   # Fuera de la medición (tiene su fila)
+    def correr():
+        destino = []
+        for (hoja, datos, fecha), indice in zip(cuadres, indices):
+            for encontrada in indice[seccion]:
+                extractor(hoja, datos, encontrada.fila_ancla, destino, fecha, encontrada.fin_datos)
+        return len(destino)
+    return correr
+
+
+def correr_especial(grillas_especiales, extractor):
+    indices = [indexar_secciones(datos, SECCIONES_ESPECIAL) for datos in grillas_especiales]
+    return lambda: sum(len(extractor(datos, indice)) for datos, indice in zip(grillas_especiales, indices))
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo de 'repeticiones' corridas (las demás son ruido de la máquina)."""
+    mejor, filas = None, 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = funcion()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return filas, mejor
+
+
+def medir_extractores(cliente, repeticiones):
+    cuadres, adicional_ruta, gastos = grillas(cliente)
+    casos = [
+        ("extraer_ventas", len(cuadres), lambda: correr_ventas(cuadres)),
+        ("indexar_secciones", len(cuadres), lambda: correr_indexar(cuadres)),
+        ("recargas_10lts", len(cuadres), correr_seccion(cuadres, "RECARGAS", recargas_10lts)),
+        ("pagos_pendientes", len(cuadres), correr_seccion(cuadres, "PENDIENTES", pagos_pendientes)),
+        ("extraer_adicionales", len(adicional_ruta), correr_especial(adicional_ruta, extraer_adicionales)),
+        ("extraer_ruta", len(adicional_ruta), correr_especial(adicional_ruta, extraer_ruta)),
+        ("extraer_gastos", len(gastos), lambda: sum(len(extraer_gastos(datos)) for datos in gastos)),
+    ]
+    resultados = {}
+    for nombre, pestanas, funcion in casos:
+        filas, segundos = medir(funcion, repeticiones)
+        resultados[nombre] = {
+            "pestanas": pestanas,
+            "filas": filas,
+            "segundos": round(segundos, 6),
+            "pestanas_por_segundo": round(pestanas / segundos, 1) if segundos else 0.0,
+            "filas_por_segundo": round(filas / segundos, 1) if segundos else 0.0,
+        }
+    return resultados
+
+
+#---------------- FUNCION ETL COMPLETO ----------------------#
+def medir_pipeline(cliente, drive, trabajadores, cuota):
+    """Corre pipeline_etl.main en una carpeta temporal y devuelve su reporte (la consola queda en silencio)."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        argumentos = [
+            "--db", os.path.join(carpeta, "bench.db"),
+            "--carpeta-cache", os.path.join(carpeta, "cache"),
+            "--carpeta-reportes", os.path.join(carpeta, "reportes"),
+            "--trabajadores", str(trabajadores),
+            "--lecturas-por-minuto", str(cuota),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline_etl.main(argumentos, conectar_google=lambda: (cliente, drive))
+        with open(glob.glob(os.path.join(carpeta, "reportes", "*.json"))[0], encoding="utf-8") as f:
+            return json.load(f)
+
+
+def mostrar(extractores, reporte, api):
+    print(f"\n{'extractor':<22}{'pestañas':>10}{'filas':>10}{'ms':>10}{'pestañas/s':>13}{'filas/s':>12}")
+    for nombre, r in extractores.items():
+        print(f"{nombre:<22}{r['pestanas']:>10}{r['filas']:>10}{r['segundos'] * 1000:>10.1f}"
+              f"{r['pestanas_por_segundo']:>13.0f}{r['filas_por_segundo']:>12.0f}")
+    if reporte is None:
+        return
+    print(f"\n🚚 ETL completo: {reporte['segundos']:.2f}s | {reporte['pestanas']['leidas']} pestañas "
+          f"({reporte['rendimiento']['pestanas_por_segundo']:.1f}/s) | {reporte['filas']['total']} filas "
+          f"({reporte['rendimiento']['filas_por_segundo']:.0f}/s)")
+    print(f"📡 Llamadas a la API falsa: {api.llamadas} | 429 devueltos: {api.rechazadas} | "
+          f"reintentos: {reporte['api']['reintentos']} | esperando cuota: {reporte['api']['segundos_esperando']:.1f}s")
+    for nombre, etapa in list(reporte["etapas"].items())[:8]:
+        print(f"   {nombre:<22} {etapa['segundos']:8.3f}s  (x{etapa['veces']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pestañas/s y filas/s de cada extractor y del ETL completo (Sheets falso).")
+    parser.add_argument("--anios", type=int, default=1, help="Años de datos generados.")
+    parser.add_argument("--filas-por-dia", type=int, default=FILAS_POR_DIA, help="Ventas por día (escala del cuadre).")
+    parser.add_argument("--latencia-ms", type=float, default=20.0, help="Latencia de cada llamada a la API falsa.")
+    parser.add_argument("--cuota", type=int, default=600, help="Lecturas por minuto que acepta la API falsa (y usa el ETL).")
+    parser.add_argument("--trabajadores", type=int, default=pipeline_etl.TRABAJADORES, help="Descargas en paralelo del ETL.")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Corridas de cada extractor (se queda con la mejor).")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--solo-extractores", action="store_true", help="No corre el ETL completo.")
+    parser.add_argument("--salida", help="Guarda los resultados en este JSON.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    cliente, drive = drive_sintetico(
+        latencia=args.latencia_ms / 1000, lecturas_por_minuto=args.cuota,
+        anios=args.anios, filas_por_dia=args.filas_por_dia, semilla=args.semilla,
+    )
+    print(f"🧪 Drive falso armado en {time.perf_counter() - inicio:.1f}s "
+          f"({sum(len(l.hojas) for l in cliente.libros.values())} pestañas en {len(cliente.libros)} libros)")
+
+    extractores = medir_extractores(cliente, args.repeticiones)
+    reporte = None if args.solo_extractores else medir_pipeline(cliente, drive, args.trabajadores, args.cuota)
+    mostrar(extractores, reporte, cliente.api)
+
+    if args.salida:
+        resultado = {"opciones": vars(args), "extractores": extractores}
+        if reporte is not None:
+            resultado["pipeline"] = {clave: reporte[clave] for clave in ["segundos", "rendimiento", "filas", "etapas", "api"]}
+            resultado["pipeline"]["pestanas"] = {k: v for k, v in reporte["pestanas"].items() if k != "detalle"}
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+        print(f"💾 Resultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
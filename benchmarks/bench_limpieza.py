@@ -0,0 +1,99 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline_etl import COLUMNAS_FECHA, COLUMNAS_MONEDA, FILTROS_TABLA, construir_tabla, limpiar_fecha_sql, limpiar_moneda
+
+# ==========================================================
+# BENCHMARK: LIMPIEZA CELDA A CELDA vs EN BLOQUE
+# ==========================================================
+# Genera filas "crudas" (tal como salen de los extractores) y mide cuánto
+# tarda limpiarlas como antes (limpiar_moneda / limpiar_fecha_sql por celda)
+# contra construir_tabla (columnas completas + fechas memorizadas).
+#
+#   python benchmarks/bench_limpieza.py --filas 1000000
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+MONTOS = ["$2.500", "$3.000", "2500", "$ 12.000", "", "0", "$1.500", "-$500", "abc", "$45.990"]
+
+
+def fecha_cruda(azar):
+    dia, mes, anio = azar.randint(1, 28), azar.randint(1, 12), azar.choice([2023, 2024])
+    return azar.choice([
+        f"{dia}/{mes}/{anio}",
+        f"{dia:02d}/{mes:02d}/{str(anio)[2:]}",
+        f"{anio}-{mes:02d}-{dia:02d} 00:00:00",
+        f"lunes, {dia} de {MESES[mes - 1]} de {anio}",
+    ])
+
+
+def generar_registros(filas, semilla=7):
+    """Filas con el mismo formato que entrega extraer_ruta (la tabla con fecha y montos)."""
+    azar = random.Random(semilla)
+    fechas = [fecha_cruda(azar) for _ in range(2000)]   # Pocas fechas distintas, como en la realidad
+    return [
+        {
+            "FECHA": azar.choice(fechas),
+            "DETALLE": "",
+            "DIRECCION": f"Calle {azar.randint(1, 500)}",
+            "COMUNA": azar.choice(["MAIPU", "PUDAHUEL", "CERRILLOS"]),
+            "CANTIDAD": str(azar.randint(0, 6)),
+            "VALOR": azar.choice(MONTOS),
+            "TOTAL": azar.choice(MONTOS),
+            "EXTRA": azar.choice(MONTOS),
+        }
+        for _ in range(filas)
+    ]
+
+
+#---------------- FUNCION LIMPIEZA COMO ANTES ---------------#
+def limpiar_celda_a_celda(tabla, registros):
+    limpiar_fecha = limpiar_fecha_sql.__wrapped__   # Sin la memoria, como era originalmente
+    limpios = []
+    for registro in registros:
+        fila = dict(registro)
+        for columna in COLUMNAS_FECHA.get(tabla, []):
+            fila[columna] = limpiar_fecha(fila[columna])
+        for columna in COLUMNAS_MONEDA.get(tabla, []):
+            fila[columna] = limpiar_moneda(fila[columna])
+        limpios.append(fila)
+    df = pd.DataFrame(limpios)
+    filtro = FILTROS_TABLA.get(tabla)
+    if filtro is not None:
+        df = df[filtro(df)].reset_index(drop=True)
+    return df.fillna(0)
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la limpieza celda a celda contra la limpieza en bloque.")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"🧪 Generando {args.filas:,} filas de prueba...")
+    registros = generar_registros(args.filas)
+
+    antes, t_antes = medir(limpiar_celda_a_celda, "ruta", registros)
+    limpiar_fecha_sql.cache_clear()
+    ahora, t_ahora = medir(construir_tabla, "ruta", registros)
+
+    pd.testing.assert_frame_equal(antes, ahora)
+    print(f"   Celda a celda: {t_antes:6.2f}s")
+    print(f"   En bloque:     {t_ahora:6.2f}s  ({t_antes / t_ahora:.1f}x más rápido)")
+    print("✅ Ambas versiones dan exactamente la misma tabla.")
+
+
+if __name__ == "__main__":
+    main()
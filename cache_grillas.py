@@ -0,0 +1,112 @@
+import gzip
+import json
+import os
+
+from checkpoints_etl import hash_grilla
+
+# ==========================================================
+# CACHÉ LOCAL DE GRILLAS (Modo offline)
+# ==========================================================
+# Cada pestaña descargada (la lista de listas de get_all_values) se guarda
+# comprimida y con su hash como nombre: si dos pestañas son idénticas, se
+# guardan una sola vez. Un índice JSON recuerda a qué archivo, pestaña y
+# modifiedTime pertenece cada grilla, en el orden original.
+#
+#   cache_grillas/
+#   ├── indice.json
+#   └── objetos/ab/abcdef....json.gz
+
+CARPETA_CACHE = "cache_grillas"
+
+
+class PestanaCache:
+    """Reemplazo mínimo de un Worksheet de gspread (solo título e id)."""
+    def __init__(self, title, id):
+        self.title = title
+        self.id = id
+
+
+class CacheGrillas:
+    def __init__(self, carpeta=CARPETA_CACHE):
+        self.carpeta = carpeta
+        self.ruta_indice = os.path.join(carpeta, "indice.json")
+        self.indice = {"archivos": {}}
+        if os.path.exists(self.ruta_indice):
+            with open(self.ruta_indice, encoding="utf-8") as f:
+                self.indice = json.load(f)
+
+    #---------------- ESCRITURA ---------------------------------#
+    def _ruta_objeto(self, huella):
+        return os.path.join(self.carpeta, "objetos", huella[:2], f"{huella}.json.gz")
+
+    def guardar_grilla(self, datos):
+        """Guarda la grilla (si no existía ya) y devuelve su hash."""
+        huella = hash_grilla(datos)
+        ruta = self._ruta_objeto(huella)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = ruta + ".tmp"
+            with gzip.open(temporal, "wt", encoding="utf-8") as f:
+                json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temporal, ruta)
+        return huella
+
+    def guardar_libro(self, archivo_info, hojas, grillas):
+        """
+        Registra un archivo descargado: todas sus pestañas (en orden) y,
+        para las que se bajaron, el hash de su grilla.
+        """
+        self.indice["archivos"][archivo_info["id"]] = {
+            "name": archivo_info.get("name", ""),
+            "modifiedTime": archivo_info.get("modifiedTime", ""),
+            "pestanas": [
+                {
+                    "titulo": hoja.title,
+                    "id": hoja.id,
+                    "hash": self.guardar_grilla(grillas[hoja.id]) if hoja.id in grillas else None,
+                }
+                for hoja in hojas
+            ],
+        }
+
+    def guardar_indice(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.indice, f, ensure_ascii=False, indent=1)
+        os.replace(temporal, self.ruta_indice)
+
+    #---------------- LECTURA -----------------------------------#
+    def archivo(self, archivo_id):
+        """Devuelve el archivo_info (id, name, modifiedTime) guardado, o None."""
+        entrada = self.indice["archivos"].get(archivo_id)
+        if entrada is None:
+            return None
+        return {"id": archivo_id, "name": entrada["name"], "modifiedTime": entrada["modifiedTime"]}
+
+    def archivos(self):
+        return [self.archivo(archivo_id) for archivo_id in self.indice["archivos"]]
+
+    def leer_grilla(self, huella):
+        with gzip.open(self._ruta_objeto(huella), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def descargar(self, archivos, elegir_hojas):
+        """
+        Igual que lector_sheets.descargar_libros, pero leyendo del disco:
+        entrega (archivo_info, hojas, grillas, error) en el mismo orden.
+        """
+        for archivo_info in archivos:
+            try:
+                entrada = self.indice["archivos"][archivo_info["id"]]
+                hojas = [PestanaCache(p["titulo"], p["id"]) for p in entrada["pestanas"]]
+                hashes = {p["id"]: p["hash"] for p in entrada["pestanas"]}
+                grillas = {}
+                for hoja in elegir_hojas(archivo_info, hojas):
+                    if hashes[hoja.id] is None:
+                        raise KeyError(f"La pestaña '{hoja.title}' no está en la caché")
+                    grillas[hoja.id] = self.leer_grilla(hashes[hoja.id])
+            except Exception as e:
+                yield archivo_info, None, None, e
+            else:
+                yield archivo_info, hojas, grillas, None
@@ -0,0 +1,160 @@
+from itertools import islice
+
+from esquema_db import crear_indices, crear_tabla, normalizar_fechas
+
+# ==========================================================
+# CARGA A SQLITE (Staging + upsert en una sola transacción)
+# ==========================================================
+# Cada fila tiene una llave natural: de qué archivo y pestaña salió y en qué
+# posición (ARCHIVO_ID + PESTANA + FILA). Con esa llave:
+#   - Carga completa: se llena una tabla "<tabla>__staging" y al final se
+#     cambia por la tabla real (DROP + RENAME).
+#   - Carga incremental: se llena una tabla temporal y se hace un upsert:
+#     solo se escriben las filas nuevas o que cambiaron, y se borran las que
+#     desaparecieron de las pestañas tocadas.
+# Todo va dentro de UNA transacción: el dashboard ve la base de antes o la de
+# después, nunca una mitad.
+
+LLAVE = ["ARCHIVO_ID", "PESTANA", "FILA"]
+FILAS_POR_LOTE = 10000      # Filas por cada executemany
+
+
+#---------------- FUNCIONES DE APOYO ------------------------#
+def columnas_de(conexion, tabla, esquema="main"):
+    return [fila[1] for fila in conexion.execute(f'PRAGMA {esquema}.table_info("{tabla}")')]
+
+
+def insertar_por_lotes(conexion, tabla, df):
+    """Inserta el DataFrame con executemany, de a FILAS_POR_LOTE filas."""
+    columnas = ", ".join(f'"{c}"' for c in df.columns)
+    marcas = ", ".join("?" for _ in df.columns)
+    sql = f"INSERT INTO {tabla} ({columnas}) VALUES ({marcas})"
+    # astype(object) deja tipos de Python (int/float/str) que sqlite3 sabe guardar
+    filas = df.astype(object).itertuples(index=False, name=None)
+    while True:
+        lote = list(islice(filas, FILAS_POR_LOTE))
+        if not lote:
+            break
+        conexion.executemany(sql, lote)
+
+
+#---------------- FUNCION CARGA COMPLETA --------------------#
+def reemplazar_tabla(conexion, tabla, df):
+    """Arma la tabla nueva al lado ("__staging", con el esquema tipado) y la cambia por la vieja."""
+    staging = f"{tabla}__staging"
+    conexion.execute(f'DROP TABLE IF EXISTS "{staging}"')
+    crear_tabla(conexion, tabla, nombre=staging)
+    insertar_por_lotes(conexion, f'"{staging}"', df)
+    normalizar_fechas(conexion, f'"{staging}"')
+
+    conexion.execute(f'DROP TABLE IF EXISTS "{tabla}"')
+    conexion.execute(f'ALTER TABLE "{staging}" RENAME TO "{tabla}"')
+    crear_indices(conexion, tabla)
+    return len(df), 0
+
+
+#---------------- FUNCION CARGA INCREMENTAL (UPSERT) --------#
+def upsert_tabla(conexion, tabla, df):
+    """
+    Deja en la tabla exactamente lo que trae el DataFrame para las pestañas
+    de 'etl_pestanas_tocadas' (tabla temporal que arma cargar_tablas) y anota
+    en 'etl_fechas_tocadas' las fechas afectadas.
+    Devuelve (filas escritas, filas borradas).
+    """
+    staging = f'temp."{tabla}__staging"'
+    conexion.execute(f"DROP TABLE IF EXISTS {staging}")
+    conexion.execute(f'CREATE TABLE {staging} AS SELECT * FROM main."{tabla}" WHERE 0')
+    if not df.empty:
+        insertar_por_lotes(conexion, staging, df)
+        normalizar_fechas(conexion, staging)
+
+    # 0. Fechas que van a cambiar (las de antes y las de ahora), para los resúmenes
+    conexion.execute(f"""
+        INSERT INTO temp.etl_fechas_tocadas (TABLA, FECHA)
+        SELECT ?, FECHA FROM main."{tabla}"
+        WHERE (ARCHIVO_ID, PESTANA) IN (SELECT ARCHIVO_ID, PESTANA FROM temp.etl_pestanas_tocadas)
+        UNION
+        SELECT ?, t.FECHA FROM {staging} AS s JOIN main."{tabla}" AS t USING (ARCHIVO_ID, PESTANA, FILA)
+        UNION
+        SELECT ?, FECHA FROM {staging}
+    """, (tabla, tabla, tabla))
+
+    # 1. Filas de las pestañas tocadas que ya no vienen: se borran
+    antes = conexion.total_changes
+    conexion.execute(f"""
+        DELETE FROM main."{tabla}"
+        WHERE (ARCHIVO_ID, PESTANA) IN (SELECT ARCHIVO_ID, PESTANA FROM temp.etl_pestanas_tocadas)
+          AND NOT EXISTS (
+              SELECT 1 FROM {staging} AS s
+              WHERE s.ARCHIVO_ID = "{tabla}".ARCHIVO_ID
+                AND s.PESTANA = "{tabla}".PESTANA
+                AND s.FILA = "{tabla}".FILA
+          )
+    """)
+    borradas = conexion.total_changes - antes
+
+    # 2. Upsert: se insertan las nuevas y se actualizan solo las que cambiaron
+    # El ID lo pone SQLite: no se copia ni se compara
+    columnas = [c for c in columnas_de(conexion, f"{tabla}__staging", esquema="temp") if c != "ID"]
+    lista = ", ".join(f'"{c}"' for c in columnas)
+    valores = [c for c in columnas if c not in LLAVE]
+    antes = conexion.total_changes
+    sql = f'INSERT INTO main."{tabla}" ({lista}) SELECT {lista} FROM {staging} WHERE true '
+    if valores:
+        asignaciones = ", ".join(f'"{c}" = excluded."{c}"' for c in valores)
+        hubo_cambio = " OR ".join(f'"{tabla}"."{c}" IS NOT excluded."{c}"' for c in valores)
+        sql += f"ON CONFLICT ({', '.join(LLAVE)}) DO UPDATE SET {asignaciones} WHERE {hubo_cambio}"
+    else:
+        sql += f"ON CONFLICT ({', '.join(LLAVE)}) DO NOTHING"
+    conexion.execute(sql)
+    escritas = conexion.total_changes - antes
+
+    conexion.execute(f"DROP TABLE {staging}")
+    return escritas, borradas
+
+
+#---------------- FUNCION GUARDAR CUARENTENA ----------------#
+def guardar_cuarentena(conexion, cuarentena, incremental):
+    """
+    Reemplaza las anotaciones de lo que se volvió a leer (validacion_etl.py):
+    todas en una carga completa, solo las de etl_pestanas_tocadas en una incremental.
+    """
+    if incremental:
+        conexion.execute("""
+            DELETE FROM etl_cuarentena
+            WHERE (ARCHIVO_ID, PESTANA) IN (SELECT ARCHIVO_ID, PESTANA FROM temp.etl_pestanas_tocadas)
+        """)
+    else:
+        conexion.execute("DELETE FROM etl_cuarentena")
+    if not cuarentena.empty:
+        insertar_por_lotes(conexion, "etl_cuarentena", cuarentena)
+
+
+#---------------- FUNCION CARGAR TODAS LAS TABLAS -----------#
+def cargar_tablas(conexion, finales, incremental, pestanas_reemplazar=()):
+    """
+    - finales: {tabla: DataFrame} con las columnas de LLAVE.
+      La base ya debe estar migrada (esquema_db.migrar).
+    - incremental: si es False se reemplazan las tablas completas.
+    - pestanas_reemplazar: [(archivo_id, pestana)] cuyas filas se vuelven a escribir.
+    No hace commit: quien llama abre y cierra la transacción.
+    Devuelve {tabla: (filas escritas, filas borradas)}.
+    """
+    resumen = {}
+    if not incremental:
+        for tabla, df in finales.items():
+            if not df.empty:
+                resumen[tabla] = reemplazar_tabla(conexion, tabla, df)
+        return resumen
+
+    conexion.execute("CREATE TEMP TABLE IF NOT EXISTS etl_pestanas_tocadas (ARCHIVO_ID TEXT, PESTANA TEXT)")
+    conexion.execute("DELETE FROM temp.etl_pestanas_tocadas")
+    conexion.execute("CREATE TEMP TABLE IF NOT EXISTS etl_fechas_tocadas (TABLA TEXT, FECHA TEXT)")
+    conexion.execute("DELETE FROM temp.etl_fechas_tocadas")
+    conexion.executemany(
+        "INSERT INTO temp.etl_pestanas_tocadas (ARCHIVO_ID, PESTANA) VALUES (?, ?)",
+        list(pestanas_reemplazar),
+    )
+    for tabla, df in finales.items():
+        resumen[tabla] = upsert_tabla(conexion, tabla, df)
+    return resumen
@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+# ==========================================================
+# CHECKPOINTS DEL ETL (Carga incremental)
+# ==========================================================
+# Guardamos en la misma base SQLite qué versión de cada archivo y de cada
+# pestaña ya procesamos. Así la siguiente corrida solo vuelve a bajar lo que
+# cambió en Google Drive.
+#   - etl_checkpoints_archivos: modifiedTime de Drive por archivo.
+#   - etl_checkpoints_pestanas: hash del contenido de cada pestaña.
+
+
+#---------------- FUNCION CREAR TABLAS ----------------------#
+def crear_tablas_checkpoint(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS etl_checkpoints_archivos (
+            ARCHIVO_ID TEXT PRIMARY KEY,
+            NOMBRE TEXT,
+            MODIFIED_TIME TEXT
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS etl_checkpoints_pestanas (
+            ARCHIVO_ID TEXT,
+            PESTANA TEXT,
+            HASH TEXT,
+            PRIMARY KEY (ARCHIVO_ID, PESTANA)
+        )
+    """)
+
+
+#---------------- FUNCION LEER CHECKPOINTS ------------------#
+def leer_checkpoints(conexion):
+    """
+    Devuelve dos diccionarios:
+    - archivos: {archivo_id: modifiedTime}
+    - pestanas: {(archivo_id, pestana): hash}
+    """
+    crear_tablas_checkpoint(conexion)
+    archivos = dict(conexion.execute(
+        "SELECT ARCHIVO_ID, MODIFIED_TIME FROM etl_checkpoints_archivos"
+    ).fetchall())
+    pestanas = {
+        (archivo_id, pestana): hash_guardado
+        for archivo_id, pestana, hash_guardado in conexion.execute(
+            "SELECT ARCHIVO_ID, PESTANA, HASH FROM etl_checkpoints_pestanas"
+        )
+    }
+    return archivos, pestanas
+
+
+#---------------- FUNCION HUELLA DE UNA PESTAÑA -------------#
+def hash_grilla(datos):
+    """
+    Huella digital (sha256) de la grilla que devuelve get_all_values().
+    Si la secretaria no tocó la pestaña, el hash sale idéntico.
+    """
+    texto = json.dumps(datos, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+#---------------- FUNCION GUARDAR CHECKPOINTS ---------------#
+def guardar_checkpoints(conexion, archivos, pestanas, pestanas_borradas=(), archivos_borrados=(), reemplazar=False):
+    """
+    Registra lo procesado en esta corrida.
+    - archivos: lista de dicts con id, name y modifiedTime.
+    - pestanas: {(archivo_id, pestana): hash}
+    - pestanas_borradas: pestañas que ya no existen en Drive.
+    - archivos_borrados: ids de archivos que ya no aparecen en Drive.
+    - reemplazar: en una carga completa se borra todo el historial anterior.
+    No hace commit: lo decide quien llama, para que vaya en la misma transacción que los datos.
+    """
+    crear_tablas_checkpoint(conexion)
+    if reemplazar:
+        conexion.execute("DELETE FROM etl_checkpoints_archivos")
+        conexion.execute("DELETE FROM etl_checkpoints_pestanas")
+
+    conexion.executemany(
+        "DELETE FROM etl_checkpoints_pestanas WHERE ARCHIVO_ID = ? AND PESTANA = ?",
+        list(pestanas_borradas),
+    )
+    conexion.executemany(
+        "DELETE FROM etl_checkpoints_archivos WHERE ARCHIVO_ID = ?",
+        [(archivo_id,) for archivo_id in archivos_borrados],
+    )
+    conexion.executemany(
+        "INSERT OR REPLACE INTO etl_checkpoints_archivos (ARCHIVO_ID, NOMBRE, MODIFIED_TIME) VALUES (?, ?, ?)",
+        [(a["id"], a.get("name", ""), a.get("modifiedTime", "")) for a in archivos],
+    )
+    conexion.executemany(
+        "INSERT OR REPLACE INTO etl_checkpoints_pestanas (ARCHIVO_ID, PESTANA, HASH) VALUES (?, ?, ?)",
+        [(archivo_id, pestana, h) for (archivo_id, pestana), h in pestanas.items()],
+    )
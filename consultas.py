@@ -0,0 +1,491 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from indice_cascada import IndiceCascada
+from indice_fechas import IndiceFechas
+from muestreo import elegir_grano, lttb
+from resumenes_db import BASES, RESUMENES, elegir_nivel, tabla_resumen
+from snapshots_db import a_pantalla, cargar_base, version_datos
+
+# ==========================================================
+# CONSULTAS DEL DASHBOARD (Filtros en SQL)
+# ==========================================================
+# En vez de cargar las seis tablas completas y filtrarlas con pandas en cada
+# clic, cada pestaña le pide a SQLite solo lo que va a mostrar: las opciones
+# de sus filtros, los KPIs, los datos de los gráficos y el detalle.
+# Todas las consultas usan parámetros (?) y los índices de esquema_db.py.
+#
+# Los KPIs y gráficos salen de las sumas ya hechas por el ETL (resumenes_db.py).
+# Las opciones de los filtros y el detalle salen de las filas limpias (BASES),
+# que se cargan una vez por versión de los datos desde los snapshots Arrow
+# (snapshots_db.py) y se filtran en memoria con las mismas condiciones.
+# Las pestañas con filtros en cascada usan además un índice armado una vez por
+# versión (indice_cascada.py): sus opciones y su detalle no recorren la tabla.
+# Las ventas, que se filtran por rango de fechas, usan uno ordenado por fecha
+# con sumas acumuladas (indice_fechas.py).
+# El detalle se entrega de a una página (pagina_detalle): solo esas filas se
+# convierten y viajan al navegador, sin importar cuánta historia haya.
+
+TODOS = "Todos"     # Opción de los selectbox que significa "sin filtro"
+
+# Los filtros en cascada de cada pestaña, de arriba hacia abajo, con el
+# método de Filtro que les corresponde ("igual", "mes" o "dia")
+CASCADAS = {
+    "ruta": [("COMUNA", "igual"), ("DIRECCION", "igual"), ("MES", "mes"), ("FECHA", "dia")],
+    "adicionales": [("CLIENTE", "igual"), ("PRODUCTO", "igual"), ("FECHA", "dia")],
+    "gastos": [("MES", "mes"), ("CATEGORIA", "igual"), ("DESCRIPCION", "igual")],
+}
+
+# Las columnas de la tabla de detalle de cada pestaña
+DETALLES = {
+    "ventas": [
+        "FECHA", "CLIENTE", "TIPO_PRODUCTO", "CANTIDAD", "PRECIO", "TOTAL-PAGAR",
+        "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE",
+    ],
+    "ruta": ["FECHA", "DETALLE", "DIRECCION", "COMUNA", "CANTIDAD", "VALOR", "TOTAL", "EXTRA"],
+    "adicionales": ["FECHA", "CLIENTE", "PRODUCTO", "CANTIDAD", "PRECIO", "MONTO"],
+    "gastos": ["FECHA", "CATEGORIA", "DESCRIPCION", "MONTO"],
+}
+FILAS_POR_PAGINA = 50
+
+# Gráficos diarios: máximo de puntos y cómo se agrupa cada grano en SQL
+# (la semana empieza el lunes y se nombra por ese día; el mes, por el día 1)
+PUNTOS_GRAFICO = 180
+TRAMOS_FECHA = {
+    "dia": "FECHA",
+    "semana": "date(FECHA, '-6 days', 'weekday 1')",
+    "mes": "substr(FECHA, 1, 7) || '-01'",
+}
+
+
+#---------------- FUNCIONES DE APOYO ------------------------#
+@contextmanager
+def conectar(ruta_db):
+    """Conexión de solo lectura (el dashboard nunca escribe) que se cierra sola."""
+    conexion = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    try:
+        yield conexion
+    finally:
+        conexion.close()
+
+
+def version_actual(ruta_db):
+    """
+    Sello de la última carga del ETL (etl_version_datos). Las bases sin esa
+    tabla usan la fecha de modificación del archivo.
+    """
+    with conectar(ruta_db) as conexion:
+        sello = version_datos(conexion)
+    return sello or f"mtime-{os.path.getmtime(ruta_db)}"
+
+
+CANDADO_FILAS = threading.Lock()
+
+
+@lru_cache(maxsize=2 * len(BASES))
+def filas_version(ruta_db, base, sello):
+    """
+    Filas limpias de una base: una sola copia por proceso y versión, compartida
+    por todas las sesiones. Es de solo lectura: los filtros devuelven recortes.
+    """
+    with conectar(ruta_db) as conexion:
+        return cargar_base(conexion, ruta_db, base, sello)
+
+
+def filas(ruta_db, base):
+    sello = version_actual(ruta_db)
+    # Cada sesión corre en su propio hilo: el candado evita que dos la carguen a la vez
+    with CANDADO_FILAS:
+        return filas_version(ruta_db, base, sello)
+
+
+@lru_cache(maxsize=2 * len(CASCADAS))
+def cascada_version(ruta_db, base, sello):
+    """El índice de cascada de una base, armado sobre sus filas de la misma versión."""
+    return IndiceCascada(filas_version(ruta_db, base, sello), CASCADAS[base])
+
+
+def cascada(ruta_db, base):
+    sello = version_actual(ruta_db)
+    with CANDADO_FILAS:
+        return cascada_version(ruta_db, base, sello)
+
+
+@lru_cache(maxsize=2)
+def fechas_version(ruta_db, sello):
+    """Las ventas ordenadas por fecha, con sumas acumuladas por cliente (misma versión que sus filas)."""
+    return IndiceFechas(filas_version(ruta_db, "ventas", sello), RESUMENES["ventas"]["sumas"], "CLIENTE")
+
+
+def fechas_ventas(ruta_db):
+    sello = version_actual(ruta_db)
+    with CANDADO_FILAS:
+        return fechas_version(ruta_db, sello)
+
+
+@lru_cache(maxsize=8 * len(DETALLES))
+def puestos_version(ruta_db, base, columna, descendente, sello):
+    """
+    El puesto de cada fila si la base se ordena por 'columna' (las vacías al
+    final y los empates en el orden de la tabla). Se calcula una vez por versión.
+    """
+    serie = filas_version(ruta_db, base, sello)[columna].reset_index(drop=True)
+    orden = serie.sort_values(ascending=not descendente, kind="stable", na_position="last").index.to_numpy()
+    puestos = np.empty(len(orden), dtype=np.int64)
+    puestos[orden] = np.arange(len(orden))
+    return puestos
+
+
+def elegidos(*valores):
+    """Lo elegido en una cascada, con "Todos" como None (sin filtro)."""
+    return [None if valor == TODOS else valor for valor in valores]
+
+
+class Filtro:
+    """
+    Arma el WHERE de una consulta a partir de lo que eligió el usuario, y la
+    misma condición como máscara para las filas en memoria.
+    """
+    def __init__(self):
+        self.condiciones = []
+        self.parametros = []
+        self.pruebas = []       # Funciones df -> Serie de bool (una por condición)
+        self.columnas = set()   # Columnas filtradas con igual() (para elegir el resumen)
+        self.por_dia = False    # True si filtra días sueltos (el resumen mensual ya no sirve)
+
+    def agregar(self, condicion, *valores):
+        self.condiciones.append(condicion)
+        self.parametros.extend(valores)
+        return self
+
+    def igual(self, columna, valor):
+        # "Todos" (o None) no filtra nada
+        if valor is not None and valor != TODOS:
+            self.columnas.add(columna)
+            self.agregar(f'"{columna}" = ?', valor)
+            self.pruebas.append(lambda df: df[columna] == valor)
+        return self
+
+    def mes(self, valor):
+        # Un rango sobre FECHA (y no strftime(FECHA) = ?) para que use el índice
+        if valor is not None and valor != TODOS:
+            self.agregar("FECHA BETWEEN ? AND ?", f"{valor}-01", f"{valor}-31")
+            self.pruebas.append(lambda df: df["MES"] == valor)
+        return self
+
+    def rango(self, inicio, fin):
+        self.por_dia = True
+        self.pruebas.append(lambda df: df["FECHA"].between(pd.Timestamp(inicio), pd.Timestamp(fin)))
+        return self.agregar("FECHA BETWEEN ? AND ?", inicio.isoformat(), fin.isoformat())
+
+    def dia(self, valor):
+        # Las filas sin fecha se eligen como "NaT"
+        if valor is not None and valor != TODOS:
+            self.por_dia = True
+            self.agregar("COALESCE(FECHA, 'NaT') = ?", valor)
+            if valor == "NaT":
+                self.pruebas.append(lambda df: df["FECHA"].isna())
+            else:
+                self.pruebas.append(lambda df: df["FECHA"] == pd.Timestamp(valor))
+        return self
+
+    def sql(self, *extras):
+        condiciones = self.condiciones + list(extras)
+        return ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+    def filtrar(self, df):
+        mascara = pd.Series(True, index=df.index)
+        for prueba in self.pruebas:
+            mascara &= prueba(df)
+        return df[mascara]
+
+
+def leer(conexion, sql, parametros=()):
+    return pd.read_sql_query(sql, conexion, params=list(parametros))
+
+
+def crudo(base):
+    return f"({BASES[base]})"
+
+
+def resumen(base, filtro, grupo=None):
+    """
+    La tabla de resumen más chica que sirve para filtrar con 'filtro' y agrupar
+    por 'grupo': la mensual salvo que haga falta el día, y el nivel con menos
+    columnas. Si ningún resumen sirve, las filas crudas.
+    """
+    columnas = filtro.columnas | ({grupo} - {None, "FECHA", "MES"})
+    grupos = elegir_nivel(base, columnas)
+    if grupos is None:
+        return crudo(base)
+    grano = "dia" if filtro.por_dia or grupo == "FECHA" else "mes"
+    return f'"{tabla_resumen(base, grano, grupos)}"'
+
+
+def a_fecha(serie):
+    return pd.to_datetime(serie, errors="coerce").dt.date
+
+
+def opciones(df, columna, filtro, vacio=None):
+    """
+    Valores distintos de una columna, en el orden en que aparecen en la tabla,
+    con "Todos" al principio. Las celdas vacías se omiten, o se muestran como
+    'vacio' si se indica (ej. "NaT"). Las fechas salen como "AAAA-MM-DD".
+    """
+    unicos = filtro.filtrar(df)[columna].drop_duplicates()
+    if vacio is None:
+        unicos = unicos.dropna()
+    if pd.api.types.is_datetime64_any_dtype(unicos):
+        unicos = unicos.dt.strftime("%Y-%m-%d")
+    valores = unicos.astype(object).where(unicos.notna(), vacio)
+    return [TODOS] + list(dict.fromkeys(valores))
+
+
+def total(conexion, desde, filtro, expresion):
+    sql = f"SELECT TOTAL({expresion}) FROM {desde} {filtro.sql()}"
+    return conexion.execute(sql, filtro.parametros).fetchone()[0]
+
+
+def mejor(conexion, desde, filtro, grupo, expresion):
+    """
+    El grupo con la suma más alta: (nombre, monto) o (None, 0) si no hay.
+    En un empate gana el primero en orden alfabético, igual que idxmax() de pandas.
+    """
+    sql = f"""
+        SELECT "{grupo}", TOTAL({expresion}) AS SUMA FROM {desde}
+        {filtro.sql(f'"{grupo}" IS NOT NULL')}
+        GROUP BY "{grupo}" ORDER BY SUMA DESC, "{grupo}" LIMIT 1
+    """
+    fila = conexion.execute(sql, filtro.parametros).fetchone()
+    return fila if fila else (None, 0)
+
+
+def suma_por(conexion, desde, filtro, grupo, columna, ultimos=None):
+    """Suma de 'columna' por 'grupo' (ordenado por grupo). 'ultimos' deja solo los N finales."""
+    sql = f"""
+        SELECT "{grupo}", TOTAL("{columna}") AS "{columna}" FROM {desde}
+        {filtro.sql(f'"{grupo}" IS NOT NULL')}
+        GROUP BY "{grupo}" ORDER BY "{grupo}" {"DESC LIMIT " + str(int(ultimos)) if ultimos else ""}
+    """
+    df = leer(conexion, sql, filtro.parametros)
+    if ultimos:
+        df = df.iloc[::-1].reset_index(drop=True)
+    return df
+
+
+def serie_por_fecha(conexion, base, filtro, columna, modo="tramos", puntos=PUNTOS_GRAFICO):
+    """
+    Suma de 'columna' por fecha (ordenada), con 'puntos' como máximo (muestreo.py):
+      - modo "tramos": por día, semana o mes según el largo del rango (barras).
+      - modo "lttb": por día, dejando los días que conservan la forma (líneas).
+    Devuelve (DataFrame FECHA/columna, grano: "dia", "semana", "mes" o "lttb").
+    """
+    desde = resumen(base, filtro, "FECHA")
+    primera, ultima = conexion.execute(
+        f"SELECT MIN(FECHA), MAX(FECHA) FROM {desde} {filtro.sql()}", filtro.parametros
+    ).fetchone()
+    grano = "dia" if modo == "lttb" else elegir_grano(primera, ultima, puntos)
+    df = leer(conexion, f"""
+        SELECT {TRAMOS_FECHA[grano]} AS FECHA, TOTAL("{columna}") AS "{columna}" FROM {desde}
+        {filtro.sql("FECHA IS NOT NULL")}
+        GROUP BY 1 ORDER BY 1
+    """, filtro.parametros)
+    if modo == "lttb" and len(df) > puntos:
+        dias = pd.to_datetime(df["FECHA"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        df = df.iloc[lttb(dias, df[columna], puntos)].reset_index(drop=True)
+        grano = "lttb"
+    return df, grano
+
+
+def detalle(df, columnas):
+    """Las filas ya elegidas (por un índice), listas para mostrar."""
+    return a_pantalla(df[columnas].reset_index(drop=True))
+
+
+def tramo_ordenado(claves, desde, hasta):
+    """
+    Qué elementos de 'claves' (sin repetidos) quedan entre los puestos 'desde'
+    y 'hasta' al ordenarlas, ya en orden. argpartition no ordena todo: solo la página.
+    """
+    if desde >= hasta:
+        return np.array([], dtype=np.int64)
+    pagina = np.argpartition(claves, [desde, hasta - 1])[desde:hasta]
+    return pagina[np.argsort(claves[pagina])]
+
+
+#---------------- FUNCION DETALLE PAGINADO ------------------#
+def pagina_detalle(ruta_db, base, seleccion, orden=None, descendente=False, pagina=1):
+    """
+    Una página del detalle de 'base' con lo elegido en sus filtros:
+    (inicio, fin, cliente) en ventas y los valores de la cascada en las demás.
+    'orden' es una columna de DETALLES (None = el orden de la tabla).
+    Devuelve (DataFrame de la página, total de filas).
+    """
+    sello = version_actual(ruta_db)
+    # Filas, índice y puestos de la misma versión
+    with CANDADO_FILAS:
+        df = filas_version(ruta_db, base, sello)
+        if base == "ventas":
+            inicio, fin, cliente = seleccion
+            posiciones = fechas_version(ruta_db, sello).posiciones(inicio, fin, None if cliente == TODOS else cliente)
+        else:
+            posiciones = cascada_version(ruta_db, base, sello).posiciones(elegidos(*seleccion))
+        if orden is None:
+            claves = -posiciones if descendente else posiciones
+        else:
+            claves = puestos_version(ruta_db, base, orden, descendente, sello)[posiciones]
+
+    desde = (max(pagina, 1) - 1) * FILAS_POR_PAGINA
+    hasta = min(desde + FILAS_POR_PAGINA, len(posiciones))
+    return detalle(df.iloc[posiciones[tramo_ordenado(claves, desde, hasta)]], DETALLES[base]), len(posiciones)
+
+
+# ==========================================================
+# CONSULTAS POR PESTAÑA
+# ==========================================================
+
+#---------------- PESTAÑA 1: RESUMEN DE VENTAS --------------#
+def clientes_ventas(ruta_db):
+    return opciones(filas(ruta_db, "ventas"), "CLIENTE", Filtro())
+
+
+def rango_fechas_ventas(ruta_db):
+    """Primera y última fecha con ventas (hoy si la base está vacía)."""
+    minima, maxima = fechas_ventas(ruta_db).extremos()
+    hoy = pd.to_datetime("today").date()
+    return minima or hoy, maxima or hoy
+
+
+def resumen_ventas(ruta_db, fecha_inicio, fecha_fin, cliente):
+    filtro = Filtro().rango(fecha_inicio, fecha_fin).igual("CLIENTE", cliente)
+    # El total y la cantidad de filas salen del índice por fecha: búsqueda binaria del rango
+    indice = fechas_ventas(ruta_db)
+    valor = None if cliente == TODOS else cliente
+    with conectar(ruta_db) as conexion:
+        mejor_cliente, _ = mejor(conexion, resumen("ventas", filtro, "CLIENTE"), filtro, "CLIENTE", '"TOTAL-PAGAR"')
+        mejor_mes, monto_mejor_mes = mejor(conexion, resumen("ventas", filtro, "MES"), filtro, "MES", '"TOTAL-PAGAR"')
+        por_mes = suma_por(conexion, resumen("ventas", filtro, "MES"), filtro, "MES", "CANTIDAD")
+        # Rangos largos: una barra por semana o por mes (ver serie_por_fecha)
+        por_dia, grano = serie_por_fecha(conexion, "ventas", filtro, "TOTAL-PAGAR")
+        return {
+            "total": indice.total("TOTAL-PAGAR", fecha_inicio, fecha_fin, valor),
+            "mejor_cliente": mejor_cliente,
+            "mejor_mes": mejor_mes,
+            "monto_mejor_mes": monto_mejor_mes,
+            "por_dia": por_dia,
+            "grano_por_dia": grano,
+            "cantidad_por_mes": por_mes.set_index("MES")["CANTIDAD"],
+            "filas": indice.cantidad(fecha_inicio, fecha_fin, valor),
+        }
+
+
+#---------------- PESTAÑA 2: RUTA ---------------------------#
+# Cascada comuna -> dirección -> mes -> día: cada lista depende de lo elegido antes
+def comunas_ruta(ruta_db):
+    return [TODOS] + cascada(ruta_db, "ruta").opciones([])
+
+
+def direcciones_ruta(ruta_db, comuna):
+    return [TODOS] + cascada(ruta_db, "ruta").opciones(elegidos(comuna))
+
+
+def meses_ruta(ruta_db, comuna, direccion):
+    return [TODOS] + cascada(ruta_db, "ruta").opciones(elegidos(comuna, direccion))
+
+
+def dias_ruta(ruta_db, comuna, direccion, mes):
+    # Las filas sin fecha aparecen como "NaT" (lo que elige Filtro.dia)
+    return [TODOS] + cascada(ruta_db, "ruta").opciones(elegidos(comuna, direccion, mes), vacio="NaT")
+
+
+def resumen_ruta(ruta_db, comuna, direccion, mes, dia):
+    filtro = Filtro().igual("COMUNA", comuna).igual("DIRECCION", direccion).mes(mes).dia(dia)
+    with conectar(ruta_db) as conexion:
+        mejor_direccion, _ = mejor(conexion, resumen("ruta", filtro, "DIRECCION"), filtro, "DIRECCION", "TOTAL")
+        # El mejor mes de ruta suma lo cobrado (TOTAL) y los extras
+        mejor_mes, monto_mejor_mes = mejor(conexion, resumen("ruta", filtro, "MES"), filtro, "MES", "TOTAL + EXTRA")
+        # Las 10 comunas que más venden, de menor a mayor (para el gráfico de barras)
+        comunas = leer(conexion, f"""
+            SELECT COMUNA, TOTAL(TOTAL) AS TOTAL FROM {resumen("ruta", filtro, "COMUNA")}
+            {filtro.sql("COMUNA IS NOT NULL")}
+            GROUP BY COMUNA ORDER BY TOTAL DESC, COMUNA DESC LIMIT 10
+        """, filtro.parametros).iloc[::-1]
+        # Gráfico de línea: los días que conservan la forma de la curva
+        por_dia, grano = serie_por_fecha(conexion, "ruta", filtro, "TOTAL", modo="lttb")
+        por_dia["FECHA"] = a_fecha(por_dia["FECHA"])
+        return {
+            "total": total(conexion, resumen("ruta", filtro), filtro, "TOTAL"),
+            "mejor_direccion": mejor_direccion,
+            "mejor_mes": mejor_mes,
+            "monto_mejor_mes": monto_mejor_mes,
+            "top_comunas": comunas.set_index("COMUNA")["TOTAL"],
+            "total_por_dia": por_dia.set_index("FECHA")["TOTAL"],
+            "grano_por_dia": grano,
+            "filas": len(cascada(ruta_db, "ruta").posiciones(elegidos(comuna, direccion, mes, dia))),
+        }
+
+
+#---------------- PESTAÑA 3: ADICIONALES --------------------#
+def clientes_adicionales(ruta_db):
+    return [TODOS] + cascada(ruta_db, "adicionales").opciones([])
+
+
+def productos_y_fechas_adicionales(ruta_db, cliente):
+    """Producto y fecha dependen solo del cliente (la fecha, con producto en "Todos")."""
+    indice = cascada(ruta_db, "adicionales")
+    productos = indice.opciones(elegidos(cliente))
+    fechas = indice.opciones(elegidos(cliente, TODOS), vacio="NaT")
+    return [TODOS] + productos, [TODOS] + fechas
+
+
+def resumen_adicionales(ruta_db, cliente, producto, fecha):
+    filtro = Filtro().igual("CLIENTE", cliente).igual("PRODUCTO", producto).dia(fecha)
+    with conectar(ruta_db) as conexion:
+        mejor_producto, _ = mejor(conexion, resumen("adicionales", filtro, "PRODUCTO"), filtro, "PRODUCTO", "MONTO")
+        mejor_mes, monto_mejor_mes = mejor(conexion, resumen("adicionales", filtro, "MES"), filtro, "MES", "MONTO")
+        return {
+            "total": total(conexion, resumen("adicionales", filtro), filtro, "MONTO"),
+            "mejor_producto": mejor_producto,
+            "mejor_mes": mejor_mes,
+            "monto_mejor_mes": monto_mejor_mes,
+            "ultimos_dias": suma_por(conexion, resumen("adicionales", filtro, "FECHA"), filtro, "FECHA", "MONTO", ultimos=7),
+            "monto_por_mes": suma_por(
+                conexion, resumen("adicionales", filtro, "MES"), filtro, "MES", "MONTO"
+            ).set_index("MES")["MONTO"],
+            "filas": len(cascada(ruta_db, "adicionales").posiciones(elegidos(cliente, producto, fecha))),
+        }
+
+
+#---------------- PESTAÑA 4: GASTOS -------------------------#
+def meses_gastos(ruta_db):
+    return [TODOS] + cascada(ruta_db, "gastos").opciones([])
+
+
+def categorias_gastos(ruta_db, mes):
+    return [TODOS] + cascada(ruta_db, "gastos").opciones(elegidos(mes))
+
+
+def descripciones_gastos(ruta_db, mes, categoria):
+    return [TODOS] + cascada(ruta_db, "gastos").opciones(elegidos(mes, categoria), vacio="None")
+
+
+def resumen_gastos(ruta_db, mes, categoria, descripcion):
+    filtro = Filtro().mes(mes).igual("CATEGORIA", categoria).igual("DESCRIPCION", descripcion)
+    with conectar(ruta_db) as conexion:
+        peor_categoria, _ = mejor(conexion, resumen("gastos", filtro, "CATEGORIA"), filtro, "CATEGORIA", "MONTO")
+        peor_mes, monto_peor_mes = mejor(conexion, resumen("gastos", filtro, "MES"), filtro, "MES", "MONTO")
+        return {
+            "total": total(conexion, resumen("gastos", filtro), filtro, "MONTO"),
+            "peor_categoria": peor_categoria,
+            "peor_mes": peor_mes,
+            "monto_peor_mes": monto_peor_mes,
+            "ultimos_dias": suma_por(conexion, resumen("gastos", filtro, "FECHA"), filtro, "FECHA", "MONTO", ultimos=15),
+            "por_categoria": suma_por(conexion, resumen("gastos", filtro, "CATEGORIA"), filtro, "CATEGORIA", "MONTO"),
+            "filas": len(cascada(ruta_db, "gastos").posiciones(elegidos(mes, categoria, descripcion))),
+        }
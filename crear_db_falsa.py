@@ -1,6 +1,10 @@
+import os
 import sqlite3
 import pandas as pd
 
+from esquema_db import migrar
+from resumenes_db import reconstruir_resumenes
+
 print("⏳ Iniciando clonación segura de la base de datos...")
 
 # 1. Nos conectamos a tu base de datos REAL
@@ -32,14 +36,22 @@ if 'DESCRIPCION' in df_gastos.columns: df_gastos['DESCRIPCION'] = 'Detalle ' + (
 
 # 3. CREAMOS LA BASE DE DATOS FALSA (Para GitHub)
 print("💾 Guardando la nueva base de datos de portafolio...")
+# Partimos de una base vacía con el esquema tipado (llaves e índices) y solo agregamos filas
+if os.path.exists("db_portafolio.db"):
+    os.remove("db_portafolio.db")
 conn_falsa = sqlite3.connect("db_portafolio.db")
-
-df_ventas.to_sql("ventas_diarias", conn_falsa, if_exists="replace", index=False)
-df_gastos.to_sql("gastos", conn_falsa, if_exists="replace", index=False)
-df_rutas.to_sql("ruta", conn_falsa, if_exists="replace", index=False)
-df_adicionales.to_sql("adicionales", conn_falsa, if_exists="replace", index=False)
-df_pendientes.to_sql("pendientes", conn_falsa, if_exists="replace", index=False)
-df_recargas.to_sql("recargas", conn_falsa, if_exists="replace", index=False)
+migrar(conn_falsa)
+
+df_ventas.to_sql("ventas_diarias", conn_falsa, if_exists="append", index=False)
+df_gastos.to_sql("gastos", conn_falsa, if_exists="append", index=False)
+df_rutas.to_sql("ruta", conn_falsa, if_exists="append", index=False)
+df_adicionales.to_sql("adicionales", conn_falsa, if_exists="append", index=False)
+df_pendientes.to_sql("pendientes", conn_falsa, if_exists="append", index=False)
+df_recargas.to_sql("recargas", conn_falsa, if_exists="append", index=False)
+
+# ventas_unificadas y las tablas de resumen del dashboard se calculan con las filas ya enmascaradas
+with conn_falsa:
+    reconstruir_resumenes(conn_falsa)
 
 # Cerramos las puertas
 conn_real.close()
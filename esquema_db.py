@@ -0,0 +1,259 @@
+import argparse
+import sqlite3
+
+from metricas_etl import crear_tabla_corridas
+from resumenes_db import crear_resumenes, crear_ventas_unificadas, reconstruir_resumenes
+from snapshots_db import crear_tabla_version, nueva_version_datos
+from validacion_etl import crear_tabla_cuarentena, limpiar_comuna, limpiar_direccion, sanear_tablas_sql
+
+# ==========================================================
+# ESQUEMA DE LA BASE SQLITE (Tipos, llaves e índices)
+# ==========================================================
+# Las tablas que creaba to_sql no tenían llave ni índices: cualquier filtro
+# por fecha o cliente obligaba a leer la tabla completa. Aquí está el esquema
+# "oficial" de las seis tablas y las migraciones que llevan una base vieja
+# hasta la versión actual (la versión se guarda en PRAGMA user_version).
+#
+#   python esquema_db.py db_portafolio.db planta_agua3.db
+
+# Columnas de origen (llave natural que usa la carga incremental)
+COLUMNAS_ORIGEN = [("ARCHIVO_ID", "TEXT"), ("PESTANA", "TEXT"), ("FILA", "INTEGER")]
+
+ESQUEMA = {
+    "ventas_diarias": [
+        ("FECHA", "TEXT"), ("CLIENTE", "TEXT"), ("CANTIDAD", "REAL"), ("PRECIO", "REAL"),
+        ("TOTAL-PAGAR", "REAL"), ("EFECTIVO", "REAL"), ("TRANSFERENCIA", "REAL"),
+        ("TARJETA", "REAL"), ("PENDIENTE", "REAL"),
+    ],
+    "recargas": [
+        ("FECHA", "TEXT"), ("CLIENTE", "TEXT"), ("PRODUCTOS", "TEXT"), ("CANTIDAD", "REAL"),
+        ("PRECIO", "REAL"), ("TOTAL-PAGAR", "REAL"), ("EFECTIVO", "REAL"),
+        ("TRANSFERENCIA", "REAL"), ("TARJETA", "REAL"), ("PENDIENTE", "REAL"),
+    ],
+    "pendientes": [
+        ("FECHA", "TEXT"), ("CLIENTE", "TEXT"), ("PRODUCTOS", "TEXT"), ("FECHA-DEUDA", "TEXT"),
+        ("DEUDA-MONTO", "REAL"), ("EFECTIVO", "REAL"), ("TRANSFERENCIA", "REAL"),
+        ("TARJETA", "REAL"), ("PENDIENTE", "REAL"),
+    ],
+    "adicionales": [
+        ("FECHA", "TEXT"), ("CLIENTE", "TEXT"), ("PRODUCTO", "TEXT"), ("CANTIDAD", "REAL"),
+        ("PRECIO", "REAL"), ("MONTO", "REAL"),
+    ],
+    "ruta": [
+        ("FECHA", "TEXT"), ("DETALLE", "TEXT"), ("DIRECCION", "TEXT"), ("COMUNA", "TEXT"),
+        ("CANTIDAD", "REAL"), ("VALOR", "REAL"), ("TOTAL", "REAL"), ("EXTRA", "REAL"),
+    ],
+    "gastos": [
+        ("FECHA", "TEXT"), ("CATEGORIA", "TEXT"), ("DESCRIPCION", "TEXT"), ("OBSERVACION", "TEXT"),
+        ("MONTO", "REAL"),
+    ],
+}
+
+# Índices pensados para los filtros del dashboard: rango de fechas, y
+# cliente/comuna/producto/categoría seguidos de la fecha.
+INDICES = {
+    "ventas_diarias": [("FECHA",), ("CLIENTE", "FECHA")],
+    "recargas": [("FECHA",), ("CLIENTE", "FECHA")],
+    "pendientes": [("FECHA",), ("CLIENTE", "FECHA")],
+    "adicionales": [("FECHA",), ("CLIENTE", "FECHA"), ("PRODUCTO", "FECHA")],
+    "ruta": [("FECHA",), ("COMUNA", "DIRECCION", "FECHA")],
+    "gastos": [("FECHA",), ("CATEGORIA", "FECHA")],
+}
+
+# Solo se acepta 'AAAA-MM-DD' (con o sin hora); lo demás queda NULL,
+# igual que pd.to_datetime(errors="coerce") en el dashboard.
+PATRON_FECHA_ISO = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+
+#---------------- FUNCIONES DE ESQUEMA ----------------------#
+def existe_tabla(conexion, tabla):
+    fila = conexion.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ).fetchone()
+    return fila is not None
+
+
+def crear_tabla(conexion, tabla, nombre=None, extras=()):
+    """
+    Crea la tabla con su esquema tipado. 'nombre' permite crearla con otro
+    nombre (staging) y 'extras' agrega columnas que no están en el esquema.
+    """
+    columnas = [("ID", "INTEGER PRIMARY KEY")] + ESQUEMA[tabla] + COLUMNAS_ORIGEN + list(extras)
+    definicion = ",\n    ".join(f'"{c}" {tipo}' for c, tipo in columnas)
+    conexion.execute(f'CREATE TABLE "{nombre or tabla}" (\n    {definicion}\n)')
+
+
+def crear_indices(conexion, tabla):
+    conexion.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{tabla}_origen" ON "{tabla}" (ARCHIVO_ID, PESTANA, FILA)'
+    )
+    for columnas in INDICES[tabla]:
+        nombre = f"ix_{tabla}_" + "_".join(c.lower() for c in columnas)
+        lista = ", ".join(f'"{c}"' for c in columnas)
+        conexion.execute(f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" ({lista})')
+
+
+def normalizar_fechas(conexion, tabla_sql):
+    """Deja FECHA como 'AAAA-MM-DD' (o NULL si no es una fecha válida)."""
+    conexion.execute(f"""
+        UPDATE {tabla_sql}
+        SET FECHA = CASE WHEN FECHA GLOB '{PATRON_FECHA_ISO}' THEN date(FECHA) END
+        WHERE FECHA IS NOT date(FECHA)
+    """)
+
+
+# ==========================================================
+# MIGRACIONES (una función por versión)
+# ==========================================================
+
+#---------------- VERSIÓN 1: ESQUEMA TIPADO -----------------#
+def migracion_1_esquema_tipado(conexion):
+    """Reconstruye las seis tablas con tipos, ID, llave de origen, fechas ISO e índices."""
+    for tabla in ESQUEMA:
+        if not existe_tabla(conexion, tabla):
+            crear_tabla(conexion, tabla)
+            crear_indices(conexion, tabla)
+            continue
+
+        viejas = {fila[1]: fila[2] for fila in conexion.execute(f'PRAGMA table_info("{tabla}")')}
+        conocidas = {c for c, _ in ESQUEMA[tabla] + COLUMNAS_ORIGEN}
+        # Si la tabla tenía columnas de más, no se pierden: se copian tal cual
+        extras = [(c, tipo or "TEXT") for c, tipo in viejas.items() if c not in conocidas and c != "ID"]
+
+        nueva = f"{tabla}__nueva"
+        conexion.execute(f'DROP TABLE IF EXISTS "{nueva}"')
+        crear_tabla(conexion, tabla, nombre=nueva, extras=extras)
+        lista = ", ".join(f'"{c}"' for c in viejas if c in conocidas or c in dict(extras))
+        conexion.execute(f'INSERT INTO "{nueva}" ({lista}) SELECT {lista} FROM "{tabla}" ORDER BY rowid')
+        normalizar_fechas(conexion, f'"{nueva}"')
+
+        conexion.execute(f'DROP TABLE "{tabla}"')
+        conexion.execute(f'ALTER TABLE "{nueva}" RENAME TO "{tabla}"')
+        crear_indices(conexion, tabla)
+
+
+#---------------- VERSIÓN 2: COMUNAS Y DIRECCIONES LIMPIAS --#
+def migracion_2_texto_ruta(conexion):
+    """
+    Guarda COMUNA en mayúsculas y DIRECCION sin espacios de más (antes lo hacía
+    el dashboard en cada carga). Así los filtros por comuna pueden usar el índice.
+    """
+    # Usamos las funciones de Python: upper() de SQLite no convierte la Ñ ni los acentos
+    conexion.create_function("LIMPIAR_COMUNA", 1, limpiar_comuna, deterministic=True)
+    conexion.create_function("LIMPIAR_DIRECCION", 1, limpiar_direccion, deterministic=True)
+    conexion.execute("""
+        UPDATE ruta
+        SET COMUNA = LIMPIAR_COMUNA(COMUNA), DIRECCION = LIMPIAR_DIRECCION(DIRECCION)
+        WHERE COMUNA IS NOT LIMPIAR_COMUNA(COMUNA) OR DIRECCION IS NOT LIMPIAR_DIRECCION(DIRECCION)
+    """)
+
+
+#---------------- VERSIÓN 3: TABLAS DE RESUMEN --------------#
+def migracion_3_resumenes(conexion):
+    """Crea las tablas de sumas diarias y mensuales (resumenes_db.py). Las llena migrar()."""
+    # crear_resumenes crea exactamente las tablas de esta versión (no ventas_unificadas,
+    # que es de la 5). Si RESUMENES cambia de forma, va en una migración nueva.
+    crear_resumenes(conexion)
+
+
+#---------------- VERSIÓN 4: VERSIÓN DE LOS DATOS -----------#
+def migracion_4_version_datos(conexion):
+    """Crea etl_version_datos: el sello que el dashboard usa para invalidar su caché."""
+    crear_tabla_version(conexion)
+
+
+#---------------- VERSIÓN 5: VENTAS UNIFICADAS --------------#
+def migracion_5_ventas_unificadas(conexion):
+    """Crea la tabla de hechos ventas_unificadas (ventas + recargas). La llena migrar()."""
+    crear_ventas_unificadas(conexion)
+
+
+#---------------- VERSIÓN 6: CUARENTENA --------------------#
+def migracion_6_cuarentena(conexion):
+    """
+    Crea etl_cuarentena y aplica a lo ya guardado las reglas que ahora usa el
+    ETL (validacion_etl.py). Como cambian filas, migrar() rehace los resúmenes.
+    """
+    crear_tabla_cuarentena(conexion)
+    sanear_tablas_sql(conexion)
+
+
+#---------------- VERSIÓN 7: REPORTE DE CORRIDAS ------------#
+def migracion_7_corridas(conexion):
+    """Crea etl_corridas: una fila por corrida del ETL con sus tiempos (metricas_etl.py)."""
+    crear_tabla_corridas(conexion)
+
+
+MIGRACIONES = [
+    migracion_1_esquema_tipado,
+    migracion_2_texto_ruta,
+    migracion_3_resumenes,
+    migracion_4_version_datos,
+    migracion_5_ventas_unificadas,
+    migracion_6_cuarentena,
+    migracion_7_corridas,
+]
+VERSION_ESQUEMA = len(MIGRACIONES)
+
+# Migraciones que crean los resúmenes o cambian las filas que suman. Ninguna
+# los recalcula por su cuenta: migrar() los reconstruye UNA vez, al final de
+# la última de estas que falte (una base vieja no paga dos reconstrucciones).
+CAMBIAN_RESUMENES = {migracion_3_resumenes, migracion_5_ventas_unificadas, migracion_6_cuarentena}
+
+
+#---------------- FUNCION MIGRAR ----------------------------#
+def version_actual(conexion):
+    return conexion.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conexion):
+    """
+    Aplica en orden las migraciones que falten. Cada una va en su propia
+    transacción junto con el cambio de versión: o se aplica entera o no se aplica.
+    Los resúmenes se reconstruyen en la transacción de la última migración de
+    CAMBIAN_RESUMENES: si esa falla, la próxima vez se vuelve a hacer con ella.
+    """
+    version = version_actual(conexion)
+    ultima_resumenes = max(
+        (numero for numero, migracion in enumerate(MIGRACIONES, start=1)
+         if numero > version and migracion in CAMBIAN_RESUMENES),
+        default=None,
+    )
+    for numero, migracion in enumerate(MIGRACIONES, start=1):
+        if numero <= version:
+            continue
+        print(f"🛠️ Migrando base de datos: versión {numero - 1} -> {numero} ({migracion.__name__})")
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            migracion(conexion)
+            if numero == ultima_resumenes:
+                print("🧮 Reconstruyendo ventas_unificadas y resúmenes (una sola vez)")
+                reconstruir_resumenes(conexion)
+            conexion.execute(f"PRAGMA user_version = {numero}")
+            if existe_tabla(conexion, "etl_version_datos"):
+                # Una migración puede cambiar datos: el dashboard no debe seguir con su caché vieja
+                nueva_version_datos(conexion)
+    return version_actual(conexion)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Lleva una o más bases SQLite a la última versión del esquema.")
+    parser.add_argument("bases", nargs="+", help="Archivos .db a migrar (ej. db_portafolio.db)")
+    args = parser.parse_args(argumentos)
+
+    for ruta in args.bases:
+        conexion = sqlite3.connect(ruta)
+        try:
+            antes = version_actual(conexion)
+            despues = migrar(conexion)
+            if antes == despues:
+                print(f"✅ {ruta}: ya estaba en la versión {despues}")
+            else:
+                conexion.execute("VACUUM")
+                print(f"✅ {ruta}: versión {antes} -> {despues}")
+        finally:
+            conexion.close()
+
+
+if __name__ == "__main__":
+    main()
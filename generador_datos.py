@@ -0,0 +1,371 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from carga_sqlite import insertar_por_lotes
+from esquema_db import crear_indices, migrar
+from resumenes_db import reconstruir_resumenes
+from snapshots_db import escribir_snapshots, nueva_version_datos
+from validacion_etl import validar_tablas
+
+# ==========================================================
+# GENERADOR DE DATOS SINTÉTICOS (Pruebas de carga)
+# ==========================================================
+# crear_db_falsa.py solo sabe clonar y enmascarar la base real, así que no
+# sirve para probar el dashboard o la carga con 10x o 100x el volumen actual.
+# Este script inventa las seis tablas con la forma de los datos reales
+# (precios, mezcla de medios de pago, clientes que compran mucho y otros
+# poco, domingos flojos, direcciones que pertenecen a una comuna...) y con
+# el desorden típico de las planillas: montos negativos, cantidades en blanco,
+# comunas en minúsculas y direcciones con espacios de más.
+#
+# Se genera mes a mes (como los archivos de Drive) con numpy, sin bucles por
+# fila, y cada mes pasa por la misma validación del ETL antes de guardarse
+# (lo rechazado/corregido queda en etl_cuarentena).
+#
+#   python generador_datos.py --db carga_x10.db --filas-por-dia 130
+#   python generador_datos.py --db carga_x100.db --anios 5 --clientes 7000 --filas-por-dia 1300
+
+FILAS_POR_DIA = 13          # Ventas diarias por día en la base actual (el resto va en proporción)
+# Filas de cada tabla por cada venta diaria (medido en db_portafolio.db)
+PROPORCIONES = {
+    "ventas_diarias": 1.0,
+    "recargas": 0.09,
+    "pendientes": 0.12,
+    "adicionales": 0.2,
+    "ruta": 0.56,
+    "gastos": 0.16,
+}
+# Qué parte de los clientes aparece en cada tabla (los que más compran)
+CLIENTES_POR_TABLA = {"ventas_diarias": 1.0, "recargas": 0.16, "pendientes": 0.15, "adicionales": 0.42}
+PESO_DIA_SEMANA = [1.0, 1.0, 1.0, 0.95, 0.9, 1.1, 0.4]     # Lunes a domingo
+DIRECCIONES_POR_COMUNA = 18
+PRODUCTOS_ADICIONALES = 550
+DESCRIPCIONES_GASTO = 900
+
+# (valores, probabilidades) sacados de la base actual
+PRECIOS_VENTA = ([600, 500, 550, 650, 0, 700, 1500, 1000], [0.40, 0.29, 0.10, 0.07, 0.07, 0.055, 0.01, 0.005])
+PRECIOS_RECARGA = ([300, 700, 0], [0.87, 0.07, 0.06])
+MEDIOS_PAGO = (["EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"], [0.36, 0.08, 0.22, 0.34])
+DETALLES_RUTA = (
+    [("RECARGAS", 2500), ("MAYORISTA", 1000), ("PROMO E", 2000), ("MAYORISTA", 900), ("RECARGAS", 3000),
+     ("ALMACEN", 1000), ("DESECHABLES 10 LTRS", 1400), ("PROMO E", 1500)],
+    [0.33, 0.33, 0.20, 0.03, 0.03, 0.03, 0.02, 0.03],
+)
+# Las mismas categorías que busca extraer_gastos
+CATEGORIAS_GASTO = (
+    ["COSTOS FIJOS", "COSTOS VARIABLES", "GASTOS ADMINISTRATIVOS", "TRANSPORTE Y ESTACIONAMIENTO",
+     "INSUMOS PARA LOCAL", "MATERIALES CONSTRUCCION", "PROFESIONALES", "INVERSIONES", "OTROS GASTOS EXTRAS"],
+    [0.50, 0.19, 0.01, 0.12, 0.07, 0.04, 0.01, 0.01, 0.05],
+)
+OBSERVACIONES = (["", "1", "30 Dias", "-", "3", "2", "29,52", "X3"], [0.30, 0.29, 0.16, 0.09, 0.06, 0.04, 0.03, 0.03])
+
+
+#---------------- FUNCIONES DE APOYO ------------------------#
+def elegir(azar, opciones, n):
+    valores, probabilidades = opciones
+    probabilidades = np.asarray(probabilidades, dtype=np.float64)
+    return np.asarray(valores, dtype=object)[azar.choice(len(valores), size=n, p=probabilidades / probabilidades.sum())]
+
+
+def pesos_zipf(cantidad, exponente=1.1):
+    """Popularidad de clientes/productos: unos pocos concentran la mayoría de las filas."""
+    pesos = 1.0 / np.arange(1, cantidad + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def nombres(prefijo, cantidad):
+    return np.array([f"{prefijo} {n}" for n in range(1, cantidad + 1)], dtype=object)
+
+
+def cantidades(azar, n, media_log, desvio_log):
+    return np.maximum(1, np.round(np.exp(azar.normal(media_log, desvio_log, n))))
+
+
+def con_desorden(azar, n, desorden):
+    return azar.random(n) < desorden
+
+
+#---------------- FUNCION FILAS POR DÍA ---------------------#
+def fechas_de_filas(azar, dias, por_dia):
+    """
+    Cuántas filas tiene cada día (Poisson, con domingos flojos) y la fecha
+    de cada fila. Devuelve (fechas, filas por día).
+    """
+    esperadas = por_dia * np.asarray(PESO_DIA_SEMANA)[dias.dayofweek]
+    conteo = azar.poisson(esperadas)
+    return np.repeat(dias.strftime("%Y-%m-%d").to_numpy(dtype=object), conteo), conteo
+
+
+def filas_por_pestana(conteo):
+    """FILA dentro de la pestaña del día: 0, 1, 2... reiniciando cada día."""
+    inicios = np.cumsum(conteo) - conteo
+    return np.arange(conteo.sum()) - np.repeat(inicios, conteo)
+
+
+def repartir_pago(azar, total, n):
+    """Todo el monto va a un solo medio de pago, como en las planillas."""
+    medio = elegir(azar, MEDIOS_PAGO, n)
+    return {columna: np.where(medio == columna, total, 0.0) for columna in MEDIOS_PAGO[0]}
+
+
+# ==========================================================
+# TABLAS DE UN MES
+# ==========================================================
+def mes_ventas(azar, tabla, dias, por_dia, clientes, desorden):
+    """ventas_diarias o recargas: una pestaña de cuadre por día."""
+    fechas, conteo = fechas_de_filas(azar, dias, por_dia)
+    n = len(fechas)
+    total_clientes = max(1, int(len(clientes) * CLIENTES_POR_TABLA[tabla]))
+    cliente = clientes[azar.choice(total_clientes, size=n, p=pesos_zipf(total_clientes))]
+    if tabla == "ventas_diarias":
+        cantidad = cantidades(azar, n, 3.5, 0.8)
+        precio = elegir(azar, PRECIOS_VENTA, n).astype(np.float64)
+        datos = {"FECHA": fechas, "CLIENTE": cliente}
+    else:
+        cantidad = cantidades(azar, n, 1.5, 0.6)
+        precio = elegir(azar, PRECIOS_RECARGA, n).astype(np.float64)
+        producto = np.where(azar.random(n) < 0.98, "Producto 1", "Producto 2").astype(object)
+        datos = {"FECHA": fechas, "CLIENTE": cliente, "PRODUCTOS": producto}
+    total = cantidad * precio
+
+    # Desorden: montos anotados en negativo y cantidades en blanco (0 después de construir_tabla).
+    # Sin cantidad ni total la fila ni siquiera llega al ETL (FILTROS_TABLA), así que solo se borra con total
+    negativo = con_desorden(azar, n, desorden)
+    total = np.where(negativo, -total, total)
+    cantidad = np.where(con_desorden(azar, n, desorden) & (total != 0), 0.0, cantidad)
+
+    datos.update({"CANTIDAD": cantidad, "PRECIO": precio, "TOTAL-PAGAR": total})
+    datos.update(repartir_pago(azar, total, n))
+    return pd.DataFrame(datos), conteo
+
+
+def mes_pendientes(azar, dias, por_dia, clientes):
+    fechas, conteo = fechas_de_filas(azar, dias, por_dia)
+    n = len(fechas)
+    total_clientes = max(1, int(len(clientes) * CLIENTES_POR_TABLA["pendientes"]))
+    cliente = clientes[azar.choice(total_clientes, size=n, p=pesos_zipf(total_clientes))]
+    botellones = cantidades(azar, n, 3.4, 0.8).astype(np.int64)
+    # La fecha de la deuda se anota a mano, con el formato que salga
+    deuda = pd.to_datetime(fechas) - pd.to_timedelta(azar.integers(1, 45, n), unit="D")
+    fecha_deuda = np.where(azar.random(n) < 0.7, deuda.strftime("%d/%m/%y"), deuda.strftime("%d-%m-%Y"))
+    monto = botellones * elegir(azar, ([500, 600], [0.5, 0.5]), n).astype(np.float64)
+    datos = {
+        "FECHA": fechas,
+        "CLIENTE": cliente,
+        "PRODUCTOS": pd.Series(botellones).astype(str).add("/R").to_numpy(dtype=object),
+        "FECHA-DEUDA": fecha_deuda.astype(object),
+        "DEUDA-MONTO": monto,
+    }
+    datos.update(repartir_pago(azar, monto, n))
+    datos["PENDIENTE"] = np.zeros(n)
+    return pd.DataFrame(datos), conteo
+
+
+def mes_adicionales(azar, dias, por_dia, clientes, desorden):
+    fechas, _ = fechas_de_filas(azar, dias, por_dia)
+    n = len(fechas)
+    total_clientes = max(1, int(len(clientes) * CLIENTES_POR_TABLA["adicionales"]))
+    cliente = clientes[azar.choice(total_clientes, size=n, p=pesos_zipf(total_clientes))]
+    producto = azar.choice(PRODUCTOS_ADICIONALES, size=n, p=pesos_zipf(PRODUCTOS_ADICIONALES)) + 1
+    cantidad = cantidades(azar, n, 1.2, 0.9)
+    precio = np.round(np.exp(azar.normal(7.7, 0.9, n)))
+    precio = np.where(azar.random(n) < 0.05, 0.0, precio)     # Regalos / sin precio
+    cantidad = np.where(con_desorden(azar, n, desorden), 0.0, cantidad)
+    return pd.DataFrame({
+        "FECHA": fechas,
+        "CLIENTE": cliente,
+        "PRODUCTO": pd.Series(producto).map("Producto {}".format).to_numpy(dtype=object),
+        "CANTIDAD": cantidad,
+        "PRECIO": precio,
+        "MONTO": cantidad * precio,
+    })
+
+
+def mes_ruta(azar, dias, por_dia, comunas, desorden):
+    fechas, _ = fechas_de_filas(azar, dias, por_dia)
+    n = len(fechas)
+    # Cada dirección pertenece siempre a la misma comuna (así funciona la cascada de filtros)
+    total_direcciones = comunas * DIRECCIONES_POR_COMUNA
+    direccion = azar.choice(total_direcciones, size=n, p=pesos_zipf(total_direcciones, 0.6))
+    detalle_valor = elegir(azar, (list(range(len(DETALLES_RUTA[0]))), DETALLES_RUTA[1]), n).astype(np.int64)
+    detalles = np.array([d for d, _ in DETALLES_RUTA[0]], dtype=object)
+    valores = np.array([v for _, v in DETALLES_RUTA[0]], dtype=np.float64)
+    cantidad = cantidades(azar, n, 1.8, 0.8)
+    comuna = pd.Series(direccion % comunas + 1).map("ZONA {}".format)
+    direccion_texto = pd.Series(direccion + 1).map("Sector {}".format)
+
+    # Desorden: comunas escritas a mano y direcciones con espacios de más
+    a_mano = con_desorden(azar, n, desorden)
+    comuna = comuna.where(~a_mano, comuna.str.title() + " ")
+    espacios = con_desorden(azar, n, desorden)
+    direccion_texto = direccion_texto.where(~espacios, " " + direccion_texto + "  ")
+    return pd.DataFrame({
+        "FECHA": fechas,
+        "DETALLE": detalles[detalle_valor],
+        "DIRECCION": direccion_texto.to_numpy(dtype=object),
+        "COMUNA": comuna.to_numpy(dtype=object),
+        "CANTIDAD": cantidad,
+        "VALOR": valores[detalle_valor],
+        "TOTAL": cantidad * valores[detalle_valor],
+        "EXTRA": np.where(azar.random(n) < 0.03, 1000.0, 0.0),
+    })
+
+
+def mes_gastos(azar, dias, por_dia, desorden):
+    fechas, _ = fechas_de_filas(azar, dias, por_dia)
+    n = len(fechas)
+    descripcion = azar.choice(DESCRIPCIONES_GASTO, size=n, p=pesos_zipf(DESCRIPCIONES_GASTO, 0.8)) + 1
+    monto = np.round(np.exp(azar.normal(11.5, 1.2, n)))
+    # Desorden: montos en blanco (quedan en 0) o anotados en negativo
+    monto = np.where(con_desorden(azar, n, desorden), 0.0, monto)
+    monto = np.where(con_desorden(azar, n, desorden), -monto, monto)
+    return pd.DataFrame({
+        "FECHA": fechas,
+        "CATEGORIA": elegir(azar, CATEGORIAS_GASTO, n),
+        "DESCRIPCION": pd.Series(descripcion).map("Detalle {}".format).to_numpy(dtype=object),
+        "OBSERVACION": elegir(azar, OBSERVACIONES, n),
+        "MONTO": monto,
+    })
+
+
+#---------------- FUNCION LLAVE DE ORIGEN -------------------#
+def con_origen(df, archivo_id, pestana, fila):
+    """Agrega ARCHIVO_ID / PESTANA / FILA, como si viniera del Drive (llave única de la carga)."""
+    df["ARCHIVO_ID"] = archivo_id
+    df["PESTANA"] = pestana
+    df["FILA"] = fila
+    return df
+
+
+def pestanas_cuadre(dias, conteo):
+    return np.repeat(dias.strftime("CUADRE %d-%m").to_numpy(dtype=object), conteo)
+
+
+# ==========================================================
+# GENERADOR MES A MES
+# ==========================================================
+def generar_meses(desde="2023-10-01", anios=3, clientes=700, comunas=100,
+                  filas_por_dia=FILAS_POR_DIA, desorden=0.01, semilla=7):
+    """
+    Entrega (mes, {tabla: DataFrame}) por cada mes del período, con las
+    columnas de la tabla más la llave de origen, tal como salen de
+    construir_tabla (todavía sin validar). Con la misma semilla da lo mismo.
+    """
+    azar = np.random.default_rng(semilla)
+    nombres_clientes = nombres("Cliente", clientes)
+    inicio = pd.Timestamp(desde)
+    fin = inicio + pd.DateOffset(years=anios) - pd.Timedelta(days=1)
+    for mes in pd.period_range(inicio, fin, freq="M"):
+        dias = pd.date_range(max(mes.start_time, inicio), min(mes.end_time.normalize(), fin), freq="D")
+        archivo_id = f"sintetico_{mes.strftime('%Y_%m')}"
+        por_dia = {tabla: filas_por_dia * proporcion for tabla, proporcion in PROPORCIONES.items()}
+        tablas = {}
+        for tabla in ["ventas_diarias", "recargas"]:
+            df, conteo = mes_ventas(azar, tabla, dias, por_dia[tabla], nombres_clientes, desorden)
+            tablas[tabla] = con_origen(df, archivo_id, pestanas_cuadre(dias, conteo), filas_por_pestana(conteo))
+        df, conteo = mes_pendientes(azar, dias, por_dia["pendientes"], nombres_clientes)
+        tablas["pendientes"] = con_origen(df, archivo_id, pestanas_cuadre(dias, conteo), filas_por_pestana(conteo))
+        especiales = {
+            "adicionales": ("ADICIONAL", mes_adicionales(azar, dias, por_dia["adicionales"], nombres_clientes, desorden)),
+            "ruta": ("RUTA", mes_ruta(azar, dias, por_dia["ruta"], comunas, desorden)),
+            "gastos": ("GASTO", mes_gastos(azar, dias, por_dia["gastos"], desorden)),
+        }
+        for tabla, (pestana, df) in especiales.items():
+            tablas[tabla] = con_origen(df, archivo_id, pestana, np.arange(len(df)))
+        yield mes, tablas
+
+
+# ==========================================================
+# GUARDAR EN UNA BASE NUEVA
+# ==========================================================
+def crear_base_sintetica(ruta_db, snapshots=True, **opciones):
+    """
+    Crea 'ruta_db' desde cero con el esquema actual y los datos generados.
+    Cada mes se valida como en el ETL y se inserta por lotes; los índices y
+    los resúmenes se arman una vez al final. Devuelve {tabla: filas guardadas}.
+    """
+    conexion = sqlite3.connect(ruta_db)
+    filas = {tabla: 0 for tabla in PROPORCIONES}
+    try:
+        migrar(conexion)
+        # Es una base desechable: sin diario ni fsync se escribe mucho más rápido
+        conexion.execute("PRAGMA journal_mode = OFF")
+        conexion.execute("PRAGMA synchronous = OFF")
+        with conexion:
+            # Insertar con los índices armados es más lento que crearlos al final
+            for tabla in PROPORCIONES:
+                indices = conexion.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name = ?",
+                    (tabla,),
+                ).fetchall()
+                for (nombre,) in indices:
+                    conexion.execute(f'DROP INDEX "{nombre}"')
+
+            for mes, tablas in generar_meses(**opciones):
+                validas, cuarentena = validar_tablas(tablas)
+                for tabla, df in validas.items():
+                    insertar_por_lotes(conexion, f'"{tabla}"', df)
+                    filas[tabla] += len(df)
+                if not cuarentena.empty:
+                    insertar_por_lotes(conexion, "etl_cuarentena", cuarentena)
+                print(f"   🗓️ {mes}: {sum(len(df) for df in validas.values()):,} filas".replace(",", "."))
+
+            for tabla in PROPORCIONES:
+                crear_indices(conexion, tabla)
+            reconstruir_resumenes(conexion)
+            nueva_version_datos(conexion)
+    finally:
+        conexion.close()
+    if snapshots:
+        escribir_snapshots(ruta_db)
+    return filas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Crea una base SQLite con datos sintéticos para pruebas de carga.")
+    parser.add_argument("--db", required=True, help="Archivo .db a crear (ej. carga_x10.db)")
+    parser.add_argument("--desde", default="2023-10-01", help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--anios", type=int, default=3)
+    parser.add_argument("--clientes", type=int, default=700)
+    parser.add_argument("--comunas", type=int, default=100)
+    parser.add_argument("--filas-por-dia", type=float, default=FILAS_POR_DIA,
+                        help=f"Ventas diarias por día (la base actual tiene ~{FILAS_POR_DIA}); las demás tablas van en proporción")
+    parser.add_argument("--desorden", type=float, default=0.01,
+                        help="Parte de las filas con errores de digitación (montos negativos, cantidades en blanco...)")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--sin-snapshots", action="store_true", help="No dejar los snapshots Arrow del dashboard")
+    parser.add_argument("--reemplazar", action="store_true", help="Borrar --db si ya existe")
+    args = parser.parse_args(argumentos)
+
+    if os.path.exists(args.db):
+        if not args.reemplazar:
+            parser.error(f"{args.db} ya existe (use --reemplazar para sobrescribirla)")
+        os.remove(args.db)
+
+    print(f"⏳ Generando {args.anios} años de datos sintéticos en {args.db}...")
+    inicio = time.perf_counter()
+    filas = crear_base_sintetica(
+        args.db,
+        snapshots=not args.sin_snapshots,
+        desde=args.desde,
+        anios=args.anios,
+        clientes=args.clientes,
+        comunas=args.comunas,
+        filas_por_dia=args.filas_por_dia,
+        desorden=args.desorden,
+        semilla=args.semilla,
+    )
+    segundos = time.perf_counter() - inicio
+    for tabla, cantidad in filas.items():
+        print(f"   📝 {tabla}: {cantidad:,} filas".replace(",", "."))
+    total = sum(filas.values())
+    print(f"✅ {total:,} filas en {segundos:.1f}s ({total / segundos:,.0f} filas/s)".replace(",", "."))
+
+
+if __name__ == "__main__":
+    main()
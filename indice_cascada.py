@@ -0,0 +1,134 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+# ÍNDICE DE CASCADA (Filtros que dependen del anterior)
+# ==========================================================
+# Las pestañas de Ruta, Adicionales y Gastos tienen filtros en cascada
+# (ej. comuna -> dirección -> mes -> día): las opciones de cada selectbox
+# dependen de lo elegido en los anteriores. En vez de filtrar la tabla entera
+# en cada clic para sacar esas opciones, el índice se arma una vez por versión
+# de los datos y guarda, para cada combinación elegida ("Todos" incluido):
+#   - dónde están sus filas (un tramo de una permutación de la tabla), y
+#   - las opciones del siguiente filtro, en el orden en que aparecen.
+#
+# Cada nivel dice cómo filtra, igual que los métodos de Filtro (consultas.py):
+#   "igual" / "mes": las celdas vacías no se pueden elegir.
+#   "dia": las fechas vacías se eligen como "NaT" (lo mismo que Filtro.dia).
+
+
+class IndiceCascada:
+    def __init__(self, df, niveles):
+        """
+        df: las filas limpias de una base (en su orden original).
+        niveles: [(columna, tipo), ...] de arriba hacia abajo en la cascada.
+        """
+        self.df = df
+        self.niveles = list(niveles)
+        self.codigos = []       # Por nivel: un código entero por fila (-1 = vacía)
+        self.etiquetas = []     # Por nivel: el valor (texto) de cada código
+        for columna, tipo in self.niveles:
+            codigos, etiquetas = self._codificar(df[columna], tipo)
+            self.codigos.append(codigos)
+            self.etiquetas.append(etiquetas)
+
+        # Un juego de grupos por cada subconjunto de niveles elegidos
+        # (los demás en "Todos"): {niveles: (orden, {valores: (inicio, fin)})}
+        self.grupos = {}
+        for cantidad in range(len(self.niveles) + 1):
+            for elegidos in combinations(range(len(self.niveles)), cantidad):
+                self.grupos[elegidos] = self._agrupar(elegidos)
+
+        # Las opciones de cada nivel según lo elegido en los de más arriba:
+        # {(elegidos, nivel): {valores: [opciones]}}
+        self.hijos = {}
+        for nivel in range(len(self.niveles)):
+            for cantidad in range(nivel + 1):
+                for elegidos in combinations(range(nivel), cantidad):
+                    self.hijos[(elegidos, nivel)] = self._opciones_hijo(elegidos, nivel)
+
+    @staticmethod
+    def _codificar(serie, tipo):
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            serie = serie.dt.strftime("%Y-%m-%d")
+        codigos, unicos = pd.factorize(serie.astype(object), use_na_sentinel=True)
+        etiquetas = [str(valor) for valor in unicos]
+        # Las vacías de un nivel "dia" quedan como un valor más: "NaT"
+        if tipo == "dia" and (codigos == -1).any():
+            codigos = np.where(codigos == -1, len(etiquetas), codigos)
+            etiquetas.append("NaT")
+        return codigos, etiquetas
+
+    def _textos(self, nivel):
+        """Las etiquetas de un nivel como arreglo: el código -1 (vacía) cae en el None del final."""
+        return np.array(self.etiquetas[nivel] + [None], dtype=object)
+
+    def _agrupar(self, elegidos):
+        """Ordena las filas por los niveles elegidos: cada combinación queda en un tramo seguido."""
+        total = len(self.df)
+        if not elegidos:
+            return np.arange(total, dtype=np.int64), {(): (0, total)}
+        # lexsort es estable: dentro de un tramo las filas siguen en su orden original
+        orden = np.lexsort([self.codigos[nivel] for nivel in reversed(elegidos)])
+        claves = np.column_stack([self.codigos[nivel][orden] for nivel in elegidos])
+        cortes = np.flatnonzero((claves[1:] != claves[:-1]).any(axis=1)) + 1
+        inicios = np.concatenate(([0], cortes)) if total else np.array([], dtype=np.int64)
+        fines = np.concatenate((cortes, [total])) if total else np.array([], dtype=np.int64)
+        columnas = [self._textos(nivel)[claves[inicios, i]].tolist() for i, nivel in enumerate(elegidos)]
+        return orden, {
+            valores: (inicio, fin)
+            for valores, inicio, fin in zip(zip(*columnas), inicios.tolist(), fines.tolist())
+            # Una celda vacía (None) no se puede elegir: ese tramo solo cuenta en "Todos"
+            if None not in valores
+        }
+
+    def _opciones_hijo(self, elegidos, nivel):
+        """Para cada combinación de 'elegidos', los valores de 'nivel' en orden de aparición."""
+        # Los elegidos están todos más arriba que 'nivel': la clave es (padre..., hijo)
+        orden, tramos = self.grupos[elegidos + (nivel,)]
+        # orden[inicio] es la primera fila de cada tramo (el orden es estable)
+        inicios = np.fromiter((inicio for inicio, _ in tramos.values()), dtype=np.int64, count=len(tramos))
+        hijos = list(zip(orden[inicios].tolist(), tramos))
+        # Las filas con el nivel vacío no forman tramo; se agregan aparte
+        vacias = self.codigos[nivel] == -1
+        if vacias.any():
+            filas_vacias = np.flatnonzero(vacias).tolist()
+            textos = [self._textos(n)[self.codigos[n][vacias]].tolist() for n in elegidos]
+            # Sin niveles elegidos el padre es () (zip(*[]) no daría ninguna fila)
+            padres = zip(*textos) if elegidos else [()] * len(filas_vacias)
+            hijos += [(fila, padre + (None,)) for fila, padre in zip(filas_vacias, padres)]
+        # Un solo orden por primera aparición; el dict deja cada opción una vez
+        hijos.sort(key=lambda hijo: hijo[0])
+        por_padre = {}
+        for _, valores in hijos:
+            if None not in valores[:-1]:
+                por_padre.setdefault(valores[:-1], {})[valores[-1]] = None
+        return {padre: list(opciones) for padre, opciones in por_padre.items()}
+
+    def _elegidos(self, valores):
+        """Niveles fijados (los None son "Todos") y sus valores."""
+        elegidos = tuple(n for n, valor in enumerate(valores) if valor is not None)
+        return elegidos, tuple(str(valores[n]) for n in elegidos)
+
+    def opciones(self, valores, vacio=None):
+        """
+        Opciones del nivel siguiente a 'valores' (lo elegido arriba, None = "Todos").
+        Las celdas vacías se omiten, o se muestran como 'vacio' si se indica.
+        """
+        elegidos, clave = self._elegidos(valores)
+        hijos = self.hijos[(elegidos, len(valores))].get(clave, [])
+        if vacio is None:
+            return [valor for valor in hijos if valor is not None]
+        return list(dict.fromkeys(vacio if valor is None else valor for valor in hijos))
+
+    def posiciones(self, valores):
+        """Posiciones (en orden) de las filas que cumplen todo lo elegido."""
+        elegidos, clave = self._elegidos(valores)
+        orden, tramos = self.grupos[elegidos]
+        inicio, fin = tramos.get(clave, (0, 0))
+        return orden[inicio:fin]
+
+    def filas(self, valores):
+        return self.df.iloc[self.posiciones(valores)]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+# ÍNDICE POR FECHA (Rangos con búsqueda binaria)
+# ==========================================================
+# La pestaña de ventas filtra por un rango de fechas (y a veces un cliente).
+# En vez de comparar toda la columna FECHA contra las dos puntas en cada clic,
+# las posiciones de las filas se guardan ordenadas por fecha, junto con sus
+# sumas acumuladas:
+#   - las puntas del rango salen de dos búsquedas binarias (searchsorted), y
+#   - el total de una columna en el rango es acumulado[fin] - acumulado[inicio].
+# Hay un juego para todas las filas y otro por cada valor de 'grupo' (cliente).
+# Las filas sin fecha nunca entran en un rango, así que no se guardan.
+
+
+class IndiceFechas:
+    def __init__(self, df, sumas, grupo):
+        """
+        df: las filas limpias de una base (en su orden original).
+        sumas: columnas con suma acumulada (ej. CANTIDAD, TOTAL-PAGAR).
+        grupo: columna que se puede fijar además del rango (ej. CLIENTE).
+        """
+        self.df = df
+        self.sumas = list(sumas)
+        fechas = df["FECHA"].to_numpy()
+        con_fecha = np.flatnonzero(~np.isnat(fechas))
+        # Orden estable: las filas de un mismo día siguen en su orden original
+        por_fecha = con_fecha[np.argsort(fechas[con_fecha], kind="stable")]
+
+        # {valor del grupo: (posiciones, fechas, {columna: acumulado})}, None = "Todos"
+        self.tramos = {None: self._tramo(por_fecha)}
+        codigos, valores = pd.factorize(df[grupo].astype(object).to_numpy()[por_fecha])
+        # Separar por grupo sin perder el orden por fecha dentro de cada uno
+        orden = np.argsort(codigos, kind="stable")
+        cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+        for tramo in np.split(orden, cortes):
+            if len(tramo) and codigos[tramo[0]] >= 0:
+                self.tramos[str(valores[codigos[tramo[0]]])] = self._tramo(por_fecha[tramo])
+
+    def _tramo(self, posiciones):
+        acumulados = {}
+        for columna in self.sumas:
+            valores = self.df[columna].to_numpy()[posiciones]
+            # Enteros en int64 (sumas exactas); el resto en float64
+            tipo = np.int64 if np.issubdtype(valores.dtype, np.integer) else np.float64
+            acumulados[columna] = np.concatenate(([0], np.cumsum(valores, dtype=tipo)))
+        return posiciones, self.df["FECHA"].to_numpy()[posiciones], acumulados
+
+    def _rango(self, inicio, fin, valor):
+        """El tramo de 'valor' y las puntas [i, j) de las filas entre inicio y fin (inclusive)."""
+        tramo = self.tramos.get(valor)
+        if tramo is None:
+            return None, 0, 0
+        fechas = tramo[1]
+        i = np.searchsorted(fechas, np.datetime64(pd.Timestamp(inicio)).astype(fechas.dtype), side="left")
+        j = np.searchsorted(fechas, np.datetime64(pd.Timestamp(fin)).astype(fechas.dtype), side="right")
+        return tramo, int(i), int(j)
+
+    def total(self, columna, inicio, fin, valor=None):
+        """Suma de 'columna' en el rango, sin recorrer las filas."""
+        tramo, i, j = self._rango(inicio, fin, valor)
+        if tramo is None or j <= i:
+            return 0
+        acumulado = tramo[2][columna]
+        return (acumulado[j] - acumulado[i]).item()
+
+    def cantidad(self, inicio, fin, valor=None):
+        """Cuántas filas hay en el rango."""
+        _, i, j = self._rango(inicio, fin, valor)
+        return max(j - i, 0)
+
+    def posiciones(self, inicio, fin, valor=None):
+        """Posiciones de las filas del rango, en el orden original de la tabla."""
+        tramo, i, j = self._rango(inicio, fin, valor)
+        if tramo is None or j <= i:
+            return np.array([], dtype=np.int64)
+        return np.sort(tramo[0][i:j])
+
+    def filas(self, inicio, fin, valor=None):
+        return self.df.iloc[self.posiciones(inicio, fin, valor)]
+
+    def extremos(self):
+        """Primera y última fecha con filas (None si no hay ninguna)."""
+        fechas = self.tramos[None][1]
+        if not len(fechas):
+            return None, None
+        return pd.Timestamp(fechas[0]).date(), pd.Timestamp(fechas[-1]).date()
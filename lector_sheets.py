@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, fill_gaps
+
+# ==========================================================
+# LECTOR DE GOOGLE SHEETS (Cuota + lecturas por lote)
+# ==========================================================
+# La API de Sheets permite ~60 lecturas por minuto por usuario
+# (la cuenta de servicio cuenta como un usuario) y 300 por proyecto.
+# En vez de dormir un tiempo fijo por pestaña, cada llamada pide un
+# "token" a un balde que se rellena a esa velocidad. Si Google igual
+# responde 429 o un 5xx, esperamos con backoff exponencial y bajamos la
+# velocidad; cuando las lecturas vuelven a salir bien, la subimos de a poco.
+
+LECTURAS_POR_MINUTO = 60
+RANGOS_POR_LOTE = 50        # Pestañas por cada llamada a values.batchGet
+TRABAJADORES = 4            # Archivos que se descargan al mismo tiempo
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+#---------------- FUNCION CÓDIGO HTTP DE UN ERROR -----------#
+def codigo_http(error):
+    """Saca el código HTTP de un error de gspread o de googleapiclient (None si no tiene)."""
+    if isinstance(error, APIError):
+        return error.response.status_code
+    respuesta = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+    if respuesta is not None:
+        return int(respuesta.status)
+    return None
+
+
+def es_reintentable(error):
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return codigo_http(error) in CODIGOS_REINTENTABLES
+
+
+#---------------- CLASE LIMITADOR DE CUOTA ------------------#
+class LimitadorCuota:
+    """
+    Balde de tokens compartible entre hilos.
+    - lecturas_por_minuto: la cuota real de lectura.
+    - rafaga: cuántas llamadas seguidas se permiten sin esperar.
+    - reintentos / espera_base / espera_maxima: backoff exponencial ante 429/5xx.
+    """
+    def __init__(self, lecturas_por_minuto=LECTURAS_POR_MINUTO, rafaga=5,
+                 reintentos=6, espera_base=1.0, espera_maxima=64.0):
+        self.tasa_nominal = lecturas_por_minuto / 60.0   # tokens por segundo
+        self.tasa = self.tasa_nominal
+        self.tasa_minima = self.tasa_nominal / 16
+        self.capacidad = float(rafaga)
+        self.tokens = float(rafaga)
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._ultimo = time.monotonic()
+        self._candado = threading.Lock()
+
+        # Contadores para saber en qué se fue el tiempo
+        self.llamadas = 0
+        self.errores_reintentados = 0
+        self.segundos_esperando = 0.0
+        self.por_funcion = {}          # {nombre de la función: [llamadas, segundos]} (ver metricas_etl.py)
+
+    def _rellenar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def adquirir(self):
+        """Bloquea solo lo necesario hasta que haya un token disponible."""
+        while True:
+            with self._candado:
+                self._rellenar()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.llamadas += 1
+                    return
+                falta = (1 - self.tokens) / self.tasa
+            self._dormir(falta)
+
+    def _dormir(self, segundos):
+        with self._candado:
+            self.segundos_esperando += segundos
+        time.sleep(segundos)
+
+    def _frenar(self):
+        # Google nos dijo que vamos muy rápido: bajamos la tasa a la mitad y vaciamos el balde
+        with self._candado:
+            self.tasa = max(self.tasa_minima, self.tasa / 2)
+            self.tokens = 0.0
+
+    def _acelerar(self):
+        # Cada lectura exitosa nos devuelve un poco de velocidad, sin pasar la cuota real
+        with self._candado:
+            self.tasa = min(self.tasa_nominal, self.tasa + self.tasa_nominal / 20)
+
+    def _contar(self, funcion, inicio):
+        nombre = getattr(funcion, "__name__", type(funcion).__name__)
+        with self._candado:
+            contador = self.por_funcion.setdefault(nombre, [0, 0.0])
+            contador[0] += 1
+            contador[1] += time.monotonic() - inicio
+
+    def llamar(self, funcion, *args, **kwargs):
+        """Ejecuta una llamada a la API respetando la cuota y reintentando 429/5xx."""
+        intento = 0
+        while True:
+            self.adquirir()
+            inicio = time.monotonic()
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception as e:
+                self._contar(funcion, inicio)
+                if not es_reintentable(e) or intento >= self.reintentos:
+                    raise
+                self._frenar()
+                espera = min(self.espera_maxima, self.espera_base * 2 ** intento)
+                espera *= random.uniform(0.5, 1.0)  # "jitter" para no chocar todos a la vez
+                intento += 1
+                with self._candado:
+                    self.errores_reintentados += 1
+                print(f"   ⏸️ Cuota/servidor ({codigo_http(e)}). Reintento {intento} en {espera:.1f}s...")
+                self._dormir(espera)
+                continue
+            self._contar(funcion, inicio)
+            self._acelerar()
+            return resultado
+
+
+#---------------- FUNCION DESCARGAR PESTAÑAS POR LOTE -------#
+def grilla_de(rango_valores):
+    """Convierte un valueRange de la API en la misma grilla que devuelve get_all_values()."""
+    return fill_gaps(rango_valores.get("values", [[]]))
+
+
+def descargar_valores(sheet, hojas, limitador, por_lote=RANGOS_POR_LOTE):
+    """
+    Baja el contenido de varias pestañas de un mismo archivo con values.batchGet.
+    Devuelve las grillas en el mismo orden que 'hojas'.
+    """
+    grillas = []
+    for inicio in range(0, len(hojas), por_lote):
+        lote = hojas[inicio:inicio + por_lote]
+        rangos = [absolute_range_name(hoja.title) for hoja in lote]
+        respuesta = limitador.llamar(sheet.values_batch_get, rangos)
+        rangos_valores = respuesta.get("valueRanges", [])
+        grillas.extend(grilla_de(rv) for rv in rangos_valores)
+    return grillas
+
+
+#---------------- FUNCION DESCARGAR UN ARCHIVO COMPLETO -----#
+def descargar_libro(client, archivo_info, limitador, elegir_hojas):
+    """
+    Abre un archivo y baja solo las pestañas que 'elegir_hojas(archivo_info, hojas)' devuelva.
+    Devuelve (hojas, grillas) donde grillas es {id_pestaña: datos}.
+    """
+    sheet = limitador.llamar(client.open_by_key, archivo_info["id"])
+    hojas = limitador.llamar(sheet.worksheets)
+    elegidas = elegir_hojas(archivo_info, hojas)
+    grillas = descargar_valores(sheet, elegidas, limitador)
+    return hojas, dict(zip((hoja.id for hoja in elegidas), grillas))
+
+
+#---------------- FUNCION DESCARGAR VARIOS A LA VEZ ---------#
+def descargar_libros(client, archivos, limitador, elegir_hojas, trabajadores=TRABAJADORES):
+    """
+    Descarga varios archivos en paralelo con un grupo acotado de hilos que
+    comparten el mismo limitador de cuota.
+    Entrega (archivo_info, hojas, grillas, error) en el MISMO orden de 'archivos',
+    así el procesamiento de más abajo da exactamente lo mismo que en secuencia.
+    Solo se adelantan 2 x trabajadores archivos para no llenar la memoria.
+    """
+    archivos = iter(archivos)
+    en_vuelo = deque()
+    with ThreadPoolExecutor(max_workers=max(1, trabajadores)) as pool:
+        def lanzar_siguiente():
+            for archivo_info in archivos:
+                en_vuelo.append((archivo_info, pool.submit(descargar_libro, client, archivo_info, limitador, elegir_hojas)))
+                return
+
+        for _ in range(max(1, trabajadores) * 2):
+            lanzar_siguiente()
+
+        while en_vuelo:
+            archivo_info, futuro = en_vuelo.popleft()
+            lanzar_siguiente()
+            try:
+                hojas, grillas = futuro.result()
+            except Exception as e:
+                yield archivo_info, None, None, e
+            else:
+                yield archivo_info, hojas, grillas, None
@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==========================================================
+# MÉTRICAS DEL ETL (Tiempos por etapa + reporte de la corrida)
+# ==========================================================
+# Cuando el pipeline anda lento, los print no dicen en qué se fue el tiempo.
+# Cada corrida junta:
+#   - segundos y veces de cada etapa (listar Drive, esperar descargas, cada
+#     extraer_*, armar tablas, validar, cada paso de SQLite, snapshots),
+#   - llamadas a la API por función (y su tiempo), reintentos y espera de cuota,
+#   - por pestaña: segundos de extracción, bytes de la grilla y filas por tabla.
+# Al final queda un reporte JSON (reportes_etl/) y una fila en etl_corridas,
+# para comparar una corrida con la anterior y ver si algo se puso más lento.
+
+CARPETA_REPORTES = "reportes_etl"
+ETAPAS_EN_RESUMEN = 8       # Etapas más lentas que se muestran al final
+
+
+#---------------- FUNCIONES DE APOYO ------------------------#
+def bytes_grilla(datos):
+    """Tamaño (UTF-8) del texto de todas las celdas de una grilla."""
+    return sum(len(str(celda).encode("utf-8")) for fila in datos for celda in fila)
+
+
+def variacion(antes, ahora):
+    if not antes:
+        return ""
+    return f" ({(ahora - antes) / antes:+.0%})"
+
+
+#---------------- CLASE MÉTRICAS DE UNA CORRIDA -------------#
+class MetricasCorrida:
+    def __init__(self, modo, origen):
+        """modo: "completa" o "incremental". origen: "online" u "offline"."""
+        self.modo = modo
+        self.origen = origen
+        self.inicio = datetime.now()
+        self._reloj = time.perf_counter()
+        self._candado = threading.Lock()
+        self.segundos = None
+        self.estado = "en curso"
+        self.error = None
+
+        self.etapas = {}        # {nombre: [veces, segundos]}
+        self.api = {}           # {función: [llamadas, segundos]}
+        self.reintentos = 0
+        self.segundos_esperando = 0.0
+        self.pestanas = []      # Una entrada por pestaña procesada
+        self.pestanas_saltadas = 0
+        self.archivos_saltados = 0
+        self.filas = {}         # {tabla: filas que salen del ETL (ya validadas)}
+        self.cuarentena = 0
+        self.carga = {}         # {tabla: {"escritas": n, "borradas": n}}
+
+    #---------------- REGISTRO ----------------------------------#
+    def _sumar(self, destino, nombre, segundos, veces=1):
+        with self._candado:
+            acumulado = destino.setdefault(nombre, [0, 0.0])
+            acumulado[0] += veces
+            acumulado[1] += segundos
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Suma el tiempo del bloque a la etapa 'nombre' (se puede repetir)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._sumar(self.etapas, nombre, time.perf_counter() - inicio)
+
+    @contextmanager
+    def llamada(self, nombre):
+        """Una llamada a una API que no pasa por el limitador de cuota (ej. Drive)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._sumar(self.api, nombre, time.perf_counter() - inicio)
+
+    def medir_iterador(self, nombre, iterable):
+        """Entrega lo mismo que 'iterable', sumando a 'nombre' lo que se espera cada elemento."""
+        iterador = iter(iterable)
+        while True:
+            with self.etapa(nombre):
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+            yield elemento
+
+    def anotar_pestana(self, archivo_id, pestana, segundos, datos, filas):
+        with self._candado:
+            self.pestanas.append({
+                "archivo_id": archivo_id,
+                "pestana": pestana,
+                "segundos": round(segundos, 6),
+                "bytes": bytes_grilla(datos),
+                "filas": filas,
+            })
+
+    def anotar_limitador(self, limitador):
+        """Copia lo que contó el limitador de cuota (lector_sheets.py)."""
+        for nombre, (llamadas, segundos) in limitador.por_funcion.items():
+            self._sumar(self.api, nombre, segundos, veces=llamadas)
+        self.reintentos += limitador.errores_reintentados
+        self.segundos_esperando += limitador.segundos_esperando
+
+    def terminar(self, error=None):
+        self.segundos = time.perf_counter() - self._reloj
+        self.estado = "error" if error is not None else "ok"
+        self.error = None if error is None else str(error)
+
+    #---------------- REPORTE -----------------------------------#
+    def reporte(self):
+        """Todo lo medido, como diccionario listo para JSON."""
+        segundos = self.segundos if self.segundos is not None else time.perf_counter() - self._reloj
+        filas = sum(self.filas.values())
+        llamadas = sum(veces for veces, _ in self.api.values())
+        return {
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "segundos": round(segundos, 3),
+            "modo": self.modo,
+            "origen": self.origen,
+            "estado": self.estado,
+            "error": self.error,
+            "etapas": {
+                nombre: {"veces": veces, "segundos": round(tiempo, 6)}
+                for nombre, (veces, tiempo) in sorted(self.etapas.items(), key=lambda e: -e[1][1])
+            },
+            "api": {
+                "llamadas": llamadas,
+                "reintentos": self.reintentos,
+                "segundos_esperando": round(self.segundos_esperando, 3),
+                "por_funcion": {
+                    nombre: {"llamadas": veces, "segundos": round(tiempo, 6)}
+                    for nombre, (veces, tiempo) in sorted(self.api.items())
+                },
+            },
+            "pestanas": {
+                "leidas": len(self.pestanas),
+                "saltadas": self.pestanas_saltadas,
+                "archivos_saltados": self.archivos_saltados,
+                "bytes": sum(p["bytes"] for p in self.pestanas),
+                "detalle": self.pestanas,
+            },
+            "filas": {"total": filas, "por_tabla": self.filas, "cuarentena": self.cuarentena},
+            "carga": self.carga,
+            "rendimiento": {
+                "filas_por_segundo": round(filas / segundos, 1) if segundos else 0.0,
+                "pestanas_por_segundo": round(len(self.pestanas) / segundos, 2) if segundos else 0.0,
+            },
+        }
+
+    def resumen(self, anterior=None):
+        """Líneas para la consola: lo más lento y la comparación con la corrida anterior."""
+        reporte = self.reporte()
+        api = reporte["api"]
+        lineas = [
+            f"⏱️ Corrida {reporte['modo']} ({reporte['origen']}): {reporte['segundos']:.1f}s | "
+            f"{reporte['pestanas']['leidas']} pestañas, {reporte['filas']['total']} filas "
+            f"({reporte['rendimiento']['filas_por_segundo']:.0f} filas/s)",
+            f"📡 API: {api['llamadas']} llamadas | Reintentos: {api['reintentos']} | "
+            f"Esperando cuota: {api['segundos_esperando']:.1f}s",
+        ]
+        for nombre, etapa in list(reporte["etapas"].items())[:ETAPAS_EN_RESUMEN]:
+            lineas.append(f"   {nombre:<24} {etapa['segundos']:>9.3f}s  (x{etapa['veces']})")
+        if anterior is not None:
+            segundos, filas_por_segundo = anterior
+            lineas.append(
+                f"📈 Corrida anterior ({reporte['modo']}, {reporte['origen']}): {segundos:.1f}s -> "
+                f"{reporte['segundos']:.1f}s{variacion(segundos, reporte['segundos'])} | "
+                f"{filas_por_segundo:.0f} -> {reporte['rendimiento']['filas_por_segundo']:.0f} filas/s"
+            )
+        return lineas
+
+
+# ==========================================================
+# GUARDAR EL REPORTE (JSON + SQLite)
+# ==========================================================
+def guardar_reporte_json(reporte, carpeta=CARPETA_REPORTES):
+    """Escribe reportes_etl/corrida_AAAAMMDD_HHMMSS.json y devuelve su ruta."""
+    os.makedirs(carpeta, exist_ok=True)
+    nombre = "corrida_" + reporte["inicio"].replace("-", "").replace(":", "").replace("T", "_")
+    ruta = os.path.join(carpeta, nombre + ".json")
+    copia = 1
+    while os.path.exists(ruta):     # Dos corridas en el mismo segundo
+        copia += 1
+        ruta = os.path.join(carpeta, f"{nombre}_{copia}.json")
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def crear_tabla_corridas(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS etl_corridas (
+            ID INTEGER PRIMARY KEY,
+            INICIO TEXT NOT NULL,
+            SEGUNDOS REAL,
+            MODO TEXT,
+            ORIGEN TEXT,
+            ESTADO TEXT,
+            LLAMADAS_API INTEGER,
+            REINTENTOS INTEGER,
+            SEGUNDOS_ESPERANDO REAL,
+            PESTANAS INTEGER,
+            BYTES INTEGER,
+            FILAS INTEGER,
+            FILAS_POR_SEGUNDO REAL,
+            REPORTE TEXT
+        )
+    """)
+
+
+def corrida_anterior(conexion, modo, origen):
+    """(segundos, filas por segundo) de la última corrida exitosa del mismo tipo, o None."""
+    return conexion.execute("""
+        SELECT SEGUNDOS, FILAS_POR_SEGUNDO FROM etl_corridas
+        WHERE MODO = ? AND ORIGEN = ? AND ESTADO = 'ok'
+        ORDER BY ID DESC LIMIT 1
+    """, (modo, origen)).fetchone()
+
+
+def guardar_corrida(conexion, reporte):
+    """Una fila en etl_corridas (el reporte completo va en REPORTE). No hace commit."""
+    conexion.execute("""
+        INSERT INTO etl_corridas (
+            INICIO, SEGUNDOS, MODO, ORIGEN, ESTADO, LLAMADAS_API, REINTENTOS, SEGUNDOS_ESPERANDO,
+            PESTANAS, BYTES, FILAS, FILAS_POR_SEGUNDO, REPORTE
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        reporte["inicio"], reporte["segundos"], reporte["modo"], reporte["origen"], reporte["estado"],
+        reporte["api"]["llamadas"], reporte["api"]["reintentos"], reporte["api"]["segundos_esperando"],
+        reporte["pestanas"]["leidas"], reporte["pestanas"]["bytes"], reporte["filas"]["total"],
+        reporte["rendimiento"]["filas_por_segundo"], json.dumps(reporte, ensure_ascii=False),
+    ))
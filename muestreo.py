@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+# MUESTREO DE GRÁFICOS (Rangos largos con pocos puntos)
+# ==========================================================
+# Los gráficos diarios dibujan un punto (o una barra) por día: con varios años
+# elegidos el navegador recibe miles. Dos formas de dejarlo en un máximo:
+#   - Tramos: según el largo del rango se suma por día, semana o mes
+#     (elegir_grano). Sirve para barras: cada barra sigue siendo una suma.
+#   - LTTB (Largest-Triangle-Three-Buckets): para líneas, se quedan los días
+#     que mejor conservan la forma de la curva (picos y valles incluidos).
+
+GRANOS = [("dia", 1), ("semana", 7), ("mes", 31)]   # (grano, días aproximados por punto)
+
+
+#---------------- FUNCION ELEGIR GRANO ----------------------#
+def elegir_grano(primera, ultima, puntos):
+    """El grano más fino que deja el rango [primera, ultima] en 'puntos' o menos."""
+    if primera is None or ultima is None:
+        return "dia"
+    dias = (pd.Timestamp(ultima) - pd.Timestamp(primera)).days + 1
+    for grano, largo in GRANOS:
+        if -(-dias // largo) <= puntos:
+            return grano
+    return GRANOS[-1][0]
+
+
+#---------------- FUNCION LTTB ------------------------------#
+def lttb(x, y, puntos):
+    """
+    Posiciones de los 'puntos' que se quedan de la serie (x, y), con x creciente.
+    El primero y el último siempre quedan; el resto se reparte en tramos
+    iguales y de cada uno se elige el que arma el triángulo más grande con el
+    elegido anterior y el promedio del tramo siguiente.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    total = len(x)
+    if puntos >= total or puntos < 3:
+        return np.arange(total)
+
+    elegidos = np.empty(puntos, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, total - 1
+    # Bordes de los tramos del medio (sin el primero ni el último punto)
+    bordes = (np.arange(puntos - 1) * (total - 2) / (puntos - 2)).astype(np.int64) + 1
+    bordes[-1] = total - 1
+    anterior = 0
+    for k in range(puntos - 2):
+        inicio, fin = bordes[k], bordes[k + 1]
+        # El tramo siguiente (en el último, el punto final)
+        siguiente = slice(fin, bordes[k + 2]) if k + 2 < len(bordes) else slice(total - 1, total)
+        x_promedio, y_promedio = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs(
+            (x[anterior] - x_promedio) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (y_promedio - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[k + 1] = anterior
+    return elegidos
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# ==========================================================
+# PERFIL DEL DASHBOARD (Tiempos por sección, opcional)
+# ==========================================================
+# Para saber en qué se va una corrida lenta de una pestaña (consultar los
+# filtros, los KPIs, armar los gráficos, serializar la tabla...), cada
+# pestaña pone "marcas" al terminar cada sección. Si el perfil está activo:
+#   - la barra lateral muestra los milisegundos (y filas) de cada sección de
+#     la última corrida, con p50/p95 de la sesión, y
+#   - cada corrida se agrega como una línea JSON a perfil_dashboard.jsonl.
+# Se activa con ?perfil=1 en la URL o con la variable DASHBOARD_PERFIL=1.
+# Apagado, una marca no hace nada.
+#
+# Para ver p50/p95 del log:  python perfil_app.py [perfil_dashboard.jsonl]
+
+PARAMETRO_URL = "perfil"
+VARIABLE_ENTORNO = "DASHBOARD_PERFIL"
+RUTA_LOG = "perfil_dashboard.jsonl"
+CORRIDAS_EN_SESION = 200    # Totales que se guardan por pestaña para el p50/p95 del panel
+
+
+def perfil_activo():
+    if os.environ.get(VARIABLE_ENTORNO, "") not in ("", "0"):
+        return True
+    return st.query_params.get(PARAMETRO_URL, "") not in ("", "0")
+
+
+def percentiles(valores):
+    serie = pd.Series(valores, dtype="float64")
+    return serie.quantile(0.5), serie.quantile(0.95)
+
+
+#---------------- CLASE PERFIL DE UNA CORRIDA ---------------#
+class PerfilPestana:
+    """
+    Tiempos de una corrida de una pestaña (o de su fragmento). Cada marca
+    cierra la sección que terminó: lo que pasó desde la marca anterior.
+    """
+    def __init__(self, pestana):
+        self.pestana = pestana
+        self.activo = perfil_activo()
+        self.secciones = []     # [(nombre, milisegundos, filas)]
+        self._inicio = time.perf_counter()
+        self._ultima = self._inicio
+
+    def marca(self, nombre, filas=None):
+        if not self.activo:
+            return
+        ahora = time.perf_counter()
+        self.secciones.append((nombre, (ahora - self._ultima) * 1000, filas))
+        self._ultima = ahora
+
+    def cerrar(self):
+        """Muestra el panel en la barra lateral y anota la corrida en el log."""
+        if not self.activo:
+            return
+        total = (time.perf_counter() - self._inicio) * 1000
+        historial = st.session_state.setdefault("perfil_historial", {}).setdefault(self.pestana, [])
+        historial.append(total)
+        del historial[:-CORRIDAS_EN_SESION]
+        self._guardar_log(total)
+        self._dibujar(total, historial)
+
+    def _guardar_log(self, total):
+        linea = {
+            "momento": datetime.now().isoformat(timespec="milliseconds"),
+            "pestana": self.pestana,
+            "total_ms": round(total, 3),
+            "secciones": [
+                {"seccion": nombre, "ms": round(ms, 3), "filas": filas} for nombre, ms, filas in self.secciones
+            ],
+        }
+        try:
+            with open(RUTA_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(linea, ensure_ascii=False) + "\n")
+        except OSError:
+            pass    # Sin permiso de escritura (ej. en la nube): queda solo el panel
+
+    def _dibujar(self, total, historial):
+        p50, p95 = percentiles(historial)
+        with st.sidebar:
+            st.subheader(f"⏱️ Perfil: {self.pestana}")
+            st.dataframe(
+                pd.DataFrame(self.secciones, columns=["SECCION", "MS", "FILAS"]).round({"MS": 1}),
+                use_container_width=True,
+                hide_index=True,
+            )
+            st.caption(
+                f"Total: {total:.1f} ms | p50 {p50:.1f} ms, p95 {p95:.1f} ms "
+                f"({len(historial)} corridas en esta sesión)"
+            )
+
+
+# ==========================================================
+# RESUMEN DEL LOG (p50 / p95 por sección)
+# ==========================================================
+def resumen_log(ruta=RUTA_LOG):
+    """p50/p95 (ms) y corridas de cada sección de cada pestaña, a partir del log."""
+    filas = []
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            corrida = json.loads(linea)
+            filas.append((corrida["pestana"], "TOTAL", corrida["total_ms"]))
+            filas.extend((corrida["pestana"], s["seccion"], s["ms"]) for s in corrida["secciones"])
+    df = pd.DataFrame(filas, columns=["PESTANA", "SECCION", "MS"])
+    grupos = df.groupby(["PESTANA", "SECCION"], sort=False)["MS"]
+    return pd.DataFrame({
+        "CORRIDAS": grupos.size(),
+        "P50_MS": grupos.quantile(0.5).round(2),
+        "P95_MS": grupos.quantile(0.95).round(2),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50/p95 por sección del log de perfil del dashboard.")
+    parser.add_argument("log", nargs="?", default=RUTA_LOG)
+    print(resumen_log(parser.parse_args().log).to_string())
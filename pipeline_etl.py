@@ -2,8 +2,28 @@ import gspread
 import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build  # <--- NUEVO IMPORT NECESARIO
-import time
+import argparse
+import re
 import sqlite3
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from carga_sqlite import LLAVE, cargar_tablas, columnas_de, guardar_cuarentena
+from checkpoints_etl import guardar_checkpoints, hash_grilla, leer_checkpoints
+from esquema_db import migrar
+from cache_grillas import CARPETA_CACHE, CacheGrillas
+from lector_sheets import LECTURAS_POR_MINUTO, TRABAJADORES, LimitadorCuota, descargar_libros
+from metricas_etl import (
+    CARPETA_REPORTES,
+    MetricasCorrida,
+    corrida_anterior,
+    guardar_corrida,
+    guardar_reporte_json,
+)
+from resumenes_db import actualizar_resumenes
+from snapshots_db import escribir_snapshots, nueva_version_datos
+from validacion_etl import validar_tablas
 
 # ==========================================================
 # 1. FUNCIONES DE LIMPIEZA (Tus herramientas)
@@ -24,6 +44,7 @@ def limpiar_moneda(valor):
 
 
 #---------------- FUNCION PARA CAMBIO DE FECHA --------------#
+@lru_cache(maxsize=65536)  # La misma fecha se repite en cientos de filas: la traducimos una sola vez
 def limpiar_fecha_sql(fecha_texto):
     """
     Convierte fechas raras como 'viernes, 1 de septiembre de 2023' o '14/05'
@@ -88,10 +109,89 @@ def limpiar_fecha_sql(fecha_texto):
     return f"{anio}-{mes}-{dia}"
 
 
+#---------------- LIMPIEZA EN BLOQUE (Columnas completas) ---#
+def limpiar_moneda_serie(serie):
+    """
+    Lo mismo que limpiar_moneda, pero para una columna completa de una sola vez.
+    Los montos se repiten mucho (precios, recargas de $2.500...): cada texto distinto
+    se limpia una sola vez y el resultado se reparte a todas sus filas.
+    """
+    codigos, unicos = pd.factorize(serie.astype(str))
+    traducidos = pd.Series(unicos).map(limpiar_moneda).to_numpy(dtype=float)
+    return pd.Series(traducidos[codigos], index=serie.index)
+
+
+def limpiar_fechas_serie(serie):
+    """Convierte una columna de fechas: cada texto distinto pasa UNA sola vez por limpiar_fecha_sql."""
+    codigos, unicos = pd.factorize(serie.astype(str))
+    traducidas = pd.Series(unicos).map(limpiar_fecha_sql).to_numpy(dtype=object)
+    return pd.Series(traducidas[codigos], index=serie.index)
+
+
 # ==========================================================
 # 2. FUNCIONES DE EXTRACCIÓN (Tus operarios)
 # ==========================================================
 
+#---------------- FUNCION INDEXAR SECCIONES ----------------#
+# Cada tabla de una pestaña empieza con una fila "ancla" (un título).
+# En vez de que cada extractor vuelva a recorrer la hoja completa buscando
+# su título, la recorremos UNA sola vez con un único patrón compilado.
+ANCLAS = {
+    "RECARGAS DE 10 LTS": "RECARGAS",
+    "PAGOS PENDIENTE": "PENDIENTES",
+    "REGISTRO DE PRODUCTO": "ADICIONALES",
+    "ADICIONALES": "ADICIONALES",
+    "RUTA": "RUTA",   # También cubre "RUTA DE CLIENTE"
+}
+# El lookahead (?=...) permite encontrar anclas que se pisan dentro de la misma fila
+PATRON_ANCLAS = re.compile("(?=(" + "|".join(re.escape(ancla) for ancla in ANCLAS) + "))")
+
+# Qué secciones tiene cada tipo de pestaña (solo esos títulos cortan una tabla)
+SECCIONES_CUADRE = ("RECARGAS", "PENDIENTES")
+SECCIONES_ESPECIAL = ("ADICIONALES", "RUTA")
+
+# fila_ancla: fila del título | fila_titulos: encabezados | inicio_datos: primera fila de datos
+# fin_datos: fila del título siguiente (o el largo de la grilla), sin incluir
+Seccion = namedtuple("Seccion", ["fila_ancla", "fila_titulos", "inicio_datos", "fin_datos"])
+
+
+def es_titulo(fila):
+    """
+    Una fila es título si una celda ES el ancla ("PAGOS PENDIENTE") o si es lo único
+    escrito en la fila ("RUTA DE CLIENTE"). Una fila de datos que solo menciona la
+    palabra (DETALLE "RUTA NORTE", nota "entregado en ruta") no corta la tabla.
+    """
+    celdas = [celda.strip().upper() for celda in fila if celda.strip()]
+    return len(celdas) == 1 or any(celda in ANCLAS for celda in celdas)
+
+
+def indexar_secciones(datos, secciones=None):
+    """
+    Recorre la grilla una vez y devuelve {seccion: [Seccion, ...]} en orden de aparición.
+    Ninguna tabla pasa del título siguiente (fin_datos); dentro de ese tramo cada
+    extractor sigue usando su propia regla de parada (fila vacía, TOTAL...).
+    secciones: las que se buscan (ej. SECCIONES_CUADRE); None = todas.
+    """
+    buscadas = set(ANCLAS.values()) if secciones is None else set(secciones)
+    anclas = []     # [(fila, {secciones})]
+    titulos = []    # Filas que de verdad son un título (las únicas que cortan una tabla)
+    for i, fila in enumerate(datos):
+        texto_fila = " ".join(fila).upper()
+        encontradas = {ANCLAS[m.group(1)] for m in PATRON_ANCLAS.finditer(texto_fila)} & buscadas
+        if encontradas:
+            anclas.append((i, encontradas))
+            if es_titulo(fila):
+                titulos.append(i)
+
+    indice = {seccion: [] for seccion in buscadas}
+    for i, encontradas in anclas:
+        # El tramo termina en el próximo título que esté después de la fila de encabezados
+        fin = next((j for j in titulos if j >= i + 2), len(datos))
+        for seccion in encontradas:
+            indice[seccion].append(Seccion(i, i + 1, i + 2, fin))
+    return indice
+
+
 #---------------- FUNCION VENTAS CUADRE DIARIO --------------#
 def extraer_ventas(datos, fecha_db):
     ventas_hoy = []
@@ -139,13 +239,13 @@ def extraer_ventas(datos, fecha_db):
         registro = {
             "FECHA": fecha_db,
             "CLIENTE": nombre_cliente,
-            "CANTIDAD": limpiar_moneda(fila[cantidad]),
-            "PRECIO": limpiar_moneda(fila[precio]),
-            "TOTAL-PAGAR": limpiar_moneda(fila[total]),
-            "EFECTIVO": limpiar_moneda(fila[efectivo]),
-            "TRANSFERENCIA": limpiar_moneda(fila[transferencia]),
-            "TARJETA": limpiar_moneda(fila[tarjeta]),
-            "PENDIENTE": limpiar_moneda(fila[pendiente]),
+            "CANTIDAD": fila[cantidad],
+            "PRECIO": fila[precio],
+            "TOTAL-PAGAR": fila[total],
+            "EFECTIVO": fila[efectivo],
+            "TRANSFERENCIA": fila[transferencia],
+            "TARJETA": fila[tarjeta],
+            "PENDIENTE": fila[pendiente],
         }
 
         ventas_hoy.append(registro)
@@ -153,13 +253,14 @@ def extraer_ventas(datos, fecha_db):
 
 
 #---------------- FUNCION RECARGAS 10LTS --------------------#
-def recargas_10lts(hoja, datos, indice_titulo, lista_destino, fecha_db):
+def recargas_10lts(hoja, datos, indice_titulo, lista_destino, fecha_db, fin_datos=None):
     """
     Función inteligente que busca columnas y extrae datos de Recargas o Adicionales.
     - hoja: El objeto de la hoja actual (para sacar el título/fecha).
     - datos: Todos los datos de la hoja.
     - indice_titulo: El número de fila 'i' donde se encontró el título (ej. "RECARGAS").
     - lista_destino: La lista donde guardaremos los datos (df_recargas o df_adicionales).
+    - fin_datos: fila donde empieza la sección siguiente (Seccion.fin_datos); None = hasta el final.
     """
 
     # 1. LEEMOS LA FILA DE ENCABEZADOS (i + 1)
@@ -201,15 +302,8 @@ def recargas_10lts(hoja, datos, indice_titulo, lista_destino, fecha_db):
         elif "PENDIENTE" in titulo or "SALDO" in titulo:
             idx_pendiente = n
 
-    # 4. BUCLE DE EXTRACCIÓN
-    paso = 2
-    while True:
-        # Seguridad por si se acaba la hoja
-        if (indice_titulo + paso) >= len(datos):
-            break
-
-        fila_datos = datos[indice_titulo + paso]
-
+    # 4. BUCLE DE EXTRACCIÓN (sin pasarnos al título de la sección siguiente)
+    for fila_datos in datos[indice_titulo + 2:fin_datos]:
         # Obtenemos el nombre usando el índice detectado
         try:
             nombre = str(fila_datos[idx_cliente]).strip()
@@ -224,22 +318,20 @@ def recargas_10lts(hoja, datos, indice_titulo, lista_destino, fecha_db):
             "FECHA": fecha_db,
             "CLIENTE": nombre,
             "PRODUCTOS": fila_datos[idx_prod] if len(fila_datos) > idx_prod else "",
-            "CANTIDAD": limpiar_moneda(fila_datos[idx_cantidad] if len(fila_datos) > idx_cantidad else ""),
-            "PRECIO": limpiar_moneda(fila_datos[idx_precio])if len(fila_datos) > idx_precio else "",
-            "TOTAL-PAGAR": limpiar_moneda(fila_datos[idx_total])if len(fila_datos) > idx_total else "",
-            "EFECTIVO": limpiar_moneda(fila_datos[idx_efectivo])if len(fila_datos) > idx_efectivo else "",
-            "TRANSFERENCIA": limpiar_moneda(fila_datos[idx_transf])if len(fila_datos) > idx_transf else "",
-            "TARJETA": limpiar_moneda(fila_datos[idx_tarjeta])if len(fila_datos) > idx_tarjeta else "",
-            "PENDIENTE": limpiar_moneda(fila_datos[idx_pendiente])if len(fila_datos) > idx_pendiente else "",
+            "CANTIDAD": fila_datos[idx_cantidad] if len(fila_datos) > idx_cantidad else "",
+            "PRECIO": fila_datos[idx_precio] if len(fila_datos) > idx_precio else "",
+            "TOTAL-PAGAR": fila_datos[idx_total] if len(fila_datos) > idx_total else "",
+            "EFECTIVO": fila_datos[idx_efectivo] if len(fila_datos) > idx_efectivo else "",
+            "TRANSFERENCIA": fila_datos[idx_transf] if len(fila_datos) > idx_transf else "",
+            "TARJETA": fila_datos[idx_tarjeta] if len(fila_datos) > idx_tarjeta else "",
+            "PENDIENTE": fila_datos[idx_pendiente] if len(fila_datos) > idx_pendiente else "",
         }
-        # Solo guardamos si hay cantidad o total (para evitar filas vacías)
-        if registro["TOTAL-PAGAR"] != 0.0 or registro["CANTIDAD"] != 0.0:
-            lista_destino.append(registro)
-        paso += 1
+        # Las filas sin cantidad ni total se descartan después de limpiar (ver FILTROS_TABLA)
+        lista_destino.append(registro)
 
 
 #---------------- FUNCION EXTRAER PAGOS PENDIENTES ----------#
-def pagos_pendientes(hoja, datos, i, df_pendientes, fecha_db):
+def pagos_pendientes(hoja, datos, i, df_pendientes, fecha_db, fin_datos=None):
     pagos_pendiente = []
     # 1. LEEMOS LA FILA DE TÍTULOS (La que está justo debajo de "PAGOS PENDIENTE")
     # Convertimos todo a mayúsculas para no fallar
@@ -267,11 +359,8 @@ def pagos_pendientes(hoja, datos, i, df_pendientes, fecha_db):
         elif "TARJETA" in titulo or "DEBITO" in titulo: idx_tarjeta = n
         elif "PENDIENTE" in titulo or "SALDO" in titulo: idx_saldo_final = n
     
-    paso = 2
-    while True:
-        if (i + paso) >= len(datos): # Seguridad por si se acaba la hoja
-            break
-        fila_datos_extra2 = datos[i + paso]
+    # Desde la fila de datos hasta el título de la sección siguiente (fin_datos)
+    for fila_datos_extra2 in datos[i + 2:fin_datos]:
         nombre_p = str(fila_datos_extra2[idx_cliente]).strip()
     # SI EL NOMBRE ESTÁ VACÍO O ES UN TÍTULO DE OTRA TABLA, PARAMOS
         if nombre_p == "" or "TOTAL" in str(nombre_p).upper():
@@ -282,188 +371,169 @@ def pagos_pendientes(hoja, datos, i, df_pendientes, fecha_db):
             "CLIENTE": fila_datos_extra2[idx_cliente], 
             "PRODUCTOS": fila_datos_extra2[idx_prod],
             "FECHA-DEUDA": fila_datos_extra2[idx_fecha],
-            "DEUDA-MONTO": limpiar_moneda(fila_datos_extra2[idx_deuda]),
-            "EFECTIVO": limpiar_moneda(fila_datos_extra2[idx_efectivo]),
-            "TRANSFERENCIA": limpiar_moneda(fila_datos_extra2[idx_transf]),
-            "TARJETA": limpiar_moneda(fila_datos_extra2[idx_tarjeta]),
-            "PENDIENTE": limpiar_moneda(fila_datos_extra2[idx_saldo_final])
+            "DEUDA-MONTO": fila_datos_extra2[idx_deuda],
+            "EFECTIVO": fila_datos_extra2[idx_efectivo],
+            "TRANSFERENCIA": fila_datos_extra2[idx_transf],
+            "TARJETA": fila_datos_extra2[idx_tarjeta],
+            "PENDIENTE": fila_datos_extra2[idx_saldo_final]
             # Reutilizamos el índice de pendiente
         }
-        # Solo guardamos si realmente hay una deuda anotada
-        if pago_pendiente["PENDIENTE"] != "" and pago_pendiente["PENDIENTE"] != "0":
-            df_pendientes.append(pago_pendiente)
-        paso += 1
+        df_pendientes.append(pago_pendiente)
 
 
 #---------------- FUNCION EXTRAER ADICIONALES ---------------#
-def extraer_adicionales(datos):
+def extraer_adicionales(datos, indice=None):
     df_adicionales_local = []
+    if indice is None:
+        indice = indexar_secciones(datos, SECCIONES_ESPECIAL)
+
+    # 1. BUSCAR EL ANCLA: El índice ya sabe dónde empieza la tabla
+    # ("REGISTRO DE PRODUCTO" o "ADICIONALES"). Solo nos interesa la primera.
+    if not indice["ADICIONALES"]:
+        return df_adicionales_local
+    seccion = indice["ADICIONALES"][0]
+    i = seccion.fila_ancla
+
+    # 3. MAPEAR COLUMNAS: Leemos la fila de títulos (la que está justo debajo, i + 1)
+    try:
+        fila_titulos = [str(x).upper().strip() for x in datos[i +1]]
+    except IndexError:
+        return df_adicionales_local
     
-    # 1. El robot empieza a bajar fila por fila
-    for i, fila in enumerate(datos):
-        texto_fila = " ".join(fila).upper()
-        # 2. BUSCAR EL ANCLA: Detectamos dónde empieza la tabla
-        # Ajusta esta palabra si en tu Excel dice diferente
+    #VALORES POR DEFECTO
+    idx_fecha = -1
+    idx_cliente = -1
+    idx_prod = -1
+    idx_cant = -1
+    idx_precio = -1
+    idx_monto = -1
+    
+    # El robot detecta la posición real de cada columna
+    for n, titulo in enumerate(fila_titulos):
+        if "FECHA" in titulo: idx_fecha = n
+        elif "CLIENTE" in titulo: idx_cliente = n
+        elif "PRODUCTO" in titulo or "DETALLE" in titulo: idx_prod = n
+        elif "CANT" in titulo: idx_cant = n
+        elif "PRECIO" in titulo: idx_precio = n
+        elif "MONTO" in titulo or "TOTAL" in titulo: idx_monto = n
+
+    # 4. EXTRAER LOS DATOS (Bajamos desde la fila de títulos hasta la sección siguiente)
+    for fila_datos in datos[seccion.inicio_datos:seccion.fin_datos]:
+        # ESCUDO: Si la fila es más corta que donde debería estar el cliente, paramos
+        if len(fila_datos) <= idx_cliente:
+            break
+        
+        nombre_cliente = str(fila_datos[idx_cliente]).strip().upper()
+        
+        # 5. EL FRENO DE MANO: ¿Cuándo dejamos de leer?
+        # Si está vacío, dice TOTAL, o si invadimos la tabla de RUTA
+        if nombre_cliente == "" or "TOTAL" in nombre_cliente or "RUTA" in nombre_cliente:
+            break
+        
+        # Armamos el paquete de datos del cliente
+        registro = {
+            # "Si el índice no es -1 y la fila es suficientemente larga, saca el dato. Si no, pon vacío o cero."
+            "FECHA": fila_datos[idx_fecha] if idx_fecha != -1 and len(fila_datos) > idx_fecha else "",
+            "CLIENTE": fila_datos[idx_cliente], # El cliente asumimos que siempre existe
+            "PRODUCTO": fila_datos[idx_prod] if idx_prod != -1 and len(fila_datos) > idx_prod else "",
+            "CANTIDAD": fila_datos[idx_cant] if idx_cant != -1 and len(fila_datos) > idx_cant else "",
+            # MAGIA AQUÍ: Si idx_precio es -1 (no existe), queda vacío y la limpieza lo deja en 0.0
+            "PRECIO": fila_datos[idx_precio] if idx_precio != -1 and len(fila_datos) > idx_precio else "",
+            "MONTO": fila_datos[idx_monto] if idx_monto != -1 and len(fila_datos) > idx_monto else ""
+        }
+        
+        # Las filas sin monto ni producto se descartan después de limpiar (ver FILTROS_TABLA)
+        df_adicionales_local.append(registro)
 
-        if "REGISTRO DE PRODUCTO" in texto_fila or "ADICIONALES" in texto_fila:
-            # 3. MAPEAR COLUMNAS: Leemos la fila de títulos (la que está justo debajo, i + 1)
-            try:
-                fila_titulos = [str(x).upper().strip() for x in datos[i +1]]
-            except IndexError:
-                break
-            
-            #VALORES POR DEFECTO
-            idx_fecha = -1
-            idx_cliente = -1
-            idx_prod = -1
-            idx_cant = -1
-            idx_precio = -1
-            idx_monto = -1
-            
-            # El robot detecta la posición real de cada columna
-            for n, titulo in enumerate(fila_titulos):
-                if "FECHA" in titulo: idx_fecha = n
-                elif "CLIENTE" in titulo: idx_cliente = n
-                elif "PRODUCTO" in titulo or "DETALLE" in titulo: idx_prod = n
-                elif "CANT" in titulo: idx_cant = n
-                elif "PRECIO" in titulo: idx_precio = n
-                elif "MONTO" in titulo or "TOTAL" in titulo: idx_monto = n
-                
-                # 4. EXTRAER LOS DATOS (Bajamos desde la fila de títulos en adelante)
-            paso = 2
-            while True:
-                # Seguridad por si se acaba la hoja de Excel
-                if (i + paso) >= len(datos): 
-                    break
-                
-                fila_datos = datos[i + paso]
-                
-                # ESCUDO: Si la fila es más corta que donde debería estar el cliente, paramos
-                if len(fila_datos) <= idx_cliente:
-                    break
-                
-                nombre_cliente = str(fila_datos[idx_cliente]).strip().upper()
-                
-                # 5. EL FRENO DE MANO: ¿Cuándo dejamos de leer?
-                # Si está vacío, dice TOTAL, o si invadimos la tabla de RUTA
-                if nombre_cliente == "" or "TOTAL" in nombre_cliente or "RUTA" in nombre_cliente:
-                    break
-                
-                # Armamos el paquete de datos del cliente
-                registro = {
-                    # "Si el índice no es -1 y la fila es suficientemente larga, saca el dato. Si no, pon vacío o cero."
-                    "FECHA": limpiar_fecha_sql(fila_datos[idx_fecha]) if idx_fecha != -1 and len(fila_datos) > idx_fecha else "",
-                    "CLIENTE": fila_datos[idx_cliente], # El cliente asumimos que siempre existe
-                    "PRODUCTO": fila_datos[idx_prod] if idx_prod != -1 and len(fila_datos) > idx_prod else "",
-                    "CANTIDAD": limpiar_moneda(fila_datos[idx_cant] if idx_cant != -1 and len(fila_datos) > idx_cant else ""),
-                    # MAGIA AQUÍ: Si idx_precio es -1 (no existe), automáticamente pone 0.0
-                    "PRECIO": limpiar_moneda(fila_datos[idx_precio]) if idx_precio != -1 and len(fila_datos) > idx_precio else 0.0,
-                    "MONTO": limpiar_moneda(fila_datos[idx_monto]) if idx_monto != -1 and len(fila_datos) > idx_monto else 0.0
-                }
-                
-                # Solo guardamos si realmente hay un monto o un producto
-                if registro["MONTO"] != 0.0 or registro["PRODUCTO"] != "":
-                    df_adicionales_local.append(registro)
-                paso += 1 # Pasamos a la siguiente fila
-            # Como ya encontramos y leímos la tabla de adicionales, rompemos el bucle principal
-            break 
     return df_adicionales_local
 
 
 #---------------- FUNCION EXTRAER RUTA ----------------------#
-def extraer_ruta(datos):
+def extraer_ruta(datos, indice=None):
     df_ruta_local = []
+    if indice is None:
+        indice = indexar_secciones(datos, SECCIONES_ESPECIAL)
+
+    # 1. BUSCAR EL ANCLA: El índice ya sabe en qué fila dice "RUTA"
+    # (incluye "RUTA DE CLIENTE"). Solo nos interesa la primera.
+    if not indice["RUTA"]:
+        return df_ruta_local
+    seccion = indice["RUTA"][0]
+    i = seccion.fila_ancla
+
+    # 3. MAPEAR COLUMNAS: Leemos la fila de títulos (la que está justo debajo, i + 1)
+    try:
+        fila_titulos = [str(x).upper().strip() for x in datos[i +1]]
+    except IndexError:
+        return df_ruta_local
     
-    # 1. El robot empieza a bajar fila por fila
-    for i, fila in enumerate(datos):
-        texto_fila = " ".join(fila).upper()
+    #VALORES POR DEFECTO
+    idx_fecha = -1
+    idx_detalle = -1
+    idx_direccion = -1
+    idx_comuna = -1
+    idx_cant = -1
+    idx_valor = -1
+    idx_total = -1
+    idx_extra = -1
     
-        # 2. BUSCAR EL ANCLA: Detectamos dónde empieza la tabla
-        # Ajusta esta palabra si en tu Excel dice diferente
+    # El robot detecta la posición real de cada columna
+    for n, titulo in enumerate(fila_titulos):
+        if "FECHA" in titulo: idx_fecha = n
+        elif "DETALLE" in titulo: idx_detalle = n
+        elif "DIRECCION" in titulo: idx_direccion = n
+        elif "COMUNA" in titulo: idx_comuna = n
+        elif "CANTIDAD" in titulo or "DETALLE" in titulo: idx_cant = n
+        elif "VALOR" in titulo: idx_valor = n
+        elif "TOTAL" in titulo: idx_total = n
+        elif "EXTRA" in titulo: idx_extra = n
+
+    # 4. EXTRAER LOS DATOS (Bajamos desde la fila de títulos hasta la sección siguiente)
+    for fila_datos in datos[seccion.inicio_datos:seccion.fin_datos]:
+        # ESCUDO: Si la fila es más corta que donde debería estar el cliente, paramos
+        if len(fila_datos) <= idx_direccion:
+            break
+        
+        direccion = str(fila_datos[idx_direccion]).strip().upper()
+        
+        # 5. EL FRENO DE MANO: ¿Cuándo dejamos de leer?
+        # Si está vacío, dice TOTAL, o si invadimos la tabla de RUTA
+        if direccion == "" or "TOTAL" in direccion or "RUTA" in direccion:
+            break
+        
+        # Armamos el paquete de datos del cliente
+        registro = {
+            # "Si el índice no es -1 y la fila es suficientemente larga, saca el dato. Si no, pon vacío o cero."
+            "FECHA": fila_datos[idx_fecha] if idx_fecha != -1 and len(fila_datos) > idx_fecha else "",
+            "DETALLE": fila_datos[idx_detalle] if idx_detalle != -1 and len(fila_datos) > idx_detalle else "",
+            "DIRECCION": fila_datos[idx_direccion], 
+            "COMUNA": fila_datos[idx_comuna], 
+            "CANTIDAD": fila_datos[idx_cant] if idx_cant != -1 and len(fila_datos) > idx_cant else "",
+            "VALOR": fila_datos[idx_valor] if idx_valor != -1 and len(fila_datos) > idx_valor else "",
+            # MAGIA AQUÍ: Si idx monto o moneda es -1 (no existe), queda vacío y la limpieza lo deja en 0.0
+            "TOTAL": fila_datos[idx_total] if idx_total != -1 and len(fila_datos) > idx_total else "",
+            "EXTRA": fila_datos[idx_extra] if idx_extra != -1 and len(fila_datos) > idx_extra else ""
+        }
+        
+        # Las filas sin monto ni dirección se descartan después de limpiar (ver FILTROS_TABLA)
+        df_ruta_local.append(registro)
 
-        if "RUTA DE CLIENTE" in texto_fila or "RUTA" in texto_fila:
-            
-            # 3. MAPEAR COLUMNAS: Leemos la fila de títulos (la que está justo debajo, i + 1)
-            try:
-                fila_titulos = [str(x).upper().strip() for x in datos[i +1]]
-            except IndexError:
-                break
-            
-            #VALORES POR DEFECTO
-            idx_fecha = -1
-            idx_detalle = -1
-            idx_direccion = -1
-            idx_comuna = -1
-            idx_cant = -1
-            idx_valor = -1
-            idx_total = -1
-            idx_extra = -1
-            
-            # El robot detecta la posición real de cada columna
-            for n, titulo in enumerate(fila_titulos):
-                if "FECHA" in titulo: idx_fecha = n
-                elif "DETALLE" in titulo: idx_detalle = n
-                elif "DIRECCION" in titulo: idx_direccion = n
-                elif "COMUNA" in titulo: idx_comuna = n
-                elif "CANTIDAD" in titulo or "DETALLE" in titulo: idx_cant = n
-                elif "VALOR" in titulo: idx_valor = n
-                elif "TOTAL" in titulo: idx_total = n
-                elif "EXTRA" in titulo: idx_extra = n
-                
-                # 4. EXTRAER LOS DATOS (Bajamos desde la fila de títulos en adelante)
-            paso = 2
-            while True:
-                # Seguridad por si se acaba la hoja de Excel
-                if (i + paso) >= len(datos): 
-                    break
-                
-                fila_datos = datos[i + paso]
-                
-                # ESCUDO: Si la fila es más corta que donde debería estar el cliente, paramos
-                if len(fila_datos) <= idx_direccion:
-                    break
-                
-                direccion = str(fila_datos[idx_direccion]).strip().upper()
-                
-                # 5. EL FRENO DE MANO: ¿Cuándo dejamos de leer?
-                # Si está vacío, dice TOTAL, o si invadimos la tabla de RUTA
-                if direccion == "" or "TOTAL" in direccion or "RUTA" in direccion:
-                    break
-                
-                # Armamos el paquete de datos del cliente
-                registro = {
-                    # "Si el índice no es -1 y la fila es suficientemente larga, saca el dato. Si no, pon vacío o cero."
-                    "FECHA": limpiar_fecha_sql(fila_datos[idx_fecha]) if idx_fecha != -1 and len(fila_datos) > idx_fecha else "",
-                    "DETALLE": fila_datos[idx_detalle] if idx_detalle != -1 and len(fila_datos) > idx_detalle else "",
-                    "DIRECCION": fila_datos[idx_direccion], 
-                    "COMUNA": fila_datos[idx_comuna], 
-                    "CANTIDAD": limpiar_moneda(fila_datos[idx_cant] if idx_cant != -1 and len(fila_datos) > idx_cant else ""),
-                    "VALOR": limpiar_moneda(fila_datos[idx_valor] if idx_valor != -1 and len(fila_datos) > idx_valor else ""),
-                    # MAGIA AQUÍ: Si idx monto o moneda es -1 (no existe), automáticamente pone 0.0
-                    "TOTAL": limpiar_moneda(fila_datos[idx_total]) if idx_total != -1 and len(fila_datos) > idx_total else 0.0,
-                    "EXTRA": limpiar_moneda(fila_datos[idx_extra]) if idx_extra != -1 and len(fila_datos) > idx_extra else 0.0
-                }
-                
-                # Solo guardamos si realmente hay un monto o un producto
-                if registro["TOTAL"] != 0.0 or registro["DIRECCION"] != "":
-                    df_ruta_local.append(registro)
-                
-                paso += 1 # Pasamos a la siguiente fila
-            
-            # Como ya encontramos y leímos la tabla de adicionales, rompemos el bucle principal
-            break 
-            
     return df_ruta_local
 
 
 #---------------- FUNCION EXTRAER GASTOS --------------------#
+CATEGORIAS_GASTO = [
+    "COSTOS FIJOS", "COSTOS VARIABLES", "GASTOS ADMINISTRATIVOS", 
+    "TRANSPORTE Y ESTACIONAMIENTO", "INSUMOS PARA LOCAL", 
+    "MATERIALES CONSTRUCCION", "PROFESIONALES", "INVERSIONES", "OTROS GASTOS EXTRAS"
+]
+# Un solo patrón para todas las categorías (en vez de probarlas una por una en cada fila)
+PATRON_CATEGORIAS = re.compile("(?=(" + "|".join(re.escape(cat) for cat in CATEGORIAS_GASTO) + "))")
+ORDEN_CATEGORIAS = {cat: n for n, cat in enumerate(CATEGORIAS_GASTO)}
+
+
 def extraer_gastos(datos):
     lista_resultados = []
-    categorias = [
-        "COSTOS FIJOS", "COSTOS VARIABLES", "GASTOS ADMINISTRATIVOS", 
-        "TRANSPORTE Y ESTACIONAMIENTO", "INSUMOS PARA LOCAL", 
-        "MATERIALES CONSTRUCCION", "PROFESIONALES", "INVERSIONES", "OTROS GASTOS EXTRAS"
-    ]
     
     categoria_actual = "SIN CATEGORIA"
     
@@ -474,10 +544,10 @@ def extraer_gastos(datos):
         texto_columna_b = str(fila[1]).strip().upper()
         
         # AHORA (Busca si alguna de tus categorías vive dentro de la celda del Excel):
-        for cat in categorias:
-            if cat.upper() in texto_columna_b:
-                categoria_actual = cat
-                break # Ya encontramos la categoría, no hace falta seguir buscando en la lista
+        # Si hubiera más de una, gana la que va primero en la lista (como antes)
+        encontradas = PATRON_CATEGORIAS.findall(texto_columna_b)
+        if encontradas:
+            categoria_actual = min(encontradas, key=ORDEN_CATEGORIAS.get)
         if texto_columna_b == "" or "TOTAL" in texto_columna_b.upper():
             continue
         
@@ -490,11 +560,11 @@ def extraer_gastos(datos):
         # 3. Si pasó los filtros, limpiamos y guardamos
         try:
             lista_resultados.append({
-                "FECHA": limpiar_fecha_sql(fila[2]),
+                "FECHA": fila[2],
                 "CATEGORIA": categoria_actual,
                 "DESCRIPCION": fila[1],
                 "OBSERVACION": fila[6],
-                "MONTO": limpiar_moneda(fila[7])
+                "MONTO": fila[7]
             })
         except:
             continue
@@ -502,27 +572,99 @@ def extraer_gastos(datos):
     return lista_resultados
 
 # ==========================================================
-# 3. CONEXIÓN Y EXPLORACIÓN
+# 2B. ARMADO DE TABLAS (Limpieza en bloque)
 # ==========================================================
+# Los extractores entregan el texto tal como viene de la hoja.
+# Aquí limpiamos cada columna completa de una vez, con pandas.
+COLUMNAS_MONEDA = {
+    "ventas_diarias": ["CANTIDAD", "PRECIO", "TOTAL-PAGAR", "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"],
+    "recargas": ["CANTIDAD", "PRECIO", "TOTAL-PAGAR", "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"],
+    "pendientes": ["DEUDA-MONTO", "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"],
+    "adicionales": ["CANTIDAD", "PRECIO", "MONTO"],
+    "ruta": ["CANTIDAD", "VALOR", "TOTAL", "EXTRA"],
+    "gastos": ["MONTO"],
+}
+COLUMNAS_FECHA = {
+    "adicionales": ["FECHA"],
+    "ruta": ["FECHA"],
+    "gastos": ["FECHA"],
+}
+# Filas que no nos sirven (se revisan con los números ya limpios)
+FILTROS_TABLA = {
+    # Solo guardamos si hay cantidad o total (para evitar filas vacías)
+    "recargas": lambda df: (df["TOTAL-PAGAR"] != 0.0) | (df["CANTIDAD"] != 0.0),
+    # Solo guardamos si realmente hay un monto o un producto
+    "adicionales": lambda df: (df["MONTO"] != 0.0) | (df["PRODUCTO"] != ""),
+    "ruta": lambda df: (df["TOTAL"] != 0.0) | (df["DIRECCION"] != ""),
+}
+
+
+def construir_tabla(tabla, registros):
+    """Arma el DataFrame final de una tabla: limpia fechas y montos en bloque y aplica su filtro."""
+    df = pd.DataFrame(registros)
+    if df.empty:
+        return df
+    for columna in COLUMNAS_FECHA.get(tabla, []):
+        df[columna] = limpiar_fechas_serie(df[columna])
+    for columna in COLUMNAS_MONEDA.get(tabla, []):
+        df[columna] = limpiar_moneda_serie(df[columna])
+    filtro = FILTROS_TABLA.get(tabla)
+    if filtro is not None:
+        df = df[filtro(df)].reset_index(drop=True)
+    return df.fillna(0)
 
-# --- 2. CONEXIÓN MODERNA  ---
-scope = ["https://www.googleapis.com/auth/spreadsheets","https://www.googleapis.com/auth/drive",]
-# Esta es la forma nueva de conectarse que no falla con OpenSSL
-creds = Credentials.from_service_account_file("credenciales.json", scopes=scope)
-client = gspread.authorize(creds)
 
 # ==========================================================
-# 4. EJECUCIÓN MAESTRA 
+# 3. CONEXIÓN Y EXPLORACIÓN
 # ==========================================================
+
+# 1. PEGA AQUÍ EL ID QUE COPIASTE DEL NAVEGADOR
+ID_CARPETA_HISTORICOS = "1WzzntS2Ncss6vDrEaJ4EiwONfA5RYqaI"
+ID_HOJA = "1DWxlJAwKRStoskjK1UgSwmDqU9ObN55NGmSQLUgPKl4"
+
+# 👉 PON AQUÍ EL NOMBRE DE LA PESTAÑA QUE QUIERES PROBAR (Ej: "ENERO", "SEMANA 1", etc.)
+PESTANA_BUSCADA = ["ADICIONAL","GASTO"] # <--- ¡CÁMBIALO POR EL NOMBRE QUE ESTÁS BUSCANDO!
+
+RUTA_DB = "planta_agua3.db"
+
+# Las seis tablas que alimentan el dashboard
+TABLAS = ["ventas_diarias", "recargas", "pendientes", "adicionales", "ruta", "gastos"]
+
+
+# --- 2. CONEXIÓN MODERNA  ---
+def conectar(ruta_credenciales="credenciales.json"):
+    scope = ["https://www.googleapis.com/auth/spreadsheets","https://www.googleapis.com/auth/drive",]
+    # Esta es la forma nueva de conectarse que no falla con OpenSSL
+    creds = Credentials.from_service_account_file(ruta_credenciales, scopes=scope)
+    client = gspread.authorize(creds)
+    service = build("drive", "v3", credentials=creds)
+    return client, service
+
+
 #----------- BUSCAR ARCHIVOS ------------#
+def listar_archivos(service, query, metricas):
+    """Pide a Drive todos los archivos de la consulta, página por página."""
+    archivos = []
+    token = None
+    while True:
+        with metricas.llamada("drive.files.list"):
+            respuesta = service.files().list(
+                q=query,
+                fields="nextPageToken, files(id, name, modifiedTime)",
+                pageToken=token,
+            ).execute()
+        archivos.extend(respuesta.get("files", []))
+        token = respuesta.get("nextPageToken")
+        if not token:
+            return archivos
+
 
 # --- NUEVA FUNCIÓN: EL EXPLORADOR DE DRIVE ---
-def buscar_hojas_en_arbol(carpeta_id_maestra):
+def buscar_hojas_en_arbol(service, carpeta_id_maestra, metricas):
     """
     Entra a la carpeta maestra, busca subcarpetas y saca todos los Sheets.
-    Devuelve una lista de IDs de archivos para abrir.
+    Devuelve una lista de archivos (id, name, modifiedTime) para abrir.
     """
-    service = build("drive", "v3", credentials=creds)
     archivos_para_procesar = []
 
     print(f"📂 Explorando carpeta maestra ID: {carpeta_id_maestra}...")
@@ -530,8 +672,7 @@ def buscar_hojas_en_arbol(carpeta_id_maestra):
     # 1. Buscamos las SUBCARPETAS (Ej. "CUADRE DIARIO 2024") dentro de la maestra
     # La consulta dice: "Busca carpetas que estén DENTRO de la maestra y que no estén borradas"
     query_subcarpetas = f"'{carpeta_id_maestra}' in parents and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
-    results_sub = (service.files().list(q=query_subcarpetas, fields="files(id, name)").execute())
-    subcarpetas = results_sub.get("files", [])
+    subcarpetas = listar_archivos(service, query_subcarpetas, metricas)
     # Agregamos también la propia carpeta maestra por si hay archivos sueltos ahí
     subcarpetas.append({"id": carpeta_id_maestra, "name": "Raíz"})
 
@@ -540,9 +681,7 @@ def buscar_hojas_en_arbol(carpeta_id_maestra):
         # 2. Buscamos los SHEETS dentro de cada subcarpeta
         # mimeType de Google Sheets es: application/vnd.google-apps.spreadsheet
         query_sheets = f"'{carpeta['id']}' in parents and mimeType = 'application/vnd.google-apps.spreadsheet' and trashed = false"
-        results_sheets = (service.files().list(q=query_sheets, fields="files(id, name)").execute())
-        sheets = results_sheets.get("files", [])
-        for sheet in sheets:
+        for sheet in listar_archivos(service, query_sheets, metricas):
             print(f"      ✅ Encontrado: {sheet['name']}")
             archivos_para_procesar.append(sheet)
 
@@ -588,182 +727,456 @@ def buscar_hoja(client, file_id, nombre_pestana):
         return []
 
 
-# ------------------- EJECUCIÓN PRINCIPAL ------------------#
+# ==========================================================
+# 4. PROCESAMIENTO POR PESTAÑA
+# ==========================================================
 
-# --- 3. LISTAS VACÍAS ---
-df_ventas = []
-df_recargas = []
-df_pendientes = []
-df_gastos = []
-df_adicionales = []
-df_ruta = []
+#---------------- FUNCION PESTAÑA CUADRE DIARIO -------------#
+def procesar_cuadre(hoja, datos, fecha_db, metricas):
+    """
+    Aplica las extracciones de un 'CUADRE' diario. Devuelve {tabla: registros}.
+    El tiempo de cada extracción se suma en 'metricas' (metricas_etl.py).
+    """
+    resultado = {"ventas_diarias": [], "recargas": [], "pendientes": []}
+# ---------------------------------------------------------------------------------------------#
+    #-----A LOGICA DE VENTAS CUADRE DIARIO-----------#
+    with metricas.etapa("extraer_ventas"):
+        resultado["ventas_diarias"].extend(extraer_ventas(datos, fecha_db))
 
-# 1. PEGA AQUÍ EL ID QUE COPIASTE DEL NAVEGADOR
-ID_CARPETA_HISTORICOS = "1WzzntS2Ncss6vDrEaJ4EiwONfA5RYqaI"
-ID_HOJA = "1DWxlJAwKRStoskjK1UgSwmDqU9ObN55NGmSQLUgPKl4"
+# ----------------------------------------------------------------------------------------------#
+    # --- B. LÓGICA DE RECARGAS 10LTS(Empezamos a buscar más abajo) ---
+    with metricas.etapa("indexar_secciones"):
+        indice = indexar_secciones(datos, SECCIONES_CUADRE)
+    with metricas.etapa("recargas_10lts"):
+        for seccion in indice["RECARGAS"]:
+            # ¡Magia! Solo una línea llama a toda la lógica
+            recargas_10lts(hoja, datos, seccion.fila_ancla, resultado["recargas"], fecha_db, seccion.fin_datos)
+# -----------------------------------------------------------------------------------------------#
+    # C. LOGICA TABLA DE PENDIENTES
+    with metricas.etapa("pagos_pendientes"):
+        for seccion in indice["PENDIENTES"]:
+            pagos_pendientes(hoja, datos, seccion.fila_ancla, resultado["pendientes"], fecha_db, seccion.fin_datos)
+    return resultado
+
+
+#---------------- FUNCION PESTAÑA ESPECIAL (MUNDO 2) --------#
+def procesar_especial(datos_especiales, titulo_mayus, metricas):
+    """Aplica las extracciones de la pestaña de GASTOS o de ADICIONAL+ RUTA."""
+    resultado = {}
+    if "GASTO" in titulo_mayus:
+        # 🚦 EL SEMÁFORO DE MUNDO 2 🚦
+        # 1. Si el título tiene la palabra GASTO, aplicamos solo la función de gastos
+        with metricas.etapa("extraer_gastos"):
+            resultado["gastos"] = extraer_gastos(datos_especiales)
+
+    # 2. Si el título dice ADICIONAL o RUTA, aplicamos las otras dos
+    # (Como tu pestaña se llama "ADICIONAL+ RUTA", aplicará ambas y cada una buscará su ancla)
+    if "ADICIONAL" in titulo_mayus or "RUTA" in titulo_mayus:
+        with metricas.etapa("indexar_secciones"):
+            indice = indexar_secciones(datos_especiales, SECCIONES_ESPECIAL)  # Una sola pasada para las dos tablas
+        with metricas.etapa("extraer_adicionales"):
+            resultado["adicionales"] = extraer_adicionales(datos_especiales, indice)
+        with metricas.etapa("extraer_ruta"):
+            resultado["ruta"] = extraer_ruta(datos_especiales, indice)
+    return resultado
+
+
+#---------------- FUNCION ETIQUETAR ORIGEN ------------------#
+def etiquetar_origen(registros, archivo_id, pestana):
+    """
+    Anota en cada registro de qué archivo y pestaña salió, y su posición (FILA).
+    Esa es la llave natural con la que la carga incremental hace el upsert.
+    """
+    for fila, registro in enumerate(registros, start=1):
+        registro["ARCHIVO_ID"] = archivo_id
+        registro["PESTANA"] = pestana
+        registro["FILA"] = fila
+    return registros
 
-# 2. El robot sale a buscar
-lista_de_archivos = buscar_hojas_en_arbol(ID_CARPETA_HISTORICOS)
-# 2. AGREGAMOS LOS ARCHIVOS AISLADOS (Los que tienes por ID)
 
+# ==========================================================
+# 5. EJECUCIÓN MAESTRA
+# ==========================================================
 
-print(f"\n🤖 Total de archivos encontrados: {len(lista_de_archivos)}")
+class Corrida:
+    """
+    Acumula lo que sale de una ejecución del pipeline:
+    los registros de cada tabla y qué pestañas/archivos se tocaron.
+    """
+    def __init__(self, incremental, archivos_prev, pestanas_prev, metricas):
+        self.incremental = incremental
+        self.metricas = metricas       # Tiempos y conteos de la corrida (metricas_etl.py)
+        self.archivos_prev = archivos_prev
+        self.pestanas_prev = pestanas_prev
+        self.registros = {tabla: [] for tabla in TABLAS}
+        self.archivos_ok = []          # Archivos leídos completos (se actualiza su checkpoint)
+        self.hashes_nuevos = {}        # {(archivo_id, pestana): hash}
+        self.pestanas_tocadas = []     # Pestañas cuyas filas hay que reemplazar
+        self.pestanas_borradas = []    # Pestañas que ya no existen en Drive
+        self.archivos_borrados = []    # Archivos con checkpoint que ya no aparecen en Drive
+        self.archivos_saltados = 0
+        self.pestanas_saltadas = 0
+
+    def archivo_sin_cambios(self, archivo_info):
+        return (
+            self.incremental
+            and archivo_info.get("modifiedTime")
+            and self.archivos_prev.get(archivo_info["id"]) == archivo_info["modifiedTime"]
+        )
+
+    def procesar_archivo(self, archivo_info, pestanas):
+        """
+        pestanas: iterable de (titulo, datos, funcion) donde funcion(datos) -> {tabla: registros}.
+        Si una pestaña falla, se guarda lo leído hasta ahí (como siempre), pero el
+        archivo NO queda marcado como procesado: la próxima corrida lo vuelve a revisar.
+        """
+        archivo_id = archivo_info["id"]
+        vistas = set()
+        for titulo, datos, funcion in pestanas:
+            vistas.add(titulo)
+            huella = hash_grilla(datos)
+            if self.incremental and self.pestanas_prev.get((archivo_id, titulo)) == huella:
+                self.pestanas_saltadas += 1
+                continue
+            inicio = time.perf_counter()
+            filas = {}
+            for tabla, registros in funcion(datos).items():
+                self.registros[tabla].extend(etiquetar_origen(registros, archivo_id, titulo))
+                filas[tabla] = len(registros)
+            self.metricas.anotar_pestana(archivo_id, titulo, time.perf_counter() - inicio, datos, filas)
+            self.hashes_nuevos[(archivo_id, titulo)] = huella
+            self.pestanas_tocadas.append((archivo_id, titulo))
+
+        # Si llegamos aquí, el archivo se leyó completo: lo confirmamos
+        for (a, p) in self.pestanas_prev:
+            if a == archivo_id and p not in vistas:
+                self.pestanas_borradas.append((a, p))
+        self.archivos_ok.append(archivo_info)
+
+    def marcar_archivos_desaparecidos(self, ids_listados):
+        """
+        Archivos que tenían checkpoint y ya no aparecen en Drive (borrados, en la
+        papelera o movidos fuera de la carpeta): todas sus pestañas se borran.
+        Solo se llama con un listado completo de Drive.
+        """
+        if not self.incremental:
+            return     # La carga completa ya reemplaza todo
+        for archivo_id in self.archivos_prev:
+            if archivo_id in ids_listados:
+                continue
+            self.archivos_borrados.append(archivo_id)
+            self.pestanas_borradas.extend((a, p) for (a, p) in self.pestanas_prev if a == archivo_id)
+
+
+#---------------- FUNCION ELEGIR PESTAÑAS DE CUADRE ---------#
+def elegir_cuadres(archivo_info, hojas):
+    """🚦 RUTA 1: Solo bajamos las pestañas de Cuadre Diario."""
+    return [hoja for hoja in hojas if "CUADRE" in archivo_info['name'].upper()+ " " + hoja.title.strip()]
+
+
+#---------------- FUNCION FUENTE ONLINE ---------------------#
+def descarga_online(client, limitador, trabajadores, cache):
+    """
+    Arma la función 'descargar(archivos, elegir_hojas)' que usa Google Sheets.
+    Todo lo que baja queda además guardado en la caché local para el modo --offline.
+    """
+    def descargar(archivos, elegir_hojas):
+        for archivo_info, hojas, grillas, error in descargar_libros(client, archivos, limitador, elegir_hojas, trabajadores):
+            if error is None:
+                cache.guardar_libro(archivo_info, hojas, grillas)
+            yield archivo_info, hojas, grillas, error
+    return descargar
+
+
+def leer_cuadres(descargar, corrida, lista_de_archivos):
+    por_leer = []
+    for archivo_info in lista_de_archivos:
+        if corrida.archivo_sin_cambios(archivo_info):
+            corrida.archivos_saltados += 1
+        else:
+            por_leer.append(archivo_info)
+
+    # 3. AHORA SÍ, TU BUCLE DE SIEMPRE 
+    # Los archivos se descargan en paralelo, pero llegan aquí en el orden original
+    # "descargas": lo que este hilo espera a que llegue el siguiente archivo
+    for archivo_info, hojas, grillas, error in corrida.metricas.medir_iterador("descargas", descargar(por_leer, elegir_cuadres)):
+        try:
+            print(f"📖 Abriendo: {archivo_info['name']}...")
+            if error is not None:
+                raise error
+
+            # --- LOGICA DE SIEMPRE ---
+            def pestanas():
+                for hoja in hojas:
+                    titulo = hoja.title.strip()
+                    partes = titulo.split()
+                    fecha_texto = partes[-1]
+                    d, m, a = fecha_texto.split("/")
+                    fecha_db = f"20{a}-{m}-{d}"
+                    if hoja.id not in grillas: continue
+                    print(f"⏳ Procesando: {hoja.title}")
+                    
+                    # 3. Tomamos los datos de ESA hoja en específico
+                    datos = grillas[hoja.id]
+                    if not datos: continue
+                    
+                    yield titulo, datos, lambda d, h=hoja, f=fecha_db: procesar_cuadre(h, d, f, corrida.metricas)
+
+            # Cada pestaña se procesa en orden, una tras otra
+            corrida.procesar_archivo(archivo_info, pestanas())
+        except Exception as e:
+            print(f"❌ Error abriendo {archivo_info['name']}: {e}")
 
-# 3. AHORA SÍ, TU BUCLE DE SIEMPRE 
-for archivo_info in lista_de_archivos:
-    try:
-        print(f"📖 Abriendo: {archivo_info['name']}...")
-
-        # OJO: Aquí usamos open_by_key porque tenemos el ID, no el nombre
-        sheet = client.open_by_key(archivo_info["id"])
-
-        # --- LOGICA DE SIEMPRE ---
-        for hoja in sheet.worksheets():
-            time.sleep(1.1)
-            titulo = hoja.title.strip()
-            partes = titulo.split()
-            fecha_texto = partes[-1]
-            d, m, a = fecha_texto.split("/")
-            fecha_db = f"20{a}-{m}-{d}"
-            print(f"⏳ Procesando: {hoja.title}")
-            
-            # 3. Descargamos los datos de ESA hoja en específico
-            datos = hoja.get_all_values()
-            if not datos: continue
-            
-            nombre_actual = archivo_info['name'].upper()+ " " + titulo
-            # 🚦 RUTA 1: Si es un archivo de Cuadre Diario
-            if "CUADRE" in nombre_actual:
-# ---------------------------------------------------------------------------------------------#
-            #-----A LOGICA DE VENTAS CUADRE DIARIO-----------#
-                df_ventas.extend(extraer_ventas(datos, fecha_db))
-            
-# ----------------------------------------------------------------------------------------------#
-            # --- B. LÓGICA DE RECARGAS 10LTS(Empezamos a buscar más abajo) ---
-                for i, fila in enumerate(datos):
-                    texto_fila = " ".join(fila).upper().strip()
 
-                    if "RECARGAS DE 10 LTS" in texto_fila:
-                    # ¡Magia! Solo una línea llama a toda la lógica
-                        recargas_10lts(hoja, datos, i, df_recargas, fecha_db)
-# -----------------------------------------------------------------------------------------------#
-                # C. LOGICA TABLA DE PENDIENTES
-                    if "PAGOS PENDIENTE" in texto_fila:
-                        pagos_pendientes(hoja, datos, i, df_pendientes, fecha_db)
-#----------------------------------------------------------------------------------------------------#
-    except Exception as e:
-        print(f"❌ Error abriendo {archivo_info['name']}: {e}")
-        
-        
-        
 # ----------------------------------------------------------
 # MUNDO 2: EL ARCHIVO AISLADO (BÚSQUEDA ESPECÍFICA)
 # ----------------------------------------------------------
-print("\n🚀 MUNDO 2: Modo Francotirador (Buscando pestaña específica)...")
+def elegir_especiales(archivo_info, hojas):
+    """¿Alguna de nuestras palabras clave está en el título?"""
+    return [hoja for hoja in hojas if any(palabra in hoja.title.upper() for palabra in PESTANA_BUSCADA)]
 
-# 👉 PON AQUÍ EL NOMBRE DE LA PESTAÑA QUE QUIERES PROBAR (Ej: "ENERO", "SEMANA 1", etc.)
-PESTANA_BUSCADA = ["ADICIONAL","GASTO"] # <--- ¡CÁMBIALO POR EL NOMBRE QUE ESTÁS BUSCANDO!
 
-try:
-    sheet_especial = client.open_by_key(ID_HOJA) 
-    todas_las_hojas = sheet_especial.worksheets()
-    
-    pestañas_procesadas = 0
-    
-    for hoja in todas_las_hojas:
-        titulo_mayus = hoja.title.upper()
-        time.sleep(0.3)
+def leer_hoja_especial(descargar, corrida, archivo_info):
+    print("\n🚀 MUNDO 2: Modo Francotirador (Buscando pestaña específica)...")
+    try:
+        if archivo_info is None:
+            raise LookupError(f"No se encontró el archivo {ID_HOJA}")
+        if corrida.archivo_sin_cambios(archivo_info):
+            corrida.archivos_saltados += 1
+            print("  💤 Sin cambios desde la última corrida.")
+            return
+
+        # 🌟 LA MAGIA: Solo bajamos las pestañas que tengan alguna de nuestras palabras clave
+        with corrida.metricas.etapa("descargas"):
+            _, todas_las_hojas, grillas, error = next(descargar([archivo_info], elegir_especiales))
+        if error is not None:
+            raise error
+        atrapadas = [hoja for hoja in todas_las_hojas if hoja.id in grillas]
         
-        # 🌟 LA MAGIA: ¿Alguna de nuestras palabras clave está en el título?
-        if any(palabra in titulo_mayus for palabra in PESTANA_BUSCADA):
-            print(f"  ✅ ¡Atrapada! Procesando pestaña: {hoja.title}")
-            
-            datos_especiales = hoja.get_all_values()
-            
-            if datos_especiales:
-                if "GASTO" in titulo_mayus:
-                    # 🚦 EL SEMÁFORO DE MUNDO 2 🚦
-                    # 1. Si el título tiene la palabra GASTO, aplicamos solo la función de gastos
-                    df_gastos.extend(extraer_gastos(datos_especiales))
+        def pestanas():
+            for hoja in atrapadas:
+                datos_especiales = grillas[hoja.id]
+                titulo_mayus = hoja.title.upper()
+                print(f"  ✅ ¡Atrapada! Procesando pestaña: {hoja.title}")
                 
-                # 2. Si el título dice ADICIONAL o RUTA, aplicamos las otras dos
-                # (Como tu pestaña se llama "ADICIONAL+ RUTA", aplicará ambas y cada una buscará su ancla)
-                if "ADICIONAL" in titulo_mayus or "RUTA" in titulo_mayus:
-                    df_adicionales.extend(extraer_adicionales(datos_especiales))
-                    df_ruta.extend(extraer_ruta(datos_especiales))
-                pestañas_procesadas += 1
-            else:
-                print(f"  ⚠️ La pestaña {hoja.title} está vacía.")
-            
-            # 🛑 ¡QUITAMOS EL BREAK! 
-            # Así el robot termina con esta hoja y pasa a revisar la siguiente.
-            
-            
-except Exception as e:
-    print(f"❌ Error al abrir el archivo especial: {e}")
-# ==========================================================
-# 5. GUARDADO FINAL Y REVISIÓN
-# ==========================================================
+                if datos_especiales:
+                    yield hoja.title, datos_especiales, lambda d, t=titulo_mayus: procesar_especial(d, t, corrida.metricas)
+                else:
+                    print(f"  ⚠️ La pestaña {hoja.title} está vacía.")
+                
+                # 🛑 ¡QUITAMOS EL BREAK! 
+                # Así el robot termina con esta hoja y pasa a revisar la siguiente.
 
+        corrida.procesar_archivo(archivo_info, pestanas())
+                
+    except Exception as e:
+        print(f"❌ Error al abrir el archivo especial: {e}")
 
-# --- 6. MOSTRAR EL RESULTADO ---
-final_ventas = pd.DataFrame(df_ventas).fillna(0)
-final_10lts = pd.DataFrame(df_recargas).fillna(0)
-final_pendientes = pd.DataFrame(df_pendientes).fillna(0)
-final_adicionales = pd.DataFrame(df_adicionales).fillna(0)
-final_ruta = pd.DataFrame(df_ruta).fillna(0)
-final_gastos = pd.DataFrame(df_gastos).fillna(0)
 
-# Configuramos para ver todas las filas sin recortes
+# ==========================================================
+# 6. CREACIÓN Y EXPORTACIÓN A SQLITE (planta_agua.db)
+# ==========================================================
+def guardar_en_sqlite(conexion, corrida, finales, cuarentena):
+    """
+    - Carga completa: arma cada tabla en staging y la cambia por la vieja.
+    - Carga incremental: upsert por llave natural de las pestañas que cambiaron.
+    Después se anota la cuarentena y se ponen al día las tablas de resumen (solo las fechas tocadas).
+    Datos, cuarentena, resúmenes, sello de versión y checkpoints van en UNA sola transacción (todo o nada).
+    """
+    metricas = corrida.metricas
+    with conexion:
+        conexion.execute("BEGIN IMMEDIATE")
+        with metricas.etapa("sqlite.cargar_tablas"):
+            resumen = cargar_tablas(
+                conexion,
+                finales,
+                corrida.incremental,
+                corrida.pestanas_tocadas + corrida.pestanas_borradas,
+            )
+        with metricas.etapa("sqlite.cuarentena"):
+            guardar_cuarentena(conexion, cuarentena, corrida.incremental)
+        with metricas.etapa("sqlite.resumenes"):
+            actualizar_resumenes(conexion, corrida.incremental)
+        with metricas.etapa("sqlite.checkpoints"):
+            nueva_version_datos(conexion)
+            guardar_checkpoints(
+                conexion,
+                corrida.archivos_ok,
+                corrida.hashes_nuevos,
+                corrida.pestanas_borradas,
+                corrida.archivos_borrados,
+                reemplazar=not corrida.incremental,
+            )
+    for tabla, (escritas, borradas) in resumen.items():
+        metricas.carga[tabla] = {"escritas": escritas, "borradas": borradas}
+        print(f"   📝 {tabla}: {escritas} filas escritas, {borradas} borradas")
+
+
+def main(argumentos=None, conectar_google=conectar):
+    """conectar_google devuelve (cliente de Sheets, servicio de Drive); sheets_falso.py lo reemplaza en los benchmarks."""
+    parser = argparse.ArgumentParser(description="ETL de cuadres diarios hacia SQLite.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Solo vuelve a leer los archivos/pestañas que cambiaron desde la última corrida.",
+    )
+    parser.add_argument(
+        "--lecturas-por-minuto",
+        type=int,
+        default=LECTURAS_POR_MINUTO,
+        help="Cuota de lectura de la API de Sheets (por defecto %(default)s).",
+    )
+    parser.add_argument(
+        "--trabajadores",
+        type=int,
+        default=TRABAJADORES,
+        help="Archivos que se descargan en paralelo (por defecto %(default)s; 1 = en secuencia).",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="No se conecta a Google: vuelve a correr los extractores sobre la caché local de grillas.",
+    )
+    parser.add_argument("--carpeta-cache", default=CARPETA_CACHE, help="Carpeta de la caché de grillas.")
+    parser.add_argument("--db", default=RUTA_DB, help="Base SQLite de destino (por defecto %(default)s).")
+    parser.add_argument(
+        "--carpeta-reportes",
+        default=CARPETA_REPORTES,
+        help="Carpeta del reporte JSON de cada corrida (por defecto %(default)s).",
+    )
+    args = parser.parse_args(argumentos)
+    metricas = MetricasCorrida("incremental" if args.incremental else "completa", "offline" if args.offline else "online")
+
+    conexion = sqlite3.connect(args.db)
+    with metricas.etapa("migrar"):
+        migrar(conexion)
+    archivos_prev, pestanas_prev = leer_checkpoints(conexion)
+
+    incremental = args.incremental
+    if incremental and not archivos_prev:
+        print("🆕 No hay checkpoints previos: se hará una carga completa.")
+        incremental = False
+    if incremental and not all(set(LLAVE) <= set(columnas_de(conexion, t)) for t in TABLAS):
+        print("🆕 Las tablas no tienen la llave de origen (ARCHIVO_ID, PESTANA, FILA): se hará una carga completa.")
+        incremental = False
+    metricas.modo = "incremental" if incremental else "completa"
+    corrida = Corrida(incremental, archivos_prev, pestanas_prev, metricas)
+
+    cache = CacheGrillas(args.carpeta_cache)
+    if args.offline:
+        # 📴 Sin internet: re-procesamos las grillas guardadas en la caché
+        print(f"📴 Modo offline: leyendo grillas desde '{args.carpeta_cache}'")
+        descargar = cache.descargar
+        lista_de_archivos = [a for a in cache.archivos() if a["id"] != ID_HOJA]
+        info_especial = cache.archivo(ID_HOJA)
+    else:
+        client, service = conectar_google()
+        limitador = LimitadorCuota(args.lecturas_por_minuto)
+        descargar = descarga_online(client, limitador, args.trabajadores, cache)
+
+        # 2. El robot sale a buscar
+        with metricas.etapa("listar_drive"):
+            lista_de_archivos = buscar_hojas_en_arbol(service, ID_CARPETA_HISTORICOS, metricas)
+            try:
+                with metricas.llamada("drive.files.get"):
+                    info_especial = service.files().get(fileId=ID_HOJA, fields="id, name, modifiedTime").execute()
+            except Exception as e:
+                print(f"❌ Error al buscar el archivo especial: {e}")
+                info_especial = None
+        # Si el listado de Drive falla, la corrida se corta antes de llegar aquí.
+        # Si solo falló el archivo especial, no sabemos si sigue existiendo: se conserva
+        ids_listados = {a["id"] for a in lista_de_archivos} | {ID_HOJA}
+        corrida.marcar_archivos_desaparecidos(ids_listados)
+        if corrida.archivos_borrados:
+            print(f"🗑️ Archivos que ya no están en Drive: {len(corrida.archivos_borrados)} (se borran sus filas)")
+    print(f"\n🤖 Total de archivos encontrados: {len(lista_de_archivos)}")
+
+    leer_cuadres(descargar, corrida, lista_de_archivos)
+    leer_hoja_especial(descargar, corrida, info_especial)
+    if not args.offline:
+        cache.guardar_indice()
+        metricas.anotar_limitador(limitador)
+        print(f"\n📡 Lecturas a Sheets: {limitador.llamadas} | Reintentos: {limitador.errores_reintentados} | Esperando cuota: {limitador.segundos_esperando:.1f}s")
+    metricas.archivos_saltados = corrida.archivos_saltados
+    metricas.pestanas_saltadas = corrida.pestanas_saltadas
+
+    if corrida.incremental:
+        print(f"\n💤 Archivos sin cambios: {corrida.archivos_saltados} | Pestañas sin cambios: {corrida.pestanas_saltadas}")
+        print(f"🔁 Pestañas a reemplazar: {len(corrida.pestanas_tocadas) + len(corrida.pestanas_borradas)}")
+
+    # --- 6. MOSTRAR EL RESULTADO ---
+    with metricas.etapa("construir_tablas"):
+        finales = {tabla: construir_tabla(tabla, corrida.registros[tabla]) for tabla in TABLAS}
+    # 🧪 Reglas de negocio: lo rechazado o corregido queda anotado en etl_cuarentena
+    with metricas.etapa("validar"):
+        finales, cuarentena = validar_tablas(finales)
+    metricas.filas = {tabla: len(finales[tabla]) for tabla in TABLAS}
+    metricas.cuarentena = len(cuarentena)
+    if not cuarentena.empty:
+        print("\n🧪 VALIDACIÓN (filas en cuarentena):")
+        print(cuarentena.groupby(["TABLA", "ACCION", "MOTIVO"]).size().to_string())
+
+    print("\n✅ DATOS EXTRAÍDOS CON ÉXITO:")
+    #pd.set_option('display.max_rows', None)
+    for tabla in TABLAS:
+        print(finales[tabla])
+
+    # Esto te dirá cuántas ventas hubo por cada día
+    if not finales["ventas_diarias"].empty:
+        print("\n📅 VENTAS POR DÍA:")
+        print(finales["ventas_diarias"]["FECHA"].value_counts())
+
+    print(f"\n💾 CONECTANDO CON SQLITE ({args.db})...")
+    error = None
+    try:
+        with metricas.etapa("guardar_sqlite"):
+            guardar_en_sqlite(conexion, corrida, finales, cuarentena)
+        print(f"✅ ¡ÉXITO! Todos los datos fueron guardados en la base de datos {args.db}")
+    except Exception as e:
+        print(f"❌ Error crítico al guardar en SQLite: {e}")
+        error = e
 
-print("\n✅ DATOS EXTRAÍDOS CON ÉXITO:")
-#pd.set_option('display.max_rows', None)
-print(final_ventas)
-print(final_10lts)
-print(final_pendientes)
-print(final_adicionales)
-print(final_ruta)
-print(final_gastos)
+    # 📸 Dejamos listas las filas limpias para el dashboard (si falla, él las arma solo)
+    if error is None:
+        try:
+            with metricas.etapa("snapshots"):
+                sello = escribir_snapshots(args.db)
+            print(f"📸 Snapshots del dashboard actualizados (versión de datos {sello})")
+        except OSError as e:
+            print(f"⚠️ No se pudieron escribir los snapshots: {e}")
 
-# Esto te dirá cuántas ventas hubo por cada día
-print("\n📅 VENTAS POR DÍA:")
-print(final_ventas["FECHA"].value_counts())
+    # ⏱️ Reporte de la corrida (también si falló el guardado)
+    try:
+        cerrar_corrida(conexion, metricas, error, args.carpeta_reportes)
+    finally:
+        # 3. Cerramos la puerta
+        conexion.close()
 
 
-# ==========================================================
-# 6. CREACIÓN Y EXPORTACIÓN A SQLITE (planta_agua.db)
-# ==========================================================
-print("\n💾 CONECTANDO CON SQLITE (planta_agua.db)...")
+#---------------- FUNCION REPORTE DE LA CORRIDA -------------#
+def cerrar_corrida(conexion, metricas, error, carpeta_reportes):
+    """Deja el reporte en etl_corridas y en un JSON, y muestra el resumen en consola."""
+    metricas.terminar(error)
+    reporte = metricas.reporte()
+    try:
+        anterior = corrida_anterior(conexion, metricas.modo, metricas.origen)
+        with conexion:
+            guardar_corrida(conexion, reporte)
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo anotar la corrida en etl_corridas: {e}")
+        anterior = None
+    try:
+        ruta = guardar_reporte_json(reporte, carpeta_reportes)
+    except OSError as e:
+        print(f"⚠️ No se pudo escribir el reporte JSON: {e}")
+        ruta = None
 
-try:
-    # 1. Creamos la conexión (Si el archivo no existe, Python lo crea por ti)
-    conexion = sqlite3.connect("planta_agua3.db")
-    
-    # 2. Guardamos cada DataFrame en su respectiva tabla
-    # Nota: Usamos 'replace' para pruebas. 
-    # En el futuro, lo cambiaremos a 'append'.
-    
-    if not final_ventas.empty:
-        final_ventas.to_sql("ventas_diarias", conexion, if_exists="replace", index=False)
-        
-    if not final_10lts.empty:
-        final_10lts.to_sql("recargas", conexion, if_exists="replace", index=False)
-        
-    if not final_pendientes.empty:
-        final_pendientes.to_sql("pendientes", conexion, if_exists="replace", index=False)
-        
-    if not final_adicionales.empty:
-        final_adicionales.to_sql("adicionales", conexion, if_exists="replace", index=False)
-        
-    if not final_ruta.empty:
-        final_ruta.to_sql("ruta", conexion, if_exists="replace", index=False)
-        
-    if not final_gastos.empty:
-        final_gastos.to_sql("gastos", conexion, if_exists="replace", index=False)
+    print("\n⏱️ RESUMEN DE LA CORRIDA:")
+    for linea in metricas.resumen(anterior):
+        print(linea)
+    if ruta:
+        print(f"🧾 Reporte completo: {ruta}")
 
-    # 3. Cerramos la puerta
-    conexion.close()
-    print("✅ ¡ÉXITO! Todos los datos fueron guardados en la base de datos planta_agua.db")
 
-except Exception as e:
-    print(f"❌ Error crítico al guardar en SQLite: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# ==========================================================
+# TABLAS DE RESUMEN (Sumas diarias y mensuales precalculadas)
+# ==========================================================
+# Los KPIs y gráficos del dashboard son siempre sumas por día, mes, cliente,
+# comuna/dirección, producto o categoría. En vez de sumar las filas crudas en
+# cada clic, el ETL mantiene estas sumas ya hechas:
+#   - "resumen_<base>_dia[_grupos]": una fila por FECHA + grupos.
+#   - "resumen_<base>_mes[_grupos]": una fila por MES + grupos (sale de la diaria).
+# La tabla mensual también tiene FECHA (el día 1 del mes), así los mismos
+# filtros por mes (FECHA BETWEEN ...) sirven para las dos.
+#
+# Las ventas de 20 lts y las recargas de 10 lts se guardan además juntas en
+# una tabla de hechos, "ventas_unificadas" (con TIPO_PRODUCTO, montos en valor
+# absoluto y MES), para no volver a unirlas en cada lectura.
+#
+# En una carga incremental solo se recalculan las fechas que tocó el upsert
+# (temp.etl_fechas_tocadas, la llena carga_sqlite.py) y sus meses.
+
+COLUMNAS_VENTA = ["CANTIDAD", "PRECIO", "TOTAL-PAGAR", "EFECTIVO", "TRANSFERENCIA", "TARJETA", "PENDIENTE"]
+MONTOS_VENTA = ", ".join(f'"{c}"' for c in COLUMNAS_VENTA)
+MES_SQL = "strftime('%Y-%m', FECHA)"
+
+# Ventas de 20 lts + recargas de 10 lts (la "tabla maestra" del resumen), con
+# la que se llena ventas_unificadas. ORDEN conserva el orden original: primero
+# ventas y después recargas. Las filas ya vienen validadas por el ETL
+# (validacion_etl.py): cantidad positiva y montos en valor absoluto.
+VENTAS_UNIFICADAS = "ventas_unificadas"
+UNION_VENTAS = f"""
+    SELECT ID AS ORDEN, FECHA, {MES_SQL} AS MES, CLIENTE, 'RECARGA 20LTS' AS TIPO_PRODUCTO, {MONTOS_VENTA}
+    FROM ventas_diarias
+    UNION ALL
+    SELECT 1000000000000 + ID, FECHA, {MES_SQL}, CLIENTE, 'RECARGA 10LTS', {MONTOS_VENTA}
+    FROM recargas
+"""
+COLUMNAS_UNIFICADAS = ["ORDEN", "FECHA", "MES", "CLIENTE", "TIPO_PRODUCTO"] + COLUMNAS_VENTA
+
+# Las "bases" son las filas que usa el dashboard, ya limpias (la limpieza que
+# hacía cargar_datos() ahora la hace el ETL antes de guardar), con la columna
+# MES ("2026-02") sacada de la fecha.
+BASES = {
+    "ventas": f"""
+        SELECT {", ".join(f'"{c}"' for c in COLUMNAS_UNIFICADAS)} FROM {VENTAS_UNIFICADAS}
+    """,
+    "ruta": f"""
+        SELECT ID AS ORDEN, FECHA, {MES_SQL} AS MES, DETALLE, DIRECCION, COMUNA, CANTIDAD, VALOR, TOTAL, EXTRA
+        FROM ruta
+    """,
+    "adicionales": f"""
+        SELECT ID AS ORDEN, FECHA, {MES_SQL} AS MES, CLIENTE, PRODUCTO, CANTIDAD, PRECIO, MONTO
+        FROM adicionales
+    """,
+    "gastos": f"""
+        SELECT ID AS ORDEN, FECHA, {MES_SQL} AS MES, CATEGORIA, DESCRIPCION, OBSERVACION, MONTO
+        FROM gastos
+    """,
+}
+
+# Un resumen por base: de qué tablas sale, qué suma y por qué columnas se puede
+# filtrar/agrupar. Cada "nivel" es un juego de tablas (_dia y _mes), del más
+# chico (solo fechas) al más detallado; las consultas usan el primero que tenga
+# todas las columnas que necesitan.
+RESUMENES = {
+    "ventas": {
+        "tablas": ["ventas_diarias", "recargas"],
+        "niveles": [(), ("CLIENTE",)],
+        "sumas": ["CANTIDAD", "TOTAL-PAGAR"],
+    },
+    "ruta": {
+        "tablas": ["ruta"],
+        "niveles": [(), ("COMUNA",), ("COMUNA", "DIRECCION")],
+        "sumas": ["TOTAL", "EXTRA"],
+    },
+    "adicionales": {
+        "tablas": ["adicionales"],
+        "niveles": [(), ("PRODUCTO",), ("CLIENTE", "PRODUCTO")],
+        "sumas": ["MONTO"],
+    },
+    "gastos": {
+        "tablas": ["gastos"],
+        "niveles": [(), ("CATEGORIA",), ("CATEGORIA", "DESCRIPCION")],
+        "sumas": ["MONTO"],
+    },
+}
+
+
+def tabla_resumen(base, grano, grupos=()):
+    """
+    Nombre de la tabla de resumen. grano es "dia" o "mes".
+    Ej: resumen_ruta_dia, resumen_ruta_mes_comuna_direccion.
+    """
+    return "_".join(["resumen", base, grano] + [c.lower() for c in grupos])
+
+
+def elegir_nivel(base, columnas):
+    """El nivel más chico que tiene todas las columnas pedidas (None si ninguno sirve)."""
+    for grupos in RESUMENES[base]["niveles"]:
+        if set(columnas) <= set(grupos):
+            return grupos
+    return None
+
+
+def lista(columnas):
+    return ", ".join(f'"{c}"' for c in columnas)
+
+
+#---------------- TABLA DE HECHOS: VENTAS UNIFICADAS --------#
+def crear_ventas_unificadas(conexion):
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VENTAS_UNIFICADAS} (
+            ORDEN INTEGER PRIMARY KEY,
+            FECHA TEXT,
+            MES TEXT,
+            CLIENTE TEXT,
+            TIPO_PRODUCTO TEXT,
+            {", ".join(f'"{c}" REAL' for c in COLUMNAS_VENTA)}
+        )
+    """)
+    # Los mismos filtros que las tablas crudas: rango de fechas, mes y cliente + fecha
+    for columnas in (("FECHA",), ("MES",), ("CLIENTE", "FECHA")):
+        nombre = f"ix_{VENTAS_UNIFICADAS}_" + "_".join(c.lower() for c in columnas)
+        conexion.execute(f'CREATE INDEX IF NOT EXISTS "{nombre}" ON {VENTAS_UNIFICADAS} ({lista(columnas)})')
+
+
+def recalcular_ventas_unificadas(conexion, condicion):
+    """Vuelve a armar desde ventas_diarias y recargas las filas que cumplen 'condicion' (sobre FECHA)."""
+    conexion.execute(f"DELETE FROM {VENTAS_UNIFICADAS} WHERE {condicion}")
+    conexion.execute(f"""
+        INSERT INTO {VENTAS_UNIFICADAS} ({lista(COLUMNAS_UNIFICADAS)})
+        SELECT * FROM ({UNION_VENTAS}) WHERE {condicion}
+    """)
+
+
+#---------------- FUNCION CREAR TABLAS DE RESUMEN -----------#
+def crear_resumenes(conexion):
+    """
+    Crea solo las tablas resumen_* (las de la migración 3). ventas_unificadas
+    la crea su propia migración (la 5): aquí no se toca.
+    """
+    for base, definicion in RESUMENES.items():
+        sumas = [f'"{c}" REAL' for c in definicion["sumas"]]
+        for grupos in definicion["niveles"]:
+            columnas = ['"FECHA" TEXT', '"MES" TEXT'] + [f'"{c}" TEXT' for c in grupos] + sumas
+            for grano, llave in (("dia", "FECHA"), ("mes", "MES")):
+                tabla = tabla_resumen(base, grano, grupos)
+                conexion.execute(f'CREATE TABLE IF NOT EXISTS "{tabla}" ({", ".join(columnas)})')
+                # Igual que en las tablas crudas: la fecha (o mes) sola y cada grupo + fecha
+                conexion.execute(f'CREATE INDEX IF NOT EXISTS "ix_{tabla}_{llave.lower()}" ON "{tabla}" ("{llave}")')
+                for grupo in grupos:
+                    conexion.execute(
+                        f'CREATE INDEX IF NOT EXISTS "ix_{tabla}_{grupo.lower()}" ON "{tabla}" ("{grupo}", "{llave}")'
+                    )
+
+
+#---------------- FUNCIONES DE RECÁLCULO --------------------#
+def recalcular_dias(conexion, base, condicion):
+    """Vuelve a sumar desde las filas crudas los días que cumplen 'condicion' (sobre FECHA)."""
+    definicion = RESUMENES[base]
+    sumas = ", ".join(f'TOTAL("{c}")' for c in definicion["sumas"])
+    for grupos in definicion["niveles"]:
+        tabla = tabla_resumen(base, "dia", grupos)
+        columnas = ["FECHA"] + list(grupos)
+        conexion.execute(f'DELETE FROM "{tabla}" WHERE {condicion}')
+        conexion.execute(f"""
+            INSERT INTO "{tabla}" ({lista(columnas + ["MES"] + definicion["sumas"])})
+            SELECT {lista(columnas)}, {MES_SQL}, {sumas} FROM ({BASES[base]})
+            WHERE {condicion}
+            GROUP BY {lista(columnas)}
+        """)
+
+
+def recalcular_meses(conexion, base, condicion):
+    """Vuelve a sumar desde las tablas diarias los meses que cumplen 'condicion' (sobre MES)."""
+    definicion = RESUMENES[base]
+    sumas = ", ".join(f'TOTAL("{c}")' for c in definicion["sumas"])
+    for grupos in definicion["niveles"]:
+        tabla = tabla_resumen(base, "mes", grupos)
+        columnas = ["MES"] + list(grupos)
+        conexion.execute(f'DELETE FROM "{tabla}" WHERE {condicion}')
+        conexion.execute(f"""
+            INSERT INTO "{tabla}" ({lista(columnas + ["FECHA"] + definicion["sumas"])})
+            SELECT {lista(columnas)}, MES || '-01', {sumas} FROM "{tabla_resumen(base, "dia", grupos)}"
+            WHERE {condicion}
+            GROUP BY {lista(columnas)}
+        """)
+
+
+def reconstruir_resumenes(conexion):
+    """Recalcula todos los resúmenes desde cero (carga completa o migración)."""
+    # Primero la tabla de hechos: los resúmenes de ventas salen de ella
+    recalcular_ventas_unificadas(conexion, "true")
+    for base in RESUMENES:
+        recalcular_dias(conexion, base, "true")
+        recalcular_meses(conexion, base, "true")
+
+
+def actualizar_resumenes(conexion, incremental):
+    """
+    Deja ventas_unificadas y los resúmenes al día después de cargar_tablas
+    (dentro de su misma transacción). Carga completa: se reconstruyen.
+    Incremental: solo las fechas de temp.etl_fechas_tocadas y sus meses.
+    """
+    if not incremental:
+        reconstruir_resumenes(conexion)
+        return
+
+    for base, definicion in RESUMENES.items():
+        tablas = ", ".join("?" for _ in definicion["tablas"])
+        conexion.execute("DROP TABLE IF EXISTS temp.etl_resumen_fechas")
+        conexion.execute(
+            f"CREATE TEMP TABLE etl_resumen_fechas AS "
+            f"SELECT DISTINCT FECHA FROM temp.etl_fechas_tocadas WHERE TABLA IN ({tablas})",
+            definicion["tablas"],
+        )
+        # IN no encuentra los NULL: las filas sin fecha se recalculan aparte
+        hay_sin_fecha = conexion.execute(
+            "SELECT 1 FROM temp.etl_resumen_fechas WHERE FECHA IS NULL"
+        ).fetchone() is not None
+
+        if base == "ventas":
+            recalcular_ventas_unificadas(conexion, "FECHA IN (SELECT FECHA FROM temp.etl_resumen_fechas)")
+            if hay_sin_fecha:
+                recalcular_ventas_unificadas(conexion, "FECHA IS NULL")
+
+        recalcular_dias(conexion, base, "FECHA IN (SELECT FECHA FROM temp.etl_resumen_fechas)")
+        recalcular_meses(conexion, base, f"MES IN (SELECT {MES_SQL} FROM temp.etl_resumen_fechas)")
+        if hay_sin_fecha:
+            recalcular_dias(conexion, base, "FECHA IS NULL")
+            recalcular_meses(conexion, base, "MES IS NULL")
+    conexion.execute("DROP TABLE IF EXISTS temp.etl_resumen_fechas")
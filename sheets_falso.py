@@ -0,0 +1,349 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import requests
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name
+
+from generador_datos import generar_meses
+from pipeline_etl import ID_CARPETA_HISTORICOS, ID_HOJA
+
+# ==========================================================
+# GOOGLE SHEETS / DRIVE FALSOS (Pruebas y benchmarks sin credenciales)
+# ==========================================================
+# Reemplazo local del cliente de gspread y del servicio de Drive que usa el
+# pipeline: sirve planillas armadas con los datos de generador_datos.py con el
+# mismo formato que las reales:
+#   - una carpeta por año con un libro "CUADRE <MES> <AÑO>" por mes y una
+#     pestaña "CUADRE dd/mm/aa" por día (ventas, recargas de 10 lts y pagos pendientes),
+#   - el libro especial (ID_HOJA) con una pestaña "ADICIONAL+ RUTA" y una
+#     "GASTO" por mes.
+# Cada llamada tarda 'latencia' segundos y cuenta para una cuota por minuto:
+# si se pasa, responde 429 como Google (el LimitadorCuota la tiene que respetar).
+#
+#   cliente, drive = drive_sintetico(latencia=0.02, lecturas_por_minuto=600, anios=1)
+#   pipeline_etl.main(["--db", "prueba.db"], conectar_google=lambda: (cliente, drive))
+
+CARPETA = "application/vnd.google-apps.folder"
+PLANILLA = "application/vnd.google-apps.spreadsheet"
+PAGINA_DRIVE = 100          # Archivos por página de files().list
+MESES = ["ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO",
+         "AGOSTO", "SEPTIEMBRE", "OCTUBRE", "NOVIEMBRE", "DICIEMBRE"]
+DIAS_SEMANA = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+ANCHO_CUADRE = 15           # Columnas de una pestaña de cuadre (A..O)
+
+
+# ==========================================================
+# API FALSA (Latencia + cuota)
+# ==========================================================
+def error_cuota():
+    """Un APIError 429 igual al de gspread (con su respuesta HTTP)."""
+    respuesta = requests.Response()
+    respuesta.status_code = 429
+    respuesta._content = json.dumps({
+        "error": {"code": 429, "message": "Quota exceeded (API falsa)", "status": "RESOURCE_EXHAUSTED"}
+    }).encode()
+    return APIError(respuesta)
+
+
+class ApiFalsa:
+    """
+    Lo que comparten el cliente de Sheets y el de Drive:
+    - latencia: segundos que tarda cada llamada.
+    - lecturas_por_minuto: cuota de Sheets en una ventana de 60 s (None = sin cuota).
+    """
+    def __init__(self, latencia=0.0, lecturas_por_minuto=None):
+        self.latencia = latencia
+        self.cuota = lecturas_por_minuto
+        self._ventana = deque()
+        self._candado = threading.Lock()
+        self.llamadas = 0
+        self.rechazadas = 0
+
+    def llamar(self, cuenta_cuota=True):
+        with self._candado:
+            ahora = time.monotonic()
+            while self._ventana and ahora - self._ventana[0] >= 60:
+                self._ventana.popleft()
+            if cuenta_cuota and self.cuota and len(self._ventana) >= self.cuota:
+                self.rechazadas += 1
+                raise error_cuota()
+            if cuenta_cuota:
+                self._ventana.append(ahora)
+            self.llamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+
+#---------------- CLIENTE DE SHEETS (gspread) ---------------#
+def valores_api(datos):
+    """Como responde la API: sin celdas vacías al final de cada fila ni filas vacías al final."""
+    filas = []
+    for fila in datos:
+        fin = len(fila)
+        while fin and fila[fin - 1] == "":
+            fin -= 1
+        filas.append(fila[:fin])
+    while filas and not filas[-1]:
+        filas.pop()
+    return filas
+
+
+class HojaFalsa:
+    """Una pestaña (Worksheet): título, id y su grilla."""
+    def __init__(self, api, title, id, datos):
+        self.api = api
+        self.title = title
+        self.id = id
+        self.datos = datos
+        self.valores = valores_api(datos)
+
+    def get_all_values(self):
+        self.api.llamar()
+        return [list(fila) for fila in self.datos]
+
+    def editar(self, cambio):
+        """Aplica cambio(datos) sobre la grilla, como si alguien la editara a mano."""
+        cambio(self.datos)
+        self.valores = valores_api(self.datos)
+
+
+class LibroFalso:
+    """Un archivo de Sheets (Spreadsheet)."""
+    def __init__(self, api, id, hojas):
+        self.api = api
+        self.id = id
+        self.hojas = hojas
+        self._por_rango = {absolute_range_name(hoja.title): hoja for hoja in hojas}
+
+    def worksheets(self):
+        self.api.llamar()
+        return list(self.hojas)
+
+    def hoja(self, titulo):
+        return next(hoja for hoja in self.hojas if hoja.title == titulo)
+
+    def borrar_hoja(self, titulo):
+        self.hojas.remove(self.hoja(titulo))
+        del self._por_rango[absolute_range_name(titulo)]
+
+    def values_batch_get(self, rangos):
+        self.api.llamar()
+        rangos_valores = []
+        for rango in rangos:
+            hoja = self._por_rango[rango]
+            rango_valores = {"range": rango, "majorDimension": "ROWS"}
+            if hoja.valores:
+                rango_valores["values"] = hoja.valores
+            rangos_valores.append(rango_valores)
+        return {"spreadsheetId": self.id, "valueRanges": rangos_valores}
+
+
+class ClienteSheetsFalso:
+    """Lo que devuelve gspread.authorize(): solo se usa open_by_key."""
+    def __init__(self, api, libros):
+        self.api = api
+        self.libros = libros
+
+    def open_by_key(self, key):
+        self.api.llamar()
+        return self.libros[key]
+
+
+#---------------- SERVICIO DE DRIVE (files) -----------------#
+class PeticionFalsa:
+    def __init__(self, api, funcion):
+        self.api = api
+        self.funcion = funcion
+
+    def execute(self):
+        self.api.llamar(cuenta_cuota=False)     # Drive tiene su propia cuota (mucho más holgada)
+        return self.funcion()
+
+
+class DriveFalso:
+    """Lo que devuelve build("drive", "v3"): files().list(...) y files().get(...)."""
+    def __init__(self, api, archivos):
+        self.api = api
+        self.archivos = archivos    # [{id, name, mimeType, modifiedTime, parents}]
+
+    def files(self):
+        return self
+
+    def list(self, q, fields=None, pageToken=None, pageSize=PAGINA_DRIVE):
+        padre = re.search(r"'([^']+)' in parents", q).group(1)
+        tipo = re.search(r"mimeType = '([^']+)'", q).group(1)
+        encontrados = [a for a in self.archivos if padre in a["parents"] and a["mimeType"] == tipo]
+        desde = int(pageToken or 0)
+
+        def responder():
+            respuesta = {"files": [dict(a) for a in encontrados[desde:desde + pageSize]]}
+            if desde + pageSize < len(encontrados):
+                respuesta["nextPageToken"] = str(desde + pageSize)
+            return respuesta
+        return PeticionFalsa(self.api, responder)
+
+    def get(self, fileId, fields=None):
+        archivo = next(a for a in self.archivos if a["id"] == fileId)
+        return PeticionFalsa(self.api, lambda: dict(archivo))
+
+    def tocar(self, archivo_id):
+        """Cambia el modifiedTime del archivo (lo que hace Drive con cada edición)."""
+        archivo = next(a for a in self.archivos if a["id"] == archivo_id)
+        archivo["modifiedTime"] = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+    def borrar(self, archivo_id):
+        """El archivo deja de aparecer en los listados (borrado, en la papelera o movido)."""
+        self.archivos = [a for a in self.archivos if a["id"] != archivo_id]
+
+
+# ==========================================================
+# PLANILLAS CON EL FORMATO REAL
+# ==========================================================
+def peso(monto):
+    """2500.0 -> "$2.500" ; -500.0 -> "-$500" (como los muestra Sheets)."""
+    texto = f"${abs(monto):,.0f}".replace(",", ".")
+    return "-" + texto if monto < 0 else texto
+
+
+def numero(valor):
+    """Las cantidades en blanco (0 en los datos generados) quedan como celda vacía."""
+    return "" if valor == 0 else f"{valor:.0f}"
+
+
+def fecha_escrita(fecha, n):
+    """La fecha como la escriben a mano: casi siempre dd/mm/aaaa, a veces con el día en palabras."""
+    dia = time.strptime(fecha, "%Y-%m-%d")
+    if n % 10:
+        return time.strftime("%d/%m/%Y", dia)
+    return f"{DIAS_SEMANA[dia.tm_wday]}, {dia.tm_mday} de {MESES[dia.tm_mon - 1].lower()} de {dia.tm_year}"
+
+
+def fila_cuadre(**celdas):
+    """Una fila de ANCHO_CUADRE columnas con las celdas dadas por posición (c2=..., c8=...)."""
+    fila = [""] * ANCHO_CUADRE
+    for columna, valor in celdas.items():
+        fila[int(columna[1:])] = valor
+    return fila
+
+
+def grilla_cuadre(fecha, ventas, recargas, pendientes):
+    """La pestaña de un día: encabezado de dos filas, ventas, RECARGAS DE 10 LTS y PAGOS PENDIENTE."""
+    datos = [
+        fila_cuadre(c1="CUADRE DIARIO"),
+        fila_cuadre(c1="FECHA:", c2=time.strftime("%d/%m/%Y", time.strptime(fecha, "%Y-%m-%d"))),
+        fila_cuadre(), fila_cuadre(), fila_cuadre(),
+        # extraer_ventas une las filas 5 y 6 (ej. "FORMAS DE PAGO " + " " + "EFEC.")
+        fila_cuadre(c1="N°", c2="CLIENTES", c9="PRECIO", c10="TOTAL A", c11="FORMAS DE PAGO ", c14="PAGO"),
+        fila_cuadre(c8="CANT.", c9="UNIDAD", c10="PAGAR", c11="EFEC.", c12="TRF", c13="TARJ.", c14="PENDIENTE"),
+    ]
+    for n, v in enumerate(ventas.itertuples(index=False), start=1):
+        datos.append(fila_cuadre(
+            c1=str(n), c2=v.CLIENTE, c8=numero(v.CANTIDAD), c9=peso(v.PRECIO), c10=peso(v[4]),
+            c11=peso(v.EFECTIVO), c12=peso(v.TRANSFERENCIA), c13=peso(v.TARJETA), c14=peso(v.PENDIENTE),
+        ))
+    datos.append(fila_cuadre(c2="TOTAL", c10=peso(ventas["TOTAL-PAGAR"].sum())))
+    datos.append(fila_cuadre())
+
+    datos.append(fila_cuadre(c2="RECARGAS DE 10 LTS"))
+    datos.append(fila_cuadre(c2="CLIENTE", c3="PRODUCTO", c8="CANT.", c9="PRECIO", c10="TOTAL",
+                             c11="EFEC.", c12="TRF", c13="TARJ.", c14="PENDIENTE"))
+    for r in recargas.itertuples(index=False):
+        datos.append(fila_cuadre(
+            c2=r.CLIENTE, c3=r.PRODUCTOS, c8=numero(r.CANTIDAD), c9=peso(r.PRECIO), c10=peso(r[5]),
+            c11=peso(r.EFECTIVO), c12=peso(r.TRANSFERENCIA), c13=peso(r.TARJETA), c14=peso(r.PENDIENTE),
+        ))
+    datos.append(fila_cuadre(c2="TOTAL", c10=peso(recargas["TOTAL-PAGAR"].sum())))
+    datos.append(fila_cuadre())
+
+    datos.append(fila_cuadre(c2="PAGOS PENDIENTE"))
+    datos.append(fila_cuadre(c2="CLIENTE", c3="PRODUCTO", c8="FECHA DEUDA", c10="MONTO DEUDA",
+                             c11="EFECTIVO", c12="TRANSFERENCIA", c13="TARJETA", c14="SALDO"))
+    for p in pendientes.itertuples(index=False):
+        datos.append(fila_cuadre(
+            c2=p.CLIENTE, c3=p.PRODUCTOS, c8=p[3], c10=peso(p[4]),
+            c11=peso(p.EFECTIVO), c12=peso(p.TRANSFERENCIA), c13=peso(p.TARJETA), c14=peso(p.PENDIENTE),
+        ))
+    datos.append(fila_cuadre(c2="TOTAL", c10=peso(pendientes["DEUDA-MONTO"].sum())))
+    return datos
+
+
+def grilla_adicional_ruta(adicionales, ruta):
+    """Pestaña "ADICIONAL+ RUTA": REGISTRO DE PRODUCTO arriba y RUTA DE CLIENTE abajo."""
+    datos = [["", "REGISTRO DE PRODUCTO", "", "", "", "", "", "", ""],
+             ["", "FECHA", "CLIENTE", "PRODUCTO", "CANT.", "PRECIO", "MONTO", "", ""]]
+    for n, a in enumerate(adicionales.itertuples(index=False)):
+        datos.append(["", fecha_escrita(a.FECHA, n), a.CLIENTE, a.PRODUCTO, numero(a.CANTIDAD),
+                      peso(a.PRECIO), peso(a.MONTO), "", ""])
+    datos.append(["", "", "TOTAL", "", "", "", peso(adicionales["MONTO"].sum()), "", ""])
+    datos.append([""] * 9)
+    datos.append(["", "RUTA DE CLIENTE", "", "", "", "", "", "", ""])
+    datos.append(["", "FECHA", "DETALLE", "DIRECCION", "COMUNA", "CANTIDAD", "VALOR", "TOTAL", "EXTRA"])
+    for n, r in enumerate(ruta.itertuples(index=False)):
+        datos.append(["", fecha_escrita(r.FECHA, n), r.DETALLE, r.DIRECCION, r.COMUNA, numero(r.CANTIDAD),
+                      peso(r.VALOR), peso(r.TOTAL), peso(r.EXTRA)])
+    datos.append(["", "", "", "TOTAL", "", "", "", peso(ruta["TOTAL"].sum()), ""])
+    return datos
+
+
+def grilla_gastos(gastos):
+    """Pestaña "GASTO": un bloque por categoría (título, gastos y TOTAL). Un monto vacío queda en blanco."""
+    datos = [["", "GASTOS DEL MES", "", "", "", "", "", ""],
+             ["", "DESCRIPCION", "FECHA", "", "", "", "OBSERVACION", "MONTO"]]
+    for categoria, bloque in gastos.groupby("CATEGORIA", sort=False):
+        datos.append(["", categoria, "", "", "", "", "", ""])
+        for g in bloque.itertuples(index=False):
+            monto = "" if g.MONTO == 0 else peso(g.MONTO)
+            datos.append(["", g.DESCRIPCION, fecha_escrita(g.FECHA, 1), "", "", "", g.OBSERVACION, monto])
+        datos.append(["", f"TOTAL {categoria}", "", "", "", "", "", peso(bloque["MONTO"].sum())])
+    return datos
+
+
+# ==========================================================
+# DRIVE COMPLETO A PARTIR DEL GENERADOR
+# ==========================================================
+def drive_sintetico(latencia=0.0, lecturas_por_minuto=None, **opciones):
+    """
+    Arma el Drive y los libros con los datos de generador_datos.generar_meses(**opciones).
+    Devuelve (cliente de Sheets, servicio de Drive), listos para conectar_google.
+    """
+    api = ApiFalsa(latencia, lecturas_por_minuto)
+    archivos = [{"id": ID_HOJA, "name": "ADICIONALES Y GASTOS", "mimeType": PLANILLA,
+                 "modifiedTime": "2026-01-01T00:00:00.000Z", "parents": ["especiales"]}]
+    libros = {}
+    especiales = []
+    for mes, tablas in generar_meses(**opciones):
+        nombre_mes = f"{MESES[mes.month - 1]} {mes.year}"
+        carpeta = f"carpeta_{mes.year}"
+        if not any(a["id"] == carpeta for a in archivos):
+            archivos.append({"id": carpeta, "name": f"CUADRE DIARIO {mes.year}", "mimeType": CARPETA,
+                             "parents": [ID_CARPETA_HISTORICOS]})
+
+        hojas = []
+        por_dia = {tabla: dict(tuple(tablas[tabla].groupby("FECHA", sort=False)))
+                   for tabla in ["ventas_diarias", "recargas", "pendientes"]}
+        vacia = tablas["ventas_diarias"].iloc[:0]
+        for fecha in sorted(set().union(*(dias.keys() for dias in por_dia.values()))):
+            grilla = grilla_cuadre(
+                fecha,
+                por_dia["ventas_diarias"].get(fecha, vacia),
+                por_dia["recargas"].get(fecha, tablas["recargas"].iloc[:0]),
+                por_dia["pendientes"].get(fecha, tablas["pendientes"].iloc[:0]),
+            )
+            titulo = "CUADRE " + time.strftime("%d/%m/%y", time.strptime(fecha, "%Y-%m-%d"))
+            hojas.append(HojaFalsa(api, titulo, len(hojas) + 1, grilla))
+        archivo_id = f"cuadre_{mes.strftime('%Y_%m')}"
+        libros[archivo_id] = LibroFalso(api, archivo_id, hojas)
+        archivos.append({"id": archivo_id, "name": f"CUADRE {nombre_mes}", "mimeType": PLANILLA,
+                         "modifiedTime": f"{mes.end_time:%Y-%m-%dT23:59:59.000Z}", "parents": [carpeta]})
+
+        especiales.append(HojaFalsa(api, f"ADICIONAL+ RUTA {nombre_mes}", 2 * len(especiales) + 1,
+                                    grilla_adicional_ruta(tablas["adicionales"], tablas["ruta"])))
+        especiales.append(HojaFalsa(api, f"GASTO {nombre_mes}", 2 * len(especiales) + 1,
+                                    grilla_gastos(tablas["gastos"])))
+    libros[ID_HOJA] = LibroFalso(api, ID_HOJA, especiales)
+    return ClienteSheetsFalso(api, libros), DriveFalso(api, archivos)
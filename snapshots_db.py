@@ -0,0 +1,176 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from resumenes_db import BASES
+
+# ==========================================================
+# VERSIÓN DE LOS DATOS Y SNAPSHOTS ARROW (Arranque en frío)
+# ==========================================================
+# Cada vez que el ETL guarda datos, cambia el "sello" de etl_version_datos
+# (en la misma transacción). El dashboard usa ese sello como llave de su
+# caché: apenas termina una carga ve los datos nuevos, sin esperar un TTL.
+#
+# Las filas limpias de cada base (BASES), con tipos compactos (tipar), se
+# guardan además como Feather sin comprimir, con el sello en sus metadatos.
+# Al leerlas se mapean en memoria (memory_map): no hay que volver a consultar
+# SQLite después de reiniciar.
+#
+#   snapshots/db_portafolio/
+#   ├── ventas.feather
+#   └── ruta.feather ...
+
+CARPETA_SNAPSHOTS = "snapshots"
+FORMATO_SNAPSHOT = "2"      # Subirlo si cambia cómo se arman las columnas (invalida los snapshots viejos)
+
+
+#---------------- FUNCIONES DE VERSIÓN ----------------------#
+def crear_tabla_version(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS etl_version_datos (
+            VERSION INTEGER NOT NULL,
+            SELLO TEXT NOT NULL,
+            ACTUALIZADO TEXT NOT NULL
+        )
+    """)
+    if conexion.execute("SELECT 1 FROM etl_version_datos").fetchone() is None:
+        conexion.execute(
+            "INSERT INTO etl_version_datos VALUES (1, lower(hex(randomblob(8))), datetime('now'))"
+        )
+
+
+def nueva_version_datos(conexion):
+    """Cambia el sello (va dentro de la transacción de quien guarda los datos)."""
+    conexion.execute("""
+        UPDATE etl_version_datos
+        SET VERSION = VERSION + 1, SELLO = lower(hex(randomblob(8))), ACTUALIZADO = datetime('now')
+    """)
+    return version_datos(conexion)
+
+
+def version_datos(conexion):
+    """El sello de la última carga (None si la base todavía no tiene la tabla)."""
+    try:
+        fila = conexion.execute("SELECT SELLO FROM etl_version_datos").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return fila[0] if fila else None
+
+
+#---------------- FUNCIONES DE TIPOS COMPACTOS --------------#
+def numero_compacto(serie):
+    """El tipo numérico más chico que guarda exactamente los mismos valores."""
+    if serie.notna().all() and (serie % 1 == 0).all():
+        return pd.to_numeric(serie, downcast="integer")
+    chica = serie.astype("float32")
+    if np.array_equal(chica.to_numpy(dtype="float64"), serie.to_numpy(dtype="float64"), equal_nan=True):
+        return chica
+    return serie
+
+
+def tipar(df):
+    """
+    Columnas compactas para tenerlas en memoria: FECHA como datetime64, MES
+    como categoría ordenada (un código entero por mes), los textos repetidos
+    como categorías y los montos en el tipo numérico más chico que sirva.
+    """
+    for columna in df.columns:
+        if columna == "FECHA":
+            df[columna] = pd.to_datetime(df[columna], format="%Y-%m-%d", errors="coerce")
+        elif columna == "MES":
+            meses = sorted(df[columna].dropna().unique())
+            df[columna] = pd.Categorical(df[columna], categories=meses, ordered=True)
+        elif columna == "ORDEN":
+            continue
+        elif pd.api.types.is_numeric_dtype(df[columna]):
+            df[columna] = numero_compacto(df[columna])
+        else:
+            df[columna] = df[columna].astype("category")
+    return df
+
+
+def a_pantalla(df):
+    """
+    Deja un recorte con los tipos que muestra el dashboard: FECHA como date,
+    textos como str y montos como float64. Solo se usa con las filas a mostrar.
+    """
+    df = df.copy()
+    for columna in df.columns:
+        if columna == "FECHA":
+            df[columna] = df[columna].dt.date
+        elif isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype(df[columna].cat.categories.dtype)
+        elif columna != "ORDEN" and pd.api.types.is_numeric_dtype(df[columna]):
+            df[columna] = df[columna].astype("float64")
+    return df
+
+
+#---------------- FUNCIONES DE SNAPSHOTS --------------------#
+def carpeta_snapshots(ruta_db, carpeta=CARPETA_SNAPSHOTS):
+    """Una subcarpeta por base de datos: snapshots/<nombre del .db>/"""
+    nombre = os.path.splitext(os.path.basename(ruta_db))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_db)), carpeta, nombre)
+
+
+def leer_base_sql(conexion, base):
+    return tipar(pd.read_sql_query(f"SELECT * FROM ({BASES[base]}) ORDER BY ORDEN", conexion))
+
+
+def escribir_snapshot(carpeta, base, df, sello):
+    os.makedirs(carpeta, exist_ok=True)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    metadatos = {b"sello": sello.encode(), b"formato": FORMATO_SNAPSHOT.encode()}
+    tabla = tabla.replace_schema_metadata({**(tabla.schema.metadata or {}), **metadatos})
+    ruta = os.path.join(carpeta, f"{base}.feather")
+    temporal = ruta + ".tmp"
+    # Sin compresión: así se puede mapear en memoria al leer
+    feather.write_feather(tabla, temporal, compression="uncompressed")
+    os.replace(temporal, ruta)
+
+
+def leer_snapshot(carpeta, base, sello):
+    """El DataFrame guardado, o None si no existe o es de otra versión de los datos."""
+    ruta = os.path.join(carpeta, f"{base}.feather")
+    if sello is None or not os.path.exists(ruta):
+        return None
+    tabla = feather.read_table(ruta, memory_map=True)
+    metadatos = tabla.schema.metadata or {}
+    if metadatos.get(b"sello") != sello.encode() or metadatos.get(b"formato") != FORMATO_SNAPSHOT.encode():
+        return None
+    return tabla.to_pandas()
+
+
+def escribir_snapshots(ruta_db, carpeta=None):
+    """Lo llama el ETL después de guardar: deja listas las fotos de la versión nueva."""
+    carpeta = carpeta or carpeta_snapshots(ruta_db)
+    conexion = sqlite3.connect(ruta_db)
+    try:
+        sello = version_datos(conexion)
+        for base in BASES:
+            escribir_snapshot(carpeta, base, leer_base_sql(conexion, base), sello)
+    finally:
+        conexion.close()
+    return sello
+
+
+def cargar_base(conexion, ruta_db, base, sello):
+    """
+    Filas limpias de una base para la versión 'sello': del snapshot si está al
+    día; si no, desde SQLite (y se intenta dejar el snapshot para la próxima).
+    """
+    carpeta = carpeta_snapshots(ruta_db)
+    df = leer_snapshot(carpeta, base, sello)
+    if df is not None:
+        return df
+    df = leer_base_sql(conexion, base)
+    if sello is not None:
+        try:
+            escribir_snapshot(carpeta, base, df, sello)
+        except OSError as e:
+            # Sin permiso de escritura (ej. en la nube) se sigue igual, solo sin snapshot
+            print(f"⚠️ No se pudo guardar el snapshot de {base}: {e}")
+    return df
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto viven en la raíz del repositorio (igual que en benchmarks/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_datos import crear_base_sintetica
+
+
+@pytest.fixture(scope="session")
+def base_sintetica(tmp_path_factory):
+    """Una base chica de generador_datos.py (un año), con snapshots, compartida por las pruebas."""
+    ruta = tmp_path_factory.mktemp("sintetica") / "sintetica.db"
+    crear_base_sintetica(str(ruta), anios=1, clientes=60, comunas=6, semilla=3)
+    return str(ruta)
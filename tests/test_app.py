@@ -0,0 +1,119 @@
+import datetime
+import os
+import re
+
+import pytest
+
+import consultas
+from consultas import CASCADAS, Filtro
+
+# ==========================================================
+# EL DASHBOARD DE VERDAD (streamlit AppTest) CONTRA PANDAS
+# ==========================================================
+# Se corre app.py sin navegador sobre la base sintética, se mueven los
+# filtros de cada pestaña y se revisa que no falle, que el KPI del total y
+# el "Filas X a Y de N" del detalle sean los de filtrar las filas con pandas.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# {pestaña: (etiqueta en app.py, filtros en orden, KPI del total, columna que suma)}
+PESTANAS = {
+    "ventas": ("📊 Resumen de Ventas", ["📅 Desde:", "📅 Hasta:", "👤 Buscar Cliente:"],
+               "VENTAS TOTALES HISTORICOS", "TOTAL-PAGAR"),
+    "ruta": ("🎯 Análisis de Ruta",
+             ["📍 Filtrar por Comunas:", "👤 Direccion Clientes:", "📅 Seleccione Mes:", "📅 Seleccione Dia:"],
+             "VENTAS TOTALES HISTORICOS", "TOTAL"),
+    "adicionales": ("Adicionales", ["👤 Buscar Cliente:", "Filtrar Producto", "Selecciona Fecha"],
+                    "VENTAS TOTALES HISTORICOS", "MONTO"),
+    "gastos": ("Gastos de Empresa", ["📅 Seleccione Mes:", "Filtrar Categoria", "Selecciona Descripcion"],
+               "GASTOS TOTALES", "MONTO"),
+}
+
+# (pestaña, [(filtro, cambio)]): en un selectbox el cambio es la posición de
+# la opción (1 = la primera después de "Todos"); en una fecha, días a sumar
+ESCENARIOS = [
+    ("ventas", []),
+    ("ventas", [("👤 Buscar Cliente:", 1)]),
+    ("ventas", [("📅 Desde:", 30), ("📅 Hasta:", -200)]),
+    ("ventas", [("📅 Desde:", 300), ("👤 Buscar Cliente:", 2)]),
+    ("ventas", [("📅 Desde:", 400)]),      # Desde después de Hasta: sin filas
+    ("ruta", []),
+    ("ruta", [("📍 Filtrar por Comunas:", 1)]),
+    ("ruta", [("📍 Filtrar por Comunas:", 2), ("👤 Direccion Clientes:", 1)]),
+    ("ruta", [("📍 Filtrar por Comunas:", 1), ("📅 Seleccione Mes:", -1)]),
+    ("ruta", [("📅 Seleccione Mes:", 3), ("📅 Seleccione Dia:", 1)]),
+    ("adicionales", []),
+    ("adicionales", [("👤 Buscar Cliente:", 1)]),
+    ("adicionales", [("👤 Buscar Cliente:", 1), ("Filtrar Producto", 1)]),
+    ("adicionales", [("👤 Buscar Cliente:", 2), ("Selecciona Fecha", -1)]),
+    ("gastos", []),
+    ("gastos", [("📅 Seleccione Mes:", 1)]),
+    ("gastos", [("📅 Seleccione Mes:", 2), ("Filtrar Categoria", 1)]),
+    ("gastos", [("Filtrar Categoria", 2)]),
+    ("gastos", [("📅 Seleccione Mes:", 1), ("Filtrar Categoria", 1), ("Selecciona Descripcion", 1)]),
+]
+
+
+def formato_peso(numero):
+    return f"${numero:,.0f}".replace(",", ".")
+
+
+def widget(at, etiqueta):
+    for lista in (at.selectbox, at.date_input):
+        for encontrado in lista:
+            if encontrado.label == etiqueta:
+                return encontrado
+    raise LookupError(f"No se encontró el filtro '{etiqueta}'")
+
+
+def correr(at, pestana):
+    # AppTest no recuerda la pestaña abierta entre corridas: se vuelve a elegir antes de cada una
+    at.session_state["pestana"] = PESTANAS[pestana][0]
+    at.run()
+    assert not at.exception, at.exception[0].value
+
+
+def filtrar(pestana, df, seleccion):
+    """Las filas que tendría que mostrar la pestaña, filtradas con pandas (Filtro.filtrar)."""
+    if pestana == "ventas":
+        desde, hasta, cliente = seleccion
+        return Filtro().rango(desde, hasta).igual("CLIENTE", cliente).filtrar(df)
+    filtro = Filtro()
+    for (columna, tipo), valor in zip(CASCADAS[pestana], seleccion):
+        if tipo == "igual":
+            filtro.igual(columna, valor)
+        else:
+            getattr(filtro, tipo)(valor)
+    return filtro.filtrar(df)
+
+
+@pytest.fixture
+def app(base_sintetica, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("DASHBOARD_DB", base_sintetica)
+    return AppTest.from_file(APP, default_timeout=120)
+
+
+#---------------- PRUEBAS -----------------------------------#
+@pytest.mark.parametrize("pestana, cambios", ESCENARIOS)
+def test_filtros_del_dashboard(app, base_sintetica, pestana, cambios):
+    _, filtros, kpi, columna = PESTANAS[pestana]
+    correr(app, pestana)
+    for etiqueta, cambio in cambios:
+        elegido = widget(app, etiqueta)
+        if isinstance(elegido.value, datetime.date):
+            elegido.set_value(elegido.value + datetime.timedelta(days=cambio))
+        else:
+            elegido.set_value(elegido.options[cambio])
+        correr(app, pestana)
+
+    # Lo que quedó elegido (una cascada puede volver a "Todos" si la opción ya no está)
+    seleccion = tuple(widget(app, etiqueta).value for etiqueta in filtros)
+    esperadas = filtrar(pestana, consultas.filas(base_sintetica, pestana), seleccion)
+
+    assert next(m for m in app.metric if m.label == kpi).value == formato_peso(esperadas[columna].sum())
+    texto = next(c.value for c in app.caption if c.value.startswith("Filas "))
+    assert re.search(r"de ([\d.]+)$", texto).group(1) == formato_peso(len(esperadas))[1:]
+    if len(esperadas):
+        assert app.dataframe[-1].value.shape[0] == min(len(esperadas), consultas.FILAS_POR_PAGINA)
@@ -0,0 +1,111 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import esquema_db
+from esquema_db import MIGRACIONES, VERSION_ESQUEMA, migrar
+from generador_datos import generar_meses
+from resumenes_db import reconstruir_resumenes
+
+# ==========================================================
+# MIGRACIONES DE UNA BASE VIEJA
+# ==========================================================
+# Una base como la dejaba el ETL original (to_sql, sin llaves ni versión) se
+# lleva a la versión actual: los resúmenes y ventas_unificadas se arman UNA
+# sola vez y quedan igual que si se reconstruyeran desde cero.
+
+COLUMNAS_ORIGEN = ["ARCHIVO_ID", "PESTANA", "FILA"]
+
+
+def crear_base_vieja(ruta):
+    """Las seis tablas con to_sql, como en la versión 0 (fechas con hora, sin llave de origen)."""
+    meses = list(generar_meses(anios=1, clientes=40, comunas=5, filas_por_dia=4, desorden=0.05, semilla=5))
+    conexion = sqlite3.connect(ruta)
+    for tabla in meses[0][1]:
+        df = pd.concat([tablas[tabla] for _, tablas in meses], ignore_index=True)
+        df.drop(columns=COLUMNAS_ORIGEN).to_sql(tabla, conexion, index=False)
+    conexion.commit()
+    return conexion
+
+
+def contar_reconstrucciones(monkeypatch):
+    llamadas = []
+
+    def contando(conexion):
+        llamadas.append(1)
+        reconstruir_resumenes(conexion)
+    monkeypatch.setattr(esquema_db, "reconstruir_resumenes", contando)
+    return llamadas
+
+
+def tablas_derivadas(conexion):
+    nombres = [fila[0] for fila in conexion.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'resumen_%' ORDER BY name"
+    )]
+    return {
+        tabla: pd.read_sql_query(f'SELECT * FROM "{tabla}" ORDER BY 1, 2, 3', conexion)
+        for tabla in ["ventas_unificadas"] + nombres
+    }
+
+
+def comparar_con_reconstruccion(conexion):
+    """Lo que dejó la migración == reconstruir todo otra vez desde las tablas crudas."""
+    migradas = tablas_derivadas(conexion)
+    assert migradas["ventas_unificadas"].shape[0] > 0
+    with conexion:
+        reconstruir_resumenes(conexion)
+    for tabla, df in tablas_derivadas(conexion).items():
+        pd.testing.assert_frame_equal(migradas[tabla], df, obj=tabla)
+
+
+#---------------- PRUEBAS -----------------------------------#
+def test_base_vieja_reconstruye_una_vez(tmp_path, monkeypatch):
+    conexion = crear_base_vieja(tmp_path / "vieja.db")
+    llamadas = contar_reconstrucciones(monkeypatch)
+    try:
+        assert migrar(conexion) == VERSION_ESQUEMA
+        assert len(llamadas) == 1
+        comparar_con_reconstruccion(conexion)
+    finally:
+        conexion.close()
+
+
+def test_base_a_medio_migrar_reconstruye_una_vez(tmp_path, monkeypatch):
+    # Una base que quedó en la versión 4 (con resúmenes pero sin ventas_unificadas)
+    conexion = crear_base_vieja(tmp_path / "v4.db")
+    try:
+        with conexion:
+            for migracion in MIGRACIONES[:4]:
+                migracion(conexion)
+            conexion.execute("PRAGMA user_version = 4")
+        # ventas_unificadas es de la versión 5: la 3 no la crea
+        assert esquema_db.existe_tabla(conexion, "resumen_ventas_dia")
+        assert not esquema_db.existe_tabla(conexion, "ventas_unificadas")
+        llamadas = contar_reconstrucciones(monkeypatch)
+        assert migrar(conexion) == VERSION_ESQUEMA
+        assert len(llamadas) == 1
+        comparar_con_reconstruccion(conexion)
+    finally:
+        conexion.close()
+
+
+def test_base_al_dia_no_reconstruye(tmp_path, monkeypatch):
+    conexion = sqlite3.connect(tmp_path / "nueva.db")
+    try:
+        migrar(conexion)
+        llamadas = contar_reconstrucciones(monkeypatch)
+        assert migrar(conexion) == VERSION_ESQUEMA
+        assert llamadas == []
+    finally:
+        conexion.close()
+
+
+@pytest.mark.parametrize("tabla", ["ventas_unificadas", "resumen_ventas_dia", "etl_cuarentena"])
+def test_base_nueva_tiene_las_tablas(tmp_path, tabla):
+    conexion = sqlite3.connect(tmp_path / "nueva.db")
+    try:
+        migrar(conexion)
+        assert esquema_db.existe_tabla(conexion, tabla)
+    finally:
+        conexion.close()
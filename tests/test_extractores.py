@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+from cache_grillas import PestanaCache
+from metricas_etl import MetricasCorrida
+from pipeline_etl import construir_tabla, limpiar_fecha_sql, procesar_cuadre, procesar_especial
+
+# ==========================================================
+# CORPUS DORADO DE LOS EXTRACTORES
+# ==========================================================
+# golden/extractores.json trae grillas chicas con los casos difíciles (secciones
+# vacías, "PAGOS PENDIENTE" sin columna de deuda, columnas movidas, fechas y
+# montos escritos de varias formas, categorías de gastos...) y lo que sacaban
+# de ellas los extractores originales, que limpiaban celda a celda:
+#   - "tablas": {tabla: registros ya limpios}
+#   - "error": nombre de la excepción, si el extractor original fallaba.
+# Se compara contra el camino actual: índice de secciones + construir_tabla.
+
+RUTA_CORPUS = os.path.join(os.path.dirname(__file__), "golden", "extractores.json")
+
+with open(RUTA_CORPUS, encoding="utf-8") as f:
+    CASOS = json.load(f)
+
+
+def extraer(caso):
+    hoja = PestanaCache(caso["titulo"], 1)
+    metricas = MetricasCorrida("completa", "offline")
+    if caso["tipo"] == "cuadre":
+        fecha_db = limpiar_fecha_sql(caso["titulo"].split()[-1])
+        return procesar_cuadre(hoja, caso["grilla"], fecha_db, metricas)
+    return procesar_especial(caso["grilla"], caso["titulo"].upper(), metricas)
+
+
+@pytest.mark.parametrize("caso", CASOS, ids=[caso["nombre"] for caso in CASOS])
+def test_corpus_dorado(caso):
+    esperado = caso["esperado"]
+    if "error" in esperado:
+        with pytest.raises(Exception) as error:
+            extraer(caso)
+        assert type(error.value).__name__ == esperado["error"]
+        return
+
+    registros = extraer(caso)
+    tablas = {tabla: construir_tabla(tabla, filas).to_dict("records") for tabla, filas in registros.items()}
+    assert tablas == esperado["tablas"]
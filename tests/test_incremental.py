@@ -0,0 +1,159 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import pipeline_etl
+from pipeline_etl import ID_HOJA, TABLAS
+from sheets_falso import drive_sintetico
+
+# ==========================================================
+# CARGA INCREMENTAL == CARGA COMPLETA
+# ==========================================================
+# Con el Drive falso (sheets_falso.py): se hace una carga completa, se editan
+# las planillas (celdas, filas, pestañas, gastos y adicionales), se corre una
+# carga incremental sobre esa base y una completa en una base nueva. Las dos
+# tienen que quedar iguales: tablas, ventas_unificadas, resúmenes y cuarentena.
+
+# Columnas que dependen del orden de inserción (no de los datos)
+COLUMNAS_VOLATILES = {"ID", "ORDEN", "REGISTRADO"}
+
+
+def correr_etl(carpeta, nombre_db, cliente, drive, *extras):
+    argumentos = [
+        "--db", str(carpeta / nombre_db),
+        "--carpeta-cache", str(carpeta / f"cache_{nombre_db}"),
+        "--carpeta-reportes", str(carpeta / "reportes"),
+        "--trabajadores", "2",
+        "--lecturas-por-minuto", "100000",   # El Drive falso no tiene cuota: sin esperas
+        *extras,
+    ]
+    pipeline_etl.main(argumentos, conectar_google=lambda: (cliente, drive))
+    return carpeta / nombre_db
+
+
+def tablas_comparables(conexion):
+    nombres = [fila[0] for fila in conexion.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'resumen_%' ORDER BY name"
+    )]
+    return TABLAS + ["ventas_unificadas", "etl_cuarentena"] + nombres
+
+
+def leer_ordenada(conexion, tabla):
+    df = pd.read_sql_query(f'SELECT * FROM "{tabla}"', conexion)
+    df = df.drop(columns=[c for c in df.columns if c in COLUMNAS_VOLATILES])
+    return df.sort_values(list(df.columns), na_position="first").reset_index(drop=True)
+
+
+def comparar_bases(ruta_a, ruta_b):
+    a, b = sqlite3.connect(ruta_a), sqlite3.connect(ruta_b)
+    try:
+        assert tablas_comparables(a) == tablas_comparables(b)
+        for tabla in tablas_comparables(a):
+            pd.testing.assert_frame_equal(leer_ordenada(a, tabla), leer_ordenada(b, tabla), obj=tabla)
+    finally:
+        a.close()
+        b.close()
+
+
+def contar(ruta, sql):
+    conexion = sqlite3.connect(ruta)
+    try:
+        return conexion.execute(sql).fetchone()[0]
+    finally:
+        conexion.close()
+
+
+#---------------- EDICIONES DE LAS PLANILLAS ----------------#
+def libros_cuadre(cliente):
+    return [libro for archivo_id, libro in cliente.libros.items() if archivo_id != ID_HOJA]
+
+
+def editar(cliente, drive, archivo_id, titulo, cambio):
+    cliente.libros[archivo_id].hoja(titulo).editar(cambio)
+    drive.tocar(archivo_id)
+
+
+def fila_con_monto(datos, columna):
+    """Primera fila con un monto ("$...") en la columna pedida."""
+    return next(fila for fila in datos if len(fila) > columna and fila[columna].startswith("$"))
+
+
+def editar_planillas(cliente, drive):
+    primero, segundo, tercero = libros_cuadre(cliente)[:3]
+
+    # Una celda: la cantidad y el total del primer cliente del día
+    def cambiar_celda(datos):
+        datos[7][8] = "40"
+        datos[7][10] = "$99.000"
+    editar(cliente, drive, primero.id, primero.hojas[0].title, cambiar_celda)
+
+    # Una fila borrada: las de abajo suben (cambia su FILA)
+    editar(cliente, drive, segundo.id, segundo.hojas[1].title, lambda datos: datos.pop(7))
+
+    # Una pestaña borrada completa
+    tercero.borrar_hoja(tercero.hojas[2].title)
+    drive.tocar(tercero.id)
+
+    # Hoja especial: un gasto y un adicional
+    especial = cliente.libros[ID_HOJA]
+    gasto = next(h for h in especial.hojas if "GASTO" in h.title)
+    adicional = next(h for h in especial.hojas if "ADICIONAL" in h.title)
+
+    def cambiar_gasto(datos):
+        fila_con_monto(datos, 7)[7] = "$1.234.567"
+    gasto.editar(cambiar_gasto)
+
+    def cambiar_adicional(datos):
+        datos[2][6] = "$77.700"
+        datos.pop(3)
+    adicional.editar(cambiar_adicional)
+    drive.tocar(ID_HOJA)
+
+
+#---------------- PRUEBAS -----------------------------------#
+@pytest.fixture
+def drive():
+    return drive_sintetico(anios=1, filas_por_dia=4, semilla=11)
+
+
+def test_incremental_igual_a_completa(tmp_path, drive):
+    cliente, servicio = drive
+    incremental = correr_etl(tmp_path, "incremental.db", cliente, servicio)
+    ventas_antes = contar(incremental, "SELECT COUNT(*) FROM ventas_diarias")
+
+    editar_planillas(cliente, servicio)
+    correr_etl(tmp_path, "incremental.db", cliente, servicio, "--incremental")
+    completa = correr_etl(tmp_path, "completa.db", cliente, servicio)
+
+    # Las ediciones sí cambiaron algo (la prueba no compara dos bases intactas)
+    assert contar(completa, "SELECT COUNT(*) FROM ventas_diarias") < ventas_antes
+    assert contar(completa, "SELECT COUNT(*) FROM gastos WHERE MONTO = 1234567") == 1
+    comparar_bases(incremental, completa)
+
+
+def test_incremental_sin_cambios_deja_todo_igual(tmp_path, drive):
+    cliente, servicio = drive
+    ruta = correr_etl(tmp_path, "base.db", cliente, servicio)
+    antes = contar(ruta, "SELECT COUNT(*) FROM etl_checkpoints_pestanas")
+
+    correr_etl(tmp_path, "base.db", cliente, servicio, "--incremental")
+    completa = correr_etl(tmp_path, "completa.db", cliente, servicio)
+
+    assert contar(ruta, "SELECT COUNT(*) FROM etl_checkpoints_pestanas") == antes
+    comparar_bases(ruta, completa)
+
+
+def test_incremental_borra_archivos_que_ya_no_estan(tmp_path, drive):
+    cliente, servicio = drive
+    ruta = correr_etl(tmp_path, "incremental.db", cliente, servicio)
+    borrado = libros_cuadre(cliente)[0].id
+
+    # El libro se borra (o se mueve fuera de la carpeta): ya no aparece al listar
+    servicio.borrar(borrado)
+    correr_etl(tmp_path, "incremental.db", cliente, servicio, "--incremental")
+    completa = correr_etl(tmp_path, "completa.db", cliente, servicio)
+
+    for tabla in ["ventas_diarias", "etl_checkpoints_archivos", "etl_checkpoints_pestanas"]:
+        assert contar(ruta, f"SELECT COUNT(*) FROM {tabla} WHERE ARCHIVO_ID = '{borrado}'") == 0
+    comparar_bases(ruta, completa)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import consultas
+from consultas import CASCADAS, TODOS, Filtro, opciones
+from indice_cascada import IndiceCascada
+
+# ==========================================================
+# ÍNDICE DE CASCADA == FILTRAR CON PANDAS
+# ==========================================================
+# Se recorren cascadas al azar (cada nivel: "Todos", una opción que existe o
+# una que no) y en cada paso las opciones y las filas del índice tienen que
+# ser las mismas que da filtrar la tabla con Filtro + consultas.opciones,
+# que es lo que hacía el dashboard antes del índice.
+
+CASCADAS_POR_PRUEBA = 50
+# Cómo se pueden pedir las opciones de cada tipo de nivel (la última es la que se elige).
+# Un nivel "dia" siempre muestra las fechas vacías como "NaT" (lo que elige Filtro.dia).
+VACIOS = {"igual": [None, "None"], "mes": [None, "None"], "dia": ["NaT"]}
+NO_EXISTE = {"igual": "NO EXISTE", "mes": "1999-01", "dia": "1999-01-01"}
+
+
+def con_vacias(df, niveles, azar):
+    """Copia con ~5% de celdas vacías en cada nivel (la base sintética no trae)."""
+    df = df.copy()
+    for columna, _ in niveles:
+        df.loc[azar.random(len(df)) < 0.05, columna] = None
+    if "FECHA" in df.columns:
+        df.loc[df["FECHA"].isna(), "MES"] = None    # MES sale de FECHA
+    return df
+
+
+def filtro_de(niveles, valores):
+    filtro = Filtro()
+    for (columna, tipo), valor in zip(niveles, valores):
+        if tipo == "igual":
+            filtro.igual(columna, valor)
+        else:
+            getattr(filtro, tipo)(valor)
+    return filtro
+
+
+def comparar_paso(indice, df, niveles, valores):
+    """Opciones del nivel siguiente a 'valores' (con y sin vacías). Devuelve las del índice."""
+    columna, tipo = niveles[len(valores)]
+    filtro = filtro_de(niveles, valores)
+    for vacio in VACIOS[tipo]:
+        assert [TODOS] + indice.opciones(valores, vacio) == opciones(df, columna, filtro, vacio)
+    return indice.opciones(valores, VACIOS[tipo][-1])
+
+
+def elegir(azar, tipo, disponibles):
+    sorteo = azar.random()
+    if sorteo < 0.25 or not disponibles:
+        return None
+    if sorteo < 0.30:
+        return NO_EXISTE[tipo]
+    return disponibles[azar.integers(len(disponibles))]
+
+
+def recorrer_cascadas(indice, df, niveles, semilla):
+    azar = np.random.default_rng(semilla)
+    for _ in range(CASCADAS_POR_PRUEBA):
+        valores = []
+        for _, tipo in niveles:
+            disponibles = [valor for valor in comparar_paso(indice, df, niveles, valores) if valor != "None"]
+            valores.append(elegir(azar, tipo, disponibles))
+        # Las filas con todo lo elegido (y con los últimos niveles en "Todos")
+        for hasta in range(len(valores) + 1):
+            elegido = valores[:hasta] + [None] * (len(valores) - hasta)
+            esperadas = df.index.get_indexer(filtro_de(niveles, elegido).filtrar(df).index)
+            np.testing.assert_array_equal(indice.posiciones(elegido), esperadas)
+        pd.testing.assert_frame_equal(indice.filas(valores), filtro_de(niveles, valores).filtrar(df))
+
+
+#---------------- PRUEBAS -----------------------------------#
+@pytest.mark.parametrize("semilla", range(4))
+@pytest.mark.parametrize("base", list(CASCADAS))
+def test_cascada_igual_a_pandas(base_sintetica, base, semilla):
+    # El mismo índice que arma el dashboard (desde los snapshots de la base)
+    indice = consultas.cascada(base_sintetica, base)
+    recorrer_cascadas(indice, indice.df, CASCADAS[base], semilla)
+
+
+@pytest.mark.parametrize("semilla", range(4))
+@pytest.mark.parametrize("base", list(CASCADAS))
+def test_cascada_con_celdas_vacias(base_sintetica, base, semilla):
+    niveles = CASCADAS[base]
+    df = con_vacias(consultas.filas(base_sintetica, base), niveles, np.random.default_rng(semilla))
+    recorrer_cascadas(IndiceCascada(df, niveles), df, niveles, semilla)
+
+
+def test_cascada_tabla_vacia(base_sintetica):
+    df = consultas.filas(base_sintetica, "ruta").iloc[:0]
+    indice = IndiceCascada(df, CASCADAS["ruta"])
+    assert indice.opciones([]) == []
+    assert indice.filas([None, None, None, None]).empty
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import consultas
+from indice_fechas import IndiceFechas
+from resumenes_db import RESUMENES
+
+# ==========================================================
+# ÍNDICE POR FECHA == MÁSCARA DE PANDAS
+# ==========================================================
+# Rangos al azar (con y sin cliente, al revés, fuera de los datos...): las
+# sumas, la cantidad y las posiciones de IndiceFechas tienen que ser las
+# mismas que da filtrar las ventas con una máscara sobre FECHA y CLIENTE.
+
+RANGOS_POR_PRUEBA = 200
+SUMAS = RESUMENES["ventas"]["sumas"]
+
+
+def con_vacias(df, azar):
+    """Copia con ~5% de fechas y clientes vacíos, y montos con decimales."""
+    df = df.copy()
+    df.loc[azar.random(len(df)) < 0.05, "FECHA"] = pd.NaT
+    df.loc[azar.random(len(df)) < 0.05, "CLIENTE"] = None
+    df["TOTAL-PAGAR"] = df["TOTAL-PAGAR"] * 1.1
+    return df
+
+
+def rango_al_azar(azar, minima, maxima):
+    dias = (maxima - minima).days
+    inicio, fin = (minima + pd.Timedelta(days=int(d)) for d in azar.integers(-10, dias + 10, size=2))
+    if azar.random() < 0.8:
+        inicio, fin = min(inicio, fin), max(inicio, fin)    # El resto queda al revés (rango vacío)
+    return inicio.date(), fin.date()
+
+
+def comparar_rangos(indice, df, semilla):
+    azar = np.random.default_rng(semilla)
+    fechas = df["FECHA"].dropna()
+    clientes = df["CLIENTE"].dropna().unique().tolist()
+    for _ in range(RANGOS_POR_PRUEBA):
+        inicio, fin = rango_al_azar(azar, fechas.min(), fechas.max())
+        sorteo = azar.random()
+        cliente = None if sorteo < 0.4 else "NO EXISTE" if sorteo < 0.45 else clientes[azar.integers(len(clientes))]
+
+        mascara = df["FECHA"].between(pd.Timestamp(inicio), pd.Timestamp(fin))
+        if cliente is not None:
+            mascara &= df["CLIENTE"] == cliente
+        np.testing.assert_array_equal(indice.posiciones(inicio, fin, cliente), np.flatnonzero(mascara))
+        assert indice.cantidad(inicio, fin, cliente) == mascara.sum()
+        for columna in SUMAS:
+            esperado = df.loc[mascara, columna].sum()
+            assert indice.total(columna, inicio, fin, cliente) == pytest.approx(esperado, rel=1e-9, abs=1e-6)
+
+
+#---------------- PRUEBAS -----------------------------------#
+@pytest.mark.parametrize("semilla", range(3))
+def test_rangos_igual_a_mascara(base_sintetica, semilla):
+    # El mismo índice que arma el dashboard (desde los snapshots de la base)
+    indice = consultas.fechas_ventas(base_sintetica)
+    comparar_rangos(indice, indice.df, semilla)
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_rangos_con_celdas_vacias(base_sintetica, semilla):
+    df = con_vacias(consultas.filas(base_sintetica, "ventas"), np.random.default_rng(semilla))
+    comparar_rangos(IndiceFechas(df, SUMAS, "CLIENTE"), df, semilla)
+
+
+def test_sumas_enteras_son_exactas(base_sintetica):
+    indice = consultas.fechas_ventas(base_sintetica)
+    inicio, fin = indice.extremos()
+    total = indice.total("TOTAL-PAGAR", inicio, fin)
+    assert isinstance(total, int)
+    assert total == int(indice.df["TOTAL-PAGAR"].sum())
+
+
+def test_extremos(base_sintetica):
+    df = consultas.filas(base_sintetica, "ventas")
+    assert IndiceFechas(df, SUMAS, "CLIENTE").extremos() == (df["FECHA"].min().date(), df["FECHA"].max().date())
+    assert IndiceFechas(df.iloc[:0], SUMAS, "CLIENTE").extremos() == (None, None)
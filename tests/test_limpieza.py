@@ -0,0 +1,93 @@
+import random
+
+import pandas as pd
+import pytest
+
+from pipeline_etl import (
+    COLUMNAS_FECHA,
+    COLUMNAS_MONEDA,
+    FILTROS_TABLA,
+    TABLAS,
+    construir_tabla,
+    limpiar_fecha_sql,
+    limpiar_fechas_serie,
+    limpiar_moneda,
+    limpiar_moneda_serie,
+)
+
+# ==========================================================
+# LIMPIEZA EN BLOQUE == LIMPIEZA CELDA A CELDA
+# ==========================================================
+# construir_tabla limpia columnas completas (cada texto distinto una sola vez
+# y las fechas memorizadas). Tiene que dar exactamente lo mismo que pasar
+# cada celda por limpiar_moneda / limpiar_fecha_sql como se hacía antes.
+
+# Textos como los que escriben en las planillas (y algunos que no deberían)
+MONTOS_RAROS = [
+    "", " ", "0", "$0", "$2.500", "$ 2.500", "2500", "2.500", "$1.234.567", "-$500", "$-500",
+    "1,5", "$ 12.000 ", "abc", "$", "-", "nan", "None", "1e3", "$45.990", "  7  ", "１２",
+]
+FECHAS_RARAS = [
+    "", " ", "nan", "NaT", "01/10/2023", "1/1/23", "14/05", "31/12/2023 ", "2023-11-17",
+    "2023-11-17 00:00:00", "viernes, 1 de septiembre de 2023", "Sábado, 30 de diciembre del 2023",
+    "miércoles 3 de mayo", "marzo 2024", "17-11-2023", "ayer", "1/2/3/4", "  7/10/23",
+]
+TEXTOS = ["", "Producto 1", "Calle 12", "TOTAL", "ruta norte"]
+
+
+def limpiar_celda_a_celda(tabla, registros):
+    """La limpieza original: una llamada por celda y sin la memoria de fechas."""
+    limpiar_fecha = limpiar_fecha_sql.__wrapped__
+    limpios = []
+    for registro in registros:
+        fila = dict(registro)
+        for columna in COLUMNAS_FECHA.get(tabla, []):
+            fila[columna] = limpiar_fecha(fila[columna])
+        for columna in COLUMNAS_MONEDA.get(tabla, []):
+            fila[columna] = limpiar_moneda(fila[columna])
+        limpios.append(fila)
+    df = pd.DataFrame(limpios)
+    filtro = FILTROS_TABLA.get(tabla)
+    if filtro is not None:
+        df = df[filtro(df)].reset_index(drop=True)
+    return df.fillna(0)
+
+
+def registros_al_azar(tabla, filas, semilla):
+    azar = random.Random(semilla)
+    registros = []
+    for _ in range(filas):
+        registro = {"CLIENTE": azar.choice(TEXTOS), "PRODUCTO": azar.choice(TEXTOS), "DIRECCION": azar.choice(TEXTOS)}
+        for columna in COLUMNAS_FECHA.get(tabla, []):
+            registro[columna] = azar.choice(FECHAS_RARAS)
+        for columna in COLUMNAS_MONEDA.get(tabla, []):
+            registro[columna] = azar.choice(MONTOS_RAROS)
+        registros.append(registro)
+    return registros
+
+
+#---------------- PRUEBAS -----------------------------------#
+def test_moneda_serie_igual_a_celda():
+    serie = pd.Series(MONTOS_RAROS * 3, index=range(100, 100 + 3 * len(MONTOS_RAROS)))
+    esperado = pd.Series([limpiar_moneda(v) for v in serie], index=serie.index)
+    pd.testing.assert_series_equal(limpiar_moneda_serie(serie), esperado)
+
+
+def test_fechas_serie_igual_a_celda():
+    serie = pd.Series(FECHAS_RARAS * 3)
+    esperado = pd.Series([limpiar_fecha_sql.__wrapped__(v) for v in serie])
+    limpiar_fecha_sql.cache_clear()
+    pd.testing.assert_series_equal(limpiar_fechas_serie(serie), esperado)
+    # Segunda pasada: ahora todo sale de la memoria y tiene que dar lo mismo
+    pd.testing.assert_series_equal(limpiar_fechas_serie(serie), esperado)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+@pytest.mark.parametrize("tabla", TABLAS)
+def test_construir_tabla_igual_a_celda_a_celda(tabla, semilla):
+    registros = registros_al_azar(tabla, 500, semilla)
+    pd.testing.assert_frame_equal(construir_tabla(tabla, registros), limpiar_celda_a_celda(tabla, registros))
+
+
+def test_construir_tabla_vacia():
+    assert construir_tabla("ruta", []).empty
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import consultas
+from consultas import CASCADAS, DETALLES, FILAS_POR_PAGINA, TODOS, Filtro, detalle, pagina_detalle
+
+# ==========================================================
+# DETALLE PAGINADO == DETALLE COMPLETO ORDENADO CON PANDAS
+# ==========================================================
+# Con filtros, columna de orden y sentido al azar: todas las páginas de
+# pagina_detalle, una detrás de otra, tienen que ser el detalle completo
+# filtrado con Filtro y ordenado con pandas (estable, vacías al final), y el
+# total tiene que ser la cantidad de filas filtradas.
+
+ESCENARIOS_POR_BASE = 25
+
+
+def seleccion_al_azar(azar, base, df):
+    """Lo elegido en los filtros de la pestaña, tomando los valores de una fila al azar."""
+    fila = df.iloc[azar.integers(len(df))]
+    if base == "ventas":
+        desde = fila["FECHA"] - pd.Timedelta(days=int(azar.integers(0, 90)))
+        hasta = fila["FECHA"] + pd.Timedelta(days=int(azar.integers(0, 90)))
+        return desde.date(), hasta.date(), TODOS if azar.random() < 0.5 else fila["CLIENTE"]
+    valores = []
+    for columna, tipo in CASCADAS[base]:
+        valor = fila[columna].strftime("%Y-%m-%d") if tipo == "dia" else fila[columna]
+        valores.append(TODOS if azar.random() < 0.4 else valor)
+    return tuple(valores)
+
+
+def filtrar(base, df, seleccion):
+    if base == "ventas":
+        desde, hasta, cliente = seleccion
+        return Filtro().rango(desde, hasta).igual("CLIENTE", cliente).filtrar(df)
+    filtro = Filtro()
+    for (columna, tipo), valor in zip(CASCADAS[base], seleccion):
+        if tipo == "igual":
+            filtro.igual(columna, valor)
+        else:
+            getattr(filtro, tipo)(valor)
+    return filtro.filtrar(df)
+
+
+def ordenar(df, orden, descendente):
+    if orden is None:
+        return df.iloc[::-1] if descendente else df
+    return df.sort_values(orden, ascending=not descendente, kind="stable", na_position="last")
+
+
+#---------------- PRUEBAS -----------------------------------#
+@pytest.mark.parametrize("base", list(DETALLES))
+def test_paginas_igual_a_detalle_ordenado(base_sintetica, base):
+    df = consultas.filas(base_sintetica, base)
+    azar = np.random.default_rng(len(base))
+    for _ in range(ESCENARIOS_POR_BASE):
+        seleccion = seleccion_al_azar(azar, base, df)
+        orden = None if azar.random() < 0.3 else DETALLES[base][azar.integers(len(DETALLES[base]))]
+        descendente = bool(azar.random() < 0.5)
+        esperado = detalle(ordenar(filtrar(base, df, seleccion), orden, descendente), DETALLES[base])
+
+        paginas = max(1, -(-len(esperado) // FILAS_POR_PAGINA))
+        trozos = []
+        for pagina in range(1, paginas + 1):
+            trozo, total = pagina_detalle(base_sintetica, base, seleccion, orden, descendente, pagina)
+            assert total == len(esperado)
+            assert len(trozo) == min(FILAS_POR_PAGINA, len(esperado) - (pagina - 1) * FILAS_POR_PAGINA)
+            trozos.append(trozo)
+        pd.testing.assert_frame_equal(pd.concat(trozos, ignore_index=True), esperado, obj=f"{base} {seleccion}")
+
+        # Después de la última página no hay filas (y la página 0 es la primera)
+        assert pagina_detalle(base_sintetica, base, seleccion, orden, descendente, paginas + 1)[0].empty
+        pd.testing.assert_frame_equal(
+            pagina_detalle(base_sintetica, base, seleccion, orden, descendente, 0)[0], trozos[0]
+        )
+
+
+def test_pagina_sin_filas(base_sintetica):
+    trozo, total = pagina_detalle(base_sintetica, "ruta", ("NO EXISTE", TODOS, TODOS, TODOS), "TOTAL", True, 1)
+    assert total == 0
+    assert trozo.empty
+    assert list(trozo.columns) == DETALLES["ruta"]
@@ -0,0 +1,167 @@
+import pandas as pd
+
+from resumenes_db import COLUMNAS_VENTA
+
+# ==========================================================
+# VALIDACIÓN DEL ETL (Reglas de negocio + cuarentena)
+# ==========================================================
+# La limpieza que antes hacía el dashboard en cada carga (cargar_datos) se
+# hace una sola vez, antes de guardar:
+#   - ventas_diarias sin CANTIDAD positiva y gastos sin MONTO positivo se
+#     RECHAZAN (no se guardan).
+#   - Los montos negativos de ventas_diarias y recargas se CORRIGEN a su valor
+#     absoluto.
+#   - COMUNA (mayúsculas) y DIRECCION (sin espacios de más) se CORRIGEN en ruta.
+# Cada fila rechazada o corregida queda anotada en la tabla etl_cuarentena con
+# un código de motivo y los datos tal como venían de la hoja.
+#
+# Las mismas reglas se aplican en pandas (validar_tablas, en el ETL) y en SQL
+# (sanear_tablas_sql, para llevar una base vieja al mismo estado).
+
+RECHAZADA = "RECHAZADA"
+CORREGIDA = "CORREGIDA"
+LLAVE_ORIGEN = ["ARCHIVO_ID", "PESTANA", "FILA"]
+
+# {tabla: [(columna que debe ser > 0, motivo)]}. Vacía, cero o negativa = rechazo.
+POSITIVOS = {
+    "ventas_diarias": [("CANTIDAD", "CANTIDAD_NO_POSITIVA")],
+    "gastos": [("MONTO", "MONTO_NO_POSITIVO")],
+}
+# Columnas de dinero que a veces se anotan en negativo: se guardan en valor absoluto
+MONTOS_ABSOLUTOS = {"ventas_diarias": COLUMNAS_VENTA, "recargas": COLUMNAS_VENTA}
+MOTIVO_NEGATIVO = "MONTO_NEGATIVO"
+
+
+#---------------- FUNCIONES DE TEXTO (ruta) -----------------#
+def limpiar_comuna(texto):
+    return texto if texto is None else str(texto).strip().upper()
+
+
+def limpiar_direccion(texto):
+    return texto.strip() if isinstance(texto, str) else texto
+
+
+# {tabla: {columna: (función, motivo)}}
+TEXTOS = {
+    "ruta": {
+        "COMUNA": (limpiar_comuna, "COMUNA_NORMALIZADA"),
+        "DIRECCION": (limpiar_direccion, "DIRECCION_NORMALIZADA"),
+    },
+}
+
+
+#---------------- FUNCION VALIDAR (pandas) ------------------#
+def anotar(tabla, df, mascara, accion, motivo):
+    """Las filas marcadas, como registros de cuarentena (DATOS = la fila original en JSON)."""
+    filas = df[mascara]
+    if filas.empty:
+        return None
+    datos = filas.drop(columns=LLAVE_ORIGEN).to_json(orient="records", lines=True, force_ascii=False)
+    anotadas = filas[LLAVE_ORIGEN].copy()
+    anotadas.insert(0, "TABLA", tabla)
+    anotadas["ACCION"] = accion
+    anotadas["MOTIVO"] = motivo
+    anotadas["DATOS"] = datos.splitlines()
+    return anotadas
+
+
+def validar_tabla(tabla, df):
+    """Aplica las reglas de una tabla. Devuelve (filas válidas, lista de anotaciones)."""
+    anotaciones = []
+    if df.empty:
+        return df, anotaciones
+
+    # 1. Rechazos (con los valores como vinieron: una cantidad negativa no se "arregla")
+    rechazar = pd.Series(False, index=df.index)
+    for columna, motivo in POSITIVOS.get(tabla, []):
+        # fillna(0): una celda vacía tampoco es positiva
+        malas = ~(df[columna].fillna(0) > 0) & ~rechazar
+        anotaciones.append(anotar(tabla, df, malas, RECHAZADA, motivo))
+        rechazar |= malas
+    df = df[~rechazar].reset_index(drop=True)
+
+    # 2. Correcciones sobre las que quedan
+    columnas = MONTOS_ABSOLUTOS.get(tabla, [])
+    if columnas:
+        negativas = (df[columnas] < 0).any(axis=1)
+        anotaciones.append(anotar(tabla, df, negativas, CORREGIDA, MOTIVO_NEGATIVO))
+        df[columnas] = df[columnas].abs()
+    for columna, (funcion, motivo) in TEXTOS.get(tabla, {}).items():
+        # Solo los textos (una celda vacía ya viene como 0 desde construir_tabla)
+        limpia = df[columna].map(lambda valor: funcion(valor) if isinstance(valor, str) else valor)
+        cambio = limpia != df[columna]
+        anotaciones.append(anotar(tabla, df, cambio, CORREGIDA, motivo))
+        df[columna] = limpia
+    return df, [a for a in anotaciones if a is not None]
+
+
+def validar_tablas(finales):
+    """
+    Valida todas las tablas del ETL. Devuelve ({tabla: DataFrame válido},
+    DataFrame de cuarentena con TABLA, llave de origen, ACCION, MOTIVO y DATOS).
+    """
+    validas = {}
+    anotaciones = []
+    for tabla, df in finales.items():
+        validas[tabla], anotadas = validar_tabla(tabla, df)
+        anotaciones.extend(anotadas)
+    columnas = ["TABLA"] + LLAVE_ORIGEN + ["ACCION", "MOTIVO", "DATOS"]
+    cuarentena = pd.concat(anotaciones, ignore_index=True) if anotaciones else pd.DataFrame(columns=columnas)
+    return validas, cuarentena[columnas]
+
+
+# ==========================================================
+# TABLA DE CUARENTENA (SQLite)
+# ==========================================================
+def crear_tabla_cuarentena(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS etl_cuarentena (
+            TABLA TEXT NOT NULL,
+            ARCHIVO_ID TEXT,
+            PESTANA TEXT,
+            FILA INTEGER,
+            ACCION TEXT NOT NULL,
+            MOTIVO TEXT NOT NULL,
+            DATOS TEXT,
+            REGISTRADO TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conexion.execute(
+        "CREATE INDEX IF NOT EXISTS ix_etl_cuarentena_origen ON etl_cuarentena (ARCHIVO_ID, PESTANA)"
+    )
+    conexion.execute("CREATE INDEX IF NOT EXISTS ix_etl_cuarentena_motivo ON etl_cuarentena (TABLA, MOTIVO)")
+
+
+def datos_sql(conexion, tabla):
+    """json_object(...) con las columnas de la tabla (sin ID ni la llave de origen)."""
+    columnas = [fila[1] for fila in conexion.execute(f'PRAGMA table_info("{tabla}")')]
+    pares = [f"'{c}', \"{c}\"" for c in columnas if c != "ID" and c not in LLAVE_ORIGEN]
+    return f"json_object({', '.join(pares)})"
+
+
+def anotar_sql(conexion, tabla, condicion, accion, motivo):
+    conexion.execute(f"""
+        INSERT INTO etl_cuarentena (TABLA, ARCHIVO_ID, PESTANA, FILA, ACCION, MOTIVO, DATOS)
+        SELECT ?, ARCHIVO_ID, PESTANA, FILA, ?, ?, {datos_sql(conexion, tabla)}
+        FROM "{tabla}" WHERE {condicion}
+    """, (tabla, accion, motivo))
+
+
+def sanear_tablas_sql(conexion):
+    """Las mismas reglas que validar_tablas, sobre lo que ya está guardado en la base."""
+    for tabla, reglas in POSITIVOS.items():
+        for columna, motivo in reglas:
+            condicion = f'NOT COALESCE("{columna}" > 0, 0)'
+            anotar_sql(conexion, tabla, condicion, RECHAZADA, motivo)
+            conexion.execute(f'DELETE FROM "{tabla}" WHERE {condicion}')
+    for tabla, columnas in MONTOS_ABSOLUTOS.items():
+        condicion = " OR ".join(f'"{c}" < 0' for c in columnas)
+        anotar_sql(conexion, tabla, condicion, CORREGIDA, MOTIVO_NEGATIVO)
+        asignaciones = ", ".join(f'"{c}" = abs("{c}")' for c in columnas)
+        conexion.execute(f'UPDATE "{tabla}" SET {asignaciones} WHERE {condicion}')
+    for tabla, columnas in TEXTOS.items():
+        for columna, (funcion, motivo) in columnas.items():
+            conexion.create_function(f"LIMPIAR_{columna}", 1, funcion, deterministic=True)
+            condicion = f'"{columna}" IS NOT LIMPIAR_{columna}("{columna}")'
+            anotar_sql(conexion, tabla, condicion, CORREGIDA, motivo)
+            conexion.execute(f'UPDATE "{tabla}" SET "{columna}" = LIMPIAR_{columna}("{columna}") WHERE {condicion}')